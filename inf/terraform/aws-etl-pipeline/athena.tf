@@ -4,6 +4,7 @@
 # REC-003: JsonSerDe replaces LazySimpleSerDe (which is CSV, not JSON).
 # REC-004: Loader writes sidecar metadata JSON at metadata/{year}/{month}/{id}.json.
 # REC-005: Partition projection enabled — no MSCK REPAIR TABLE needed on new uploads.
+# clean_articles_rollup reads the compactor's per-partition rollups (compactor.tf).
 # ============================================================================
 
 # ---------------------------------------------------------------------------
@@ -66,6 +67,24 @@ resource "aws_glue_catalog_table" "clean_articles" {
       comment = "Approximate word count of the clean article body"
     }
 
+    columns {
+      name    = "heading_outline"
+      type    = "array<struct<level:int,text:string>>"
+      comment = "ATX headings outside fenced code, in document order (max 100)"
+    }
+
+    columns {
+      name    = "link_count"
+      type    = "bigint"
+      comment = "Inline links and autolinks in the clean Markdown (images excluded)"
+    }
+
+    columns {
+      name    = "reading_time_minutes"
+      type    = "int"
+      comment = "Estimated reading time at 200 words per minute, rounded up"
+    }
+
     columns {
       name    = "s3_key"
       type    = "string"
@@ -111,6 +130,76 @@ resource "aws_glue_catalog_table" "clean_articles" {
   }
 }
 
+# ---------------------------------------------------------------------------
+# Rollup table — one compressed file per partition written by the compactor.
+# Scans touch a handful of objects instead of one sidecar per article.
+# ---------------------------------------------------------------------------
+
+locals {
+  rollup_storage = {
+    ndjson = {
+      input_format   = "org.apache.hadoop.mapred.TextInputFormat"
+      output_format  = "org.apache.hadoop.hive.ql.io.HiveIgnoreKeyTextOutputFormat"
+      serde          = "org.openx.data.jsonserde.JsonSerDe"
+      classification = "json"
+    }
+    parquet = {
+      input_format   = "org.apache.hadoop.hive.ql.io.parquet.MapredParquetInputFormat"
+      output_format  = "org.apache.hadoop.hive.ql.io.parquet.MapredParquetOutputFormat"
+      serde          = "org.apache.hadoop.hive.ql.io.parquet.serde.ParquetHiveSerDe"
+      classification = "parquet"
+    }
+  }[var.metadata_rollup_format]
+}
+
+resource "aws_glue_catalog_table" "clean_articles_rollup" {
+  name          = "clean_articles_rollup"
+  database_name = aws_glue_catalog_database.etl_articles.name
+  description   = "Compacted article metadata (gzip NDJSON or Parquet) written by the compactor — partitioned by year/month"
+  table_type    = "EXTERNAL_TABLE"
+
+  parameters = {
+    "projection.enabled"        = "true"
+    "projection.year.type"      = "integer"
+    "projection.year.range"     = "2025,2099"
+    "projection.year.digits"    = "4"
+    "projection.month.type"     = "integer"
+    "projection.month.range"    = "01,12"
+    "projection.month.digits"   = "2"
+    "storage.location.template" = "s3://${var.clean_bucket_name}/rollups/metadata/$${year}/$${month}"
+    "classification"            = local.rollup_storage.classification
+  }
+
+  storage_descriptor {
+    location      = "s3://${var.clean_bucket_name}/rollups/metadata/"
+    input_format  = local.rollup_storage.input_format
+    output_format = local.rollup_storage.output_format
+
+    ser_de_info {
+      serialization_library = local.rollup_storage.serde
+    }
+
+    dynamic "columns" {
+      for_each = aws_glue_catalog_table.clean_articles.storage_descriptor[0].columns
+      content {
+        name    = columns.value.name
+        type    = columns.value.type
+        comment = columns.value.comment
+      }
+    }
+  }
+
+  partition_keys {
+    name = "year"
+    type = "string"
+  }
+
+  partition_keys {
+    name = "month"
+    type = "string"
+  }
+}
+
 # ---------------------------------------------------------------------------
 # Athena Workgroup
 # ---------------------------------------------------------------------------
@@ -0,0 +1,189 @@
+# ============================================================================
+# Metadata Compactor — rolls per-article metadata into columnar rollups
+# Scheduled Lambda that folds metadata/{year}/{month}/*.json sidecars and
+# metadata-buffer/ NDJSON files into one gzip NDJSON or Parquet file per
+# partition under rollups/metadata/, queried by the clean_articles_rollup table.
+# ============================================================================
+
+data "archive_file" "compactor_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/lambda_src/compactor"
+  output_path = "${path.module}/.terraform/lambda_zips/compactor.zip"
+
+  excludes = ["tests", "__pycache__", "*.pyc"]
+}
+
+#tfsec:ignore:AVD-AWS-0017 -- see note on orchestrator log group in lambda.tf.
+resource "aws_cloudwatch_log_group" "compactor" {
+  name              = "/aws/lambda/${local.name_prefix}-compactor"
+  retention_in_days = 7
+
+  tags = {
+    Name = "${local.name_prefix}-compactor-logs"
+  }
+}
+
+resource "aws_iam_role" "lambda_etl_compactor" {
+  name        = "${local.name_prefix}-compactor-role"
+  description = "Execution role for the ETL metadata compactor Lambda - reads metadata, writes rollups"
+
+  assume_role_policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Effect    = "Allow"
+      Principal = { Service = "lambda.amazonaws.com" }
+      Action    = "sts:AssumeRole"
+    }]
+  })
+}
+
+resource "aws_iam_role_policy" "compactor_policy" {
+  name = "compactor-policy"
+  role = aws_iam_role.lambda_etl_compactor.id
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [
+      {
+        # Unconditional: GetObject on a missing key (first rollup of a partition,
+        # first manifest) only returns 404 with ListBucket on the bucket — an
+        # s3:prefix condition does not apply to GetObject, so S3 would answer 403
+        Sid      = "ListCleanBucket"
+        Effect   = "Allow"
+        Action   = ["s3:ListBucket"]
+        Resource = aws_s3_bucket.etl_clean.arn
+      },
+      {
+        Sid    = "ReadMetadata"
+        Effect = "Allow"
+        Action = ["s3:GetObject"]
+        Resource = [
+          "${aws_s3_bucket.etl_clean.arn}/metadata/*",
+          "${aws_s3_bucket.etl_clean.arn}/metadata-buffer/*",
+          "${aws_s3_bucket.etl_clean.arn}/rollups/metadata/*",
+        ]
+      },
+      {
+        Sid      = "WriteRollups"
+        Effect   = "Allow"
+        Action   = ["s3:PutObject"]
+        Resource = "${aws_s3_bucket.etl_clean.arn}/rollups/metadata/*"
+      },
+      {
+        Sid      = "DeleteConsumedBuffers"
+        Effect   = "Allow"
+        Action   = ["s3:DeleteObject"]
+        Resource = "${aws_s3_bucket.etl_clean.arn}/metadata-buffer/*"
+      },
+      {
+        Sid    = "VPCNetworkInterfaces"
+        Effect = "Allow"
+        Action = [
+          "ec2:CreateNetworkInterface",
+          "ec2:DescribeNetworkInterfaces",
+          "ec2:DeleteNetworkInterface",
+          "ec2:AssignPrivateIpAddresses",
+          "ec2:UnassignPrivateIpAddresses",
+        ]
+        Resource = "*"
+      },
+      {
+        Sid    = "CloudWatchLogs"
+        Effect = "Allow"
+        Action = [
+          "logs:CreateLogStream",
+          "logs:PutLogEvents",
+        ]
+        Resource = "arn:aws:logs:${var.aws_region}:${data.aws_caller_identity.current.account_id}:log-group:/aws/lambda/${local.name_prefix}-compactor:*"
+      },
+    ]
+  })
+}
+
+resource "aws_lambda_function" "etl_compactor" {
+  function_name    = "${local.name_prefix}-compactor"
+  description      = "ETL compactor: rolls per-article metadata into partitioned gzip NDJSON / Parquet files"
+  role             = aws_iam_role.lambda_etl_compactor.arn
+  runtime          = "python3.12"
+  handler          = "handler.handler"
+  filename         = data.archive_file.compactor_zip.output_path
+  source_code_hash = data.archive_file.compactor_zip.output_base64sha256
+  timeout          = 300
+  memory_size      = 512
+  layers           = concat([aws_lambda_layer_version.etl_common.arn], var.compactor_layer_arns)
+
+  # Single writer — the manifest and rollups are read-modify-write
+  reserved_concurrent_executions = 1
+
+  tracing_config {
+    mode = "Active" # Active sampling for full X-Ray trace visibility (SEC-TRACE-001)
+  }
+
+  vpc_config {
+    subnet_ids         = [aws_subnet.etl_private_a.id, aws_subnet.etl_private_b.id]
+    security_group_ids = [aws_security_group.lambda_etl.id]
+  }
+
+  environment {
+    variables = {
+      CLEAN_BUCKET_NAME = aws_s3_bucket.etl_clean.id
+      ROLLUP_FORMAT     = var.metadata_rollup_format
+    }
+  }
+
+  depends_on = [
+    aws_cloudwatch_log_group.compactor,
+    aws_iam_role_policy.compactor_policy,
+  ]
+
+  tags = {
+    Name = "${local.name_prefix}-compactor"
+  }
+}
+
+# Scheduled runs compact the current and previous month
+resource "aws_cloudwatch_event_rule" "metadata_compaction" {
+  name                = "${local.name_prefix}-metadata-compaction"
+  description         = "Periodically rolls ETL article metadata into columnar rollups"
+  schedule_expression = var.metadata_compaction_schedule
+
+  tags = {
+    Name = "${local.name_prefix}-metadata-compaction"
+  }
+}
+
+resource "aws_cloudwatch_event_target" "compactor_lambda" {
+  rule = aws_cloudwatch_event_rule.metadata_compaction.name
+  arn  = aws_lambda_function.etl_compactor.arn
+}
+
+resource "aws_lambda_permission" "eventbridge_invoke_compactor" {
+  statement_id  = "AllowEventBridgeInvoke"
+  action        = "lambda:InvokeFunction"
+  function_name = aws_lambda_function.etl_compactor.function_name
+  principal     = "events.amazonaws.com"
+  source_arn    = aws_cloudwatch_event_rule.metadata_compaction.arn
+}
+
+resource "aws_cloudwatch_metric_alarm" "compactor_errors" {
+  alarm_name          = "${local.name_prefix}-compactor-errors"
+  alarm_description   = "ETL metadata compactor Lambda has errors — rollups may be stale"
+  comparison_operator = "GreaterThanThreshold"
+  evaluation_periods  = 1
+  metric_name         = "Errors"
+  namespace           = "AWS/Lambda"
+  period              = 300
+  statistic           = "Sum"
+  threshold           = 0
+  treat_missing_data  = "notBreaching"
+
+  dimensions = {
+    FunctionName = aws_lambda_function.etl_compactor.function_name
+  }
+
+  alarm_actions = [aws_sns_topic.etl_alerts.arn]
+
+  tags = {
+    Name = "${local.name_prefix}-compactor-errors"
+  }
+}
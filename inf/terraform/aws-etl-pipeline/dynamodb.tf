@@ -60,3 +60,108 @@ resource "aws_dynamodb_table" "article_metadata" {
     Name = "${local.name_prefix}-article-metadata"
   }
 }
+
+# ============================================================================
+# DynamoDB — extraction-cache table
+# Content-addressed Bedrock extraction results: cache_key is
+# sha256(agent ID + alias ID + model ID + raw Markdown). Entries expire via TTL.
+# No PITR — every item can be regenerated by calling Bedrock again.
+# ============================================================================
+
+#tfsec:ignore:AVD-AWS-0025 -- see note on article_metadata table above (SEC-004).
+#tfsec:ignore:AVD-AWS-0024 -- cache contents are fully reproducible from the raw bucket; PITR adds cost without recovery value.
+resource "aws_dynamodb_table" "extraction_cache" {
+  name         = "${local.name_prefix}-extraction-cache"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "cache_key"
+
+  attribute {
+    name = "cache_key"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  server_side_encryption {
+    enabled = true
+  }
+
+  tags = {
+    Name = "${local.name_prefix}-extraction-cache"
+  }
+}
+
+# ============================================================================
+# DynamoDB — boilerplate-blocks table
+# Per-site fingerprints of blocks near the top and bottom of each page, with
+# the set of pages they appeared on; the orchestrator strips blocks repeated
+# on enough other pages of the same site. Entries expire via TTL.
+# ============================================================================
+
+#tfsec:ignore:AVD-AWS-0025 -- see note on article_metadata table above (SEC-004).
+#tfsec:ignore:AVD-AWS-0024 -- fingerprints are rebuilt as pages are processed; PITR has no recovery value.
+resource "aws_dynamodb_table" "boilerplate_blocks" {
+  name         = "${local.name_prefix}-boilerplate-blocks"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "site"
+  range_key    = "block_hash"
+
+  attribute {
+    name = "site"
+    type = "S"
+  }
+
+  attribute {
+    name = "block_hash"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  server_side_encryption {
+    enabled = true
+  }
+
+  tags = {
+    Name = "${local.name_prefix}-boilerplate-blocks"
+  }
+}
+
+# ============================================================================
+# DynamoDB — rate-limiter table
+# Shared AIMD request budget for Bedrock across concurrent orchestrator
+# invocations: one config item holding the current rate plus one atomic
+# counter item per one-second window (expired via TTL).
+# ============================================================================
+
+#tfsec:ignore:AVD-AWS-0025 -- see note on article_metadata table above (SEC-004).
+#tfsec:ignore:AVD-AWS-0024 -- limiter state is ephemeral and self-initialising; PITR has no recovery value.
+resource "aws_dynamodb_table" "rate_limiter" {
+  name         = "${local.name_prefix}-rate-limiter"
+  billing_mode = "PAY_PER_REQUEST"
+  hash_key     = "limiter_id"
+
+  attribute {
+    name = "limiter_id"
+    type = "S"
+  }
+
+  ttl {
+    attribute_name = "expires_at"
+    enabled        = true
+  }
+
+  server_side_encryption {
+    enabled = true
+  }
+
+  tags = {
+    Name = "${local.name_prefix}-rate-limiter"
+  }
+}
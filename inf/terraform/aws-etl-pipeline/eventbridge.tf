@@ -2,6 +2,7 @@
 # EventBridge — S3 raw-bucket upload trigger
 # Filters ObjectCreated events for .md suffix on the raw bucket.
 # DLQ captures events that couldn't be delivered to the orchestrator (REC-002).
+# In batch mode the rule targets the SQS ingest queue instead of the Lambda.
 # ============================================================================
 
 resource "aws_cloudwatch_event_rule" "s3_raw_upload" {
@@ -27,6 +28,8 @@ resource "aws_cloudwatch_event_rule" "s3_raw_upload" {
 }
 
 resource "aws_cloudwatch_event_target" "orchestrator_lambda" {
+  count = var.orchestrator_batch_mode ? 0 : 1
+
   rule = aws_cloudwatch_event_rule.s3_raw_upload.name
   arn  = aws_lambda_function.etl_orchestrator.arn
 
@@ -36,6 +39,23 @@ resource "aws_cloudwatch_event_target" "orchestrator_lambda" {
   }
 }
 
+moved {
+  from = aws_cloudwatch_event_target.orchestrator_lambda
+  to   = aws_cloudwatch_event_target.orchestrator_lambda[0]
+}
+
+# Batch mode: buffer events in SQS so one orchestrator invocation handles many objects
+resource "aws_cloudwatch_event_target" "orchestrator_ingest_queue" {
+  count = var.orchestrator_batch_mode ? 1 : 0
+
+  rule = aws_cloudwatch_event_rule.s3_raw_upload.name
+  arn  = aws_sqs_queue.orchestrator_ingest[0].arn
+
+  dead_letter_config {
+    arn = aws_sqs_queue.orchestrator_dlq.arn
+  }
+}
+
 # Grant EventBridge permission to invoke the orchestrator Lambda
 resource "aws_lambda_permission" "eventbridge_invoke_orchestrator" {
   statement_id  = "AllowEventBridgeInvoke"
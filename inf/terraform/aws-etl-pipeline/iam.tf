@@ -4,7 +4,10 @@
 
 # ---------------------------------------------------------------------------
 # Lambda — Orchestrator Role
-# Permissions: read raw S3, invoke Bedrock Agent, invoke loader Lambda, VPC ENI, DLQ
+# Permissions: read raw S3, invoke Bedrock Agent, write completion staging objects,
+# extraction cache, rate limiter, VPC ENI, DLQ, (batch mode) consume the SQS ingest
+# queue, and the loader hand-off: invoke the loader Lambda, send to the loader queue,
+# or (inline) the loader's own S3 / DynamoDB writes
 # ---------------------------------------------------------------------------
 
 resource "aws_iam_role" "lambda_etl_orchestrator" {
@@ -27,11 +30,11 @@ resource "aws_iam_role_policy" "orchestrator_policy" {
 
   policy = jsonencode({
     Version = "2012-10-17"
-    Statement = [
+    Statement = concat([
       {
         Sid      = "ReadRawBucket"
         Effect   = "Allow"
-        Action   = ["s3:GetObject", "s3:HeadObject"]
+        Action   = ["s3:GetObject"] # size guard uses the event + GET response; no HEAD
         Resource = "${aws_s3_bucket.etl_raw.arn}/*"
       },
       {
@@ -41,10 +44,28 @@ resource "aws_iam_role_policy" "orchestrator_policy" {
         Resource = "arn:aws:bedrock:${var.aws_region}:${data.aws_caller_identity.current.account_id}:agent-alias/*"
       },
       {
-        Sid      = "InvokeLoaderLambda"
+        Sid      = "WriteCompletionStaging"
         Effect   = "Allow"
-        Action   = ["lambda:InvokeFunction"]
-        Resource = aws_lambda_function.etl_loader.arn
+        Action   = ["s3:PutObject", "s3:AbortMultipartUpload"]
+        Resource = "${aws_s3_bucket.etl_clean.arn}/staging/*"
+      },
+      {
+        Sid      = "ExtractionCache"
+        Effect   = "Allow"
+        Action   = ["dynamodb:GetItem", "dynamodb:PutItem"]
+        Resource = aws_dynamodb_table.extraction_cache.arn
+      },
+      {
+        Sid      = "BoilerplateBlocks"
+        Effect   = "Allow"
+        Action   = ["dynamodb:BatchGetItem", "dynamodb:UpdateItem"]
+        Resource = aws_dynamodb_table.boilerplate_blocks.arn
+      },
+      {
+        Sid      = "BedrockRateLimiter"
+        Effect   = "Allow"
+        Action   = ["dynamodb:GetItem", "dynamodb:PutItem", "dynamodb:UpdateItem"]
+        Resource = aws_dynamodb_table.rate_limiter.arn
       },
       {
         Sid    = "VPCNetworkInterfaces"
@@ -73,7 +94,51 @@ resource "aws_iam_role_policy" "orchestrator_policy" {
         Action   = ["sqs:SendMessage"]
         Resource = aws_sqs_queue.orchestrator_dlq.arn
       },
-    ]
+      ], var.orchestrator_batch_mode ? [
+      {
+        Sid    = "ConsumeIngestQueue"
+        Effect = "Allow"
+        Action = [
+          "sqs:ReceiveMessage",
+          "sqs:DeleteMessage",
+          "sqs:GetQueueAttributes",
+        ]
+        Resource = aws_sqs_queue.orchestrator_ingest[0].arn
+      },
+      ] : [], var.loader_handoff_mode == "lambda" ? [
+      {
+        Sid      = "InvokeLoaderLambda"
+        Effect   = "Allow"
+        Action   = ["lambda:InvokeFunction"]
+        Resource = aws_lambda_function.etl_loader.arn
+      },
+      ] : [], var.loader_handoff_mode == "sqs" ? [
+      {
+        Sid      = "SendToLoaderQueue"
+        Effect   = "Allow"
+        Action   = ["sqs:SendMessage"]
+        Resource = aws_sqs_queue.loader_handoff[0].arn
+      },
+      ] : [], var.loader_handoff_mode == "inline" ? [
+      # The loader runs in-process — same write permissions as the loader role
+      {
+        Sid      = "LoaderWriteCleanBucket"
+        Effect   = "Allow"
+        Action   = ["s3:PutObject", "s3:GetObject"]
+        Resource = "${aws_s3_bucket.etl_clean.arn}/*"
+      },
+      {
+        Sid    = "LoaderDynamoDBWrite"
+        Effect = "Allow"
+        Action = [
+          "dynamodb:PutItem",
+          "dynamodb:GetItem",
+          "dynamodb:BatchGetItem",
+          "dynamodb:BatchWriteItem",
+        ]
+        Resource = aws_dynamodb_table.article_metadata.arn
+      },
+    ] : [])
   })
 
   depends_on = [aws_lambda_function.etl_loader]
@@ -81,7 +146,8 @@ resource "aws_iam_role_policy" "orchestrator_policy" {
 
 # ---------------------------------------------------------------------------
 # Lambda — Loader Role
-# Permissions: write clean S3, DynamoDB PutItem/UpdateItem, VPC ENI, DLQ
+# Permissions: write clean S3, DynamoDB PutItem/UpdateItem, VPC ENI, DLQ, and
+# (sqs hand-off) consume the loader queue
 # ---------------------------------------------------------------------------
 
 resource "aws_iam_role" "lambda_etl_loader" {
@@ -104,7 +170,7 @@ resource "aws_iam_role_policy" "loader_policy" {
 
   policy = jsonencode({
     Version = "2012-10-17"
-    Statement = [
+    Statement = concat([
       {
         Sid      = "WriteCleanBucket"
         Effect   = "Allow"
@@ -118,6 +184,8 @@ resource "aws_iam_role_policy" "loader_policy" {
           "dynamodb:PutItem",
           "dynamodb:UpdateItem",
           "dynamodb:GetItem",
+          "dynamodb:BatchGetItem",   # batch loader path (stored content hashes)
+          "dynamodb:BatchWriteItem", # batch loader path (batch_writer)
         ]
         Resource = aws_dynamodb_table.article_metadata.arn
       },
@@ -148,7 +216,18 @@ resource "aws_iam_role_policy" "loader_policy" {
         Action   = ["sqs:SendMessage"]
         Resource = aws_sqs_queue.loader_dlq.arn
       },
-    ]
+      ], var.loader_handoff_mode == "sqs" ? [
+      {
+        Sid    = "ConsumeLoaderQueue"
+        Effect = "Allow"
+        Action = [
+          "sqs:ReceiveMessage",
+          "sqs:DeleteMessage",
+          "sqs:GetQueueAttributes",
+        ]
+        Resource = aws_sqs_queue.loader_handoff[0].arn
+      },
+    ] : [])
   })
 }
 
@@ -266,24 +345,50 @@ resource "aws_vpc_endpoint_policy" "s3" {
   })
 }
 
-# DynamoDB Gateway Endpoint — restrict to loader only
+# DynamoDB Gateway Endpoint — restrict to the ETL Lambda roles and their tables
 resource "aws_vpc_endpoint_policy" "dynamodb" {
   vpc_endpoint_id = aws_vpc_endpoint.dynamodb.id
 
   policy = jsonencode({
     Version = "2012-10-17"
-    Statement = [{
-      Sid    = "AllowLoaderDynamoDBAccess"
-      Effect = "Allow"
-      Principal = {
-        AWS = aws_iam_role.lambda_etl_loader.arn
-      }
-      Action = [
-        "dynamodb:PutItem",
-        "dynamodb:UpdateItem",
-        "dynamodb:GetItem",
-      ]
-      Resource = aws_dynamodb_table.article_metadata.arn
-    }]
+    Statement = [
+      {
+        Sid    = "AllowLoaderDynamoDBAccess"
+        Effect = "Allow"
+        Principal = {
+          # The orchestrator runs the loader in-process with the inline hand-off
+          AWS = concat(
+            [aws_iam_role.lambda_etl_loader.arn],
+            var.loader_handoff_mode == "inline" ? [aws_iam_role.lambda_etl_orchestrator.arn] : [],
+          )
+        }
+        Action = [
+          "dynamodb:PutItem",
+          "dynamodb:UpdateItem",
+          "dynamodb:GetItem",
+          "dynamodb:BatchGetItem",
+          "dynamodb:BatchWriteItem",
+        ]
+        Resource = aws_dynamodb_table.article_metadata.arn
+      },
+      {
+        Sid    = "AllowOrchestratorDynamoDBAccess"
+        Effect = "Allow"
+        Principal = {
+          AWS = aws_iam_role.lambda_etl_orchestrator.arn
+        }
+        Action = [
+          "dynamodb:PutItem",
+          "dynamodb:UpdateItem",
+          "dynamodb:GetItem",
+          "dynamodb:BatchGetItem",
+        ]
+        Resource = [
+          aws_dynamodb_table.extraction_cache.arn,
+          aws_dynamodb_table.rate_limiter.arn,
+          aws_dynamodb_table.boilerplate_blocks.arn,
+        ]
+      },
+    ]
   })
 }
@@ -49,6 +49,78 @@ resource "aws_sqs_queue_policy" "orchestrator_dlq_policy" {
   })
 }
 
+# ---------------------------------------------------------------------------
+# Orchestrator ingest queue (batch mode only)
+# EventBridge → SQS → Lambda event source mapping. Records that fail are
+# reported individually (ReportBatchItemFailures) and land in the orchestrator
+# DLQ after maxReceiveCount attempts.
+# ---------------------------------------------------------------------------
+
+resource "aws_sqs_queue" "orchestrator_ingest" {
+  count = var.orchestrator_batch_mode ? 1 : 0
+
+  name                       = "${local.name_prefix}-orchestrator-ingest"
+  visibility_timeout_seconds = var.orchestrator_timeout_seconds * 6 # AWS guidance for SQS event sources
+  message_retention_seconds  = 345600                               # 4 days
+  sqs_managed_sse_enabled    = true                                 # SSE with SQS-managed keys (SEC-DLQ-001)
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.orchestrator_dlq.arn
+    maxReceiveCount     = 3
+  })
+
+  tags = {
+    Name = "${local.name_prefix}-orchestrator-ingest"
+  }
+}
+
+resource "aws_sqs_queue_policy" "orchestrator_ingest_policy" {
+  count = var.orchestrator_batch_mode ? 1 : 0
+
+  queue_url = aws_sqs_queue.orchestrator_ingest[0].url
+
+  policy = jsonencode({
+    Version = "2012-10-17"
+    Statement = [{
+      Effect    = "Allow"
+      Principal = { Service = "events.amazonaws.com" }
+      Action    = "sqs:SendMessage"
+      Resource  = aws_sqs_queue.orchestrator_ingest[0].arn
+      Condition = {
+        ArnEquals = {
+          "aws:SourceArn" = aws_cloudwatch_event_rule.s3_raw_upload.arn
+        }
+      }
+    }]
+  })
+}
+
+# ---------------------------------------------------------------------------
+# Loader queue (loader_handoff_mode = "sqs" only)
+# Orchestrator → SQS → loader event source mapping. The mapping's maximum
+# concurrency caps simultaneous loaders, so bursts queue up instead of
+# fanning out into DynamoDB / S3. Failed payloads are reported individually
+# and land in the loader DLQ after maxReceiveCount attempts.
+# ---------------------------------------------------------------------------
+
+resource "aws_sqs_queue" "loader_handoff" {
+  count = var.loader_handoff_mode == "sqs" ? 1 : 0
+
+  name                       = "${local.name_prefix}-loader-handoff"
+  visibility_timeout_seconds = var.loader_timeout_seconds * 6 # AWS guidance for SQS event sources
+  message_retention_seconds  = 345600                         # 4 days
+  sqs_managed_sse_enabled    = true                           # SSE with SQS-managed keys (SEC-DLQ-001)
+
+  redrive_policy = jsonencode({
+    deadLetterTargetArn = aws_sqs_queue.loader_dlq.arn
+    maxReceiveCount     = 3
+  })
+
+  tags = {
+    Name = "${local.name_prefix}-loader-handoff"
+  }
+}
+
 # ---------------------------------------------------------------------------
 # ZIP archives (Terraform archives the lambda_src directories at plan time)
 # ---------------------------------------------------------------------------
@@ -69,6 +141,51 @@ data "archive_file" "loader_zip" {
   excludes = ["tests", "__pycache__", "*.pyc"]
 }
 
+# Shared etl_common package (lazy boto3 clients, EMF metrics) — lambda_src/common/python is
+# extracted to /opt/python, which Lambda puts on sys.path
+data "archive_file" "common_layer_zip" {
+  type        = "zip"
+  source_dir  = "${path.module}/lambda_src/common"
+  output_path = "${path.module}/.terraform/lambda_zips/common_layer.zip"
+
+  excludes = ["tests", "**/__pycache__", "**/*.pyc"]
+}
+
+# Loader source as a library for loader_handoff_mode = "inline" — extracted to
+# /opt/loader, where the orchestrator's loader_library imports it
+data "archive_file" "loader_library_layer_zip" {
+  count = var.loader_handoff_mode == "inline" ? 1 : 0
+
+  type        = "zip"
+  output_path = "${path.module}/.terraform/lambda_zips/loader_library_layer.zip"
+
+  dynamic "source" {
+    for_each = fileset("${path.module}/lambda_src/loader", "*.py")
+    content {
+      content  = file("${path.module}/lambda_src/loader/${source.value}")
+      filename = "loader/${source.value}"
+    }
+  }
+}
+
+resource "aws_lambda_layer_version" "loader_library" {
+  count = var.loader_handoff_mode == "inline" ? 1 : 0
+
+  layer_name          = "${local.name_prefix}-loader-library"
+  description         = "ETL loader handler, imported in-process by the orchestrator (inline hand-off)"
+  filename            = data.archive_file.loader_library_layer_zip[0].output_path
+  source_code_hash    = data.archive_file.loader_library_layer_zip[0].output_base64sha256
+  compatible_runtimes = ["python3.12"]
+}
+
+resource "aws_lambda_layer_version" "etl_common" {
+  layer_name          = "${local.name_prefix}-common"
+  description         = "Shared code for the ETL Lambdas (etl_common package)"
+  filename            = data.archive_file.common_layer_zip.output_path
+  source_code_hash    = data.archive_file.common_layer_zip.output_base64sha256
+  compatible_runtimes = ["python3.12"]
+}
+
 # ---------------------------------------------------------------------------
 # CloudWatch Log Groups (7-day retention)
 # ---------------------------------------------------------------------------
@@ -99,7 +216,7 @@ resource "aws_cloudwatch_log_group" "loader" {
 
 resource "aws_lambda_function" "etl_orchestrator" {
   function_name    = "${local.name_prefix}-orchestrator"
-  description      = "ETL orchestrator: validates raw .md, calls Bedrock Agent, invokes loader"
+  description      = "ETL orchestrator: validates raw .md, calls Bedrock Agent, hands off to loader"
   role             = aws_iam_role.lambda_etl_orchestrator.arn
   runtime          = "python3.12"
   handler          = "handler.handler"
@@ -107,6 +224,10 @@ resource "aws_lambda_function" "etl_orchestrator" {
   source_code_hash = data.archive_file.orchestrator_zip.output_base64sha256
   timeout          = var.orchestrator_timeout_seconds
   memory_size      = 256
+  layers           = concat(
+    [aws_lambda_layer_version.etl_common.arn],
+    aws_lambda_layer_version.loader_library[*].arn, # inline hand-off only
+  )
 
   # REC-006: cap concurrent Bedrock invocations to control cost and throttle risk
   reserved_concurrent_executions = var.orchestrator_reserved_concurrency
@@ -125,13 +246,37 @@ resource "aws_lambda_function" "etl_orchestrator" {
   }
 
   environment {
-    variables = {
-      BEDROCK_AGENT_ID       = aws_bedrockagent_agent.content_extractor.agent_id
-      BEDROCK_AGENT_ALIAS_ID = aws_bedrockagent_agent_alias.live.agent_alias_id
-      BEDROCK_MODEL_ID       = var.bedrock_model_id
-      LOADER_FUNCTION_NAME   = aws_lambda_function.etl_loader.function_name
-      MAX_FILE_BYTES         = "204800" # 200 KB
-    }
+    variables = merge(
+      {
+        BEDROCK_AGENT_ID             = aws_bedrockagent_agent.content_extractor.agent_id
+        BEDROCK_AGENT_ALIAS_ID       = aws_bedrockagent_agent_alias.live.agent_alias_id
+        BEDROCK_MODEL_ID             = var.bedrock_model_id
+        LOADER_FUNCTION_NAME         = aws_lambda_function.etl_loader.function_name
+        MAX_FILE_BYTES               = tostring(var.max_file_bytes)
+        PRECLEAN_MARKDOWN            = tostring(var.preclean_raw_markdown)
+        BOILERPLATE_STRIP            = tostring(var.boilerplate_stripping)
+        BOILERPLATE_TABLE            = aws_dynamodb_table.boilerplate_blocks.name
+        BOILERPLATE_MIN_REPEAT_PAGES = tostring(var.boilerplate_min_repeat_pages)
+        MODEL_MIN_WORDS              = tostring(var.bedrock_min_words)
+        BATCH_MAX_WORKERS            = tostring(var.orchestrator_batch_max_workers)
+        EXTRACTION_CACHE_TABLE       = aws_dynamodb_table.extraction_cache.name
+        EXTRACTION_CACHE_TTL_DAYS    = tostring(var.extraction_cache_ttl_days)
+        COMPLETION_STAGING_BUCKET    = var.stream_completion_to_s3 ? aws_s3_bucket.etl_clean.id : ""
+        LARGE_DOC_MAX_BYTES          = tostring(var.large_doc_max_bytes)
+        CHUNK_MAX_TOKENS             = tostring(var.chunk_max_tokens)
+        CHUNK_MAX_CONCURRENCY        = tostring(var.chunk_max_concurrency)
+        RATE_LIMITER_TABLE           = aws_dynamodb_table.rate_limiter.name
+        BEDROCK_INITIAL_RPS          = tostring(var.bedrock_initial_rps)
+        BEDROCK_MIN_RPS              = tostring(var.bedrock_min_rps)
+        BEDROCK_MAX_RPS              = tostring(var.bedrock_max_rps)
+        BEDROCK_MAX_RETRIES          = tostring(var.bedrock_max_retries)
+        METRICS_NAMESPACE            = local.metrics_namespace
+        LOADER_HANDOFF_MODE          = var.loader_handoff_mode
+        LOADER_QUEUE_URL             = var.loader_handoff_mode == "sqs" ? aws_sqs_queue.loader_handoff[0].url : ""
+      },
+      # Inline hand-off runs the loader in this function — it needs the loader's settings
+      { for name, value in local.loader_environment : name => value if var.loader_handoff_mode == "inline" },
+    )
   }
 
   depends_on = [
@@ -150,10 +295,33 @@ resource "aws_lambda_function_event_invoke_config" "orchestrator" {
   maximum_retry_attempts = 0
 }
 
+resource "aws_lambda_event_source_mapping" "orchestrator_ingest" {
+  count = var.orchestrator_batch_mode ? 1 : 0
+
+  event_source_arn                   = aws_sqs_queue.orchestrator_ingest[0].arn
+  function_name                      = aws_lambda_function.etl_orchestrator.arn
+  batch_size                         = var.orchestrator_batch_size
+  maximum_batching_window_in_seconds = 5
+  function_response_types            = ["ReportBatchItemFailures"]
+
+  depends_on = [aws_iam_role_policy.orchestrator_policy]
+}
+
 # ---------------------------------------------------------------------------
 # Loader Lambda
 # ---------------------------------------------------------------------------
 
+locals {
+  # Also set on the orchestrator when it runs the loader in-process (inline hand-off)
+  loader_environment = {
+    CLEAN_BUCKET_NAME   = aws_s3_bucket.etl_clean.id
+    DYNAMODB_TABLE_NAME = aws_dynamodb_table.article_metadata.name
+    LOADER_MAX_WORKERS  = tostring(var.loader_max_workers)
+    METADATA_OUTPUT     = var.loader_metadata_output
+    METRICS_NAMESPACE   = local.metrics_namespace
+  }
+}
+
 resource "aws_lambda_function" "etl_loader" {
   function_name    = "${local.name_prefix}-loader"
   description      = "ETL loader: writes clean .md to S3, metadata JSON sidecar, and DynamoDB item"
@@ -164,6 +332,7 @@ resource "aws_lambda_function" "etl_loader" {
   source_code_hash = data.archive_file.loader_zip.output_base64sha256
   timeout          = var.loader_timeout_seconds # 15s — fails fast on silent hangs (REC-018)
   memory_size      = 256
+  layers           = [aws_lambda_layer_version.etl_common.arn]
 
   tracing_config {
     mode = "Active" # Active sampling for full X-Ray trace visibility (SEC-TRACE-001)
@@ -179,10 +348,7 @@ resource "aws_lambda_function" "etl_loader" {
   }
 
   environment {
-    variables = {
-      CLEAN_BUCKET_NAME   = aws_s3_bucket.etl_clean.id
-      DYNAMODB_TABLE_NAME = aws_dynamodb_table.article_metadata.name
-    }
+    variables = local.loader_environment
   }
 
   depends_on = [
@@ -201,6 +367,22 @@ resource "aws_lambda_function_event_invoke_config" "loader" {
   maximum_retry_attempts = 2
 }
 
+resource "aws_lambda_event_source_mapping" "loader_handoff" {
+  count = var.loader_handoff_mode == "sqs" ? 1 : 0
+
+  event_source_arn                   = aws_sqs_queue.loader_handoff[0].arn
+  function_name                      = aws_lambda_function.etl_loader.arn
+  batch_size                         = var.loader_queue_batch_size
+  maximum_batching_window_in_seconds = 1
+  function_response_types            = ["ReportBatchItemFailures"]
+
+  scaling_config {
+    maximum_concurrency = var.loader_queue_max_concurrency
+  }
+
+  depends_on = [aws_iam_role_policy.loader_policy]
+}
+
 # ---------------------------------------------------------------------------
 # CloudWatch Alarms (REC-014)
 # ---------------------------------------------------------------------------
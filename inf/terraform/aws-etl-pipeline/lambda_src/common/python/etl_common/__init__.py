@@ -0,0 +1,4 @@
+"""
+Code shared by the ETL Lambdas, shipped as the etl-common Lambda layer
+(lambda_src/common/python → /opt/python on the function's sys.path).
+"""
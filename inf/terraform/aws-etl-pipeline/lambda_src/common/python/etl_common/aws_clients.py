@@ -0,0 +1,76 @@
+"""
+Lazily created, cached boto3 clients
+------------------------------------
+Creating a boto3 client loads and parses the service model — tens of
+milliseconds per service — so building every client at import time puts that
+cost on every cold start, even for clients an invocation never uses.
+
+LazyClient is a module-level stand-in that creates the real client on first
+attribute access. Real clients are cached per service and shared by every
+LazyClient and thread in the process (botocore clients are thread-safe; client
+creation through the default session is not, hence the lock).
+
+All clients use one tuned botocore Config:
+  - max_pool_connections sized for the handlers' thread pools (default 10 warns
+    and serialises once more threads than that share a client)
+  - TCP keep-alive so warm invocations reuse connections across idle gaps
+  - short connect timeout, bounded read timeout (longer for streamed Bedrock
+    completions), and the "standard" retry mode
+"""
+
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+BOTO_CONFIG = Config(
+    max_pool_connections=int(os.environ.get("BOTO_MAX_POOL_CONNECTIONS", "32")),
+    tcp_keepalive=True,
+    connect_timeout=float(os.environ.get("BOTO_CONNECT_TIMEOUT_SECONDS", "2")),
+    read_timeout=float(os.environ.get("BOTO_READ_TIMEOUT_SECONDS", "15")),
+    retries={"mode": "standard", "max_attempts": 3},
+)
+
+# Per-service overrides merged over BOTO_CONFIG
+SERVICE_CONFIG = {
+    # InvokeAgent streams the completion; gaps between chunks can be long
+    "bedrock-agent-runtime": Config(read_timeout=120),
+}
+
+_clients = {}
+_lock = threading.Lock()
+
+
+def client(service_name: str):
+    """Return the process-wide client for service_name, creating it on first use."""
+    cached = _clients.get(service_name)
+    if cached is not None:
+        return cached
+    with _lock:
+        if service_name not in _clients:
+            config = BOTO_CONFIG
+            if service_name in SERVICE_CONFIG:
+                config = config.merge(SERVICE_CONFIG[service_name])
+            _clients[service_name] = boto3.client(service_name, config=config)
+        return _clients[service_name]
+
+
+def reset() -> None:
+    """Drop cached clients (tests that switch mocked environments between cases)."""
+    with _lock:
+        _clients.clear()
+
+
+class LazyClient:
+    """Module-level placeholder that resolves to client(service_name) on first use."""
+
+    def __init__(self, service_name: str):
+        self.service_name = service_name
+
+    def __getattr__(self, name: str):
+        # Only called for attributes not set on the proxy itself
+        return getattr(client(self.service_name), name)
+
+    def __repr__(self) -> str:
+        return f"LazyClient({self.service_name!r})"
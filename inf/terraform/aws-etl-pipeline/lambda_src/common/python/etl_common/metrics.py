@@ -0,0 +1,144 @@
+"""
+CloudWatch Embedded Metric Format (EMF) instrumentation
+-------------------------------------------------------
+Each Metrics object collects the measurements of one unit of work (one
+document, one batch) and flush() prints them as a single EMF JSON document on
+stdout. CloudWatch Logs extracts the metrics asynchronously — no PutMetricData
+calls, no extra IAM permissions, no added latency.
+
+Metrics carry a single `Function` dimension (orchestrator / loader) so p50/p99
+per stage stay cheap; the correlation_id and other high-cardinality values are
+written as properties, searchable in Logs Insights next to the structured logs.
+
+Tests swap the stdout sink for an in-memory one:
+
+    with metrics.capture() as sink:
+        handler(event, context)
+    assert sink.values("S3ReadMs")
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+NAMESPACE = os.environ.get("METRICS_NAMESPACE", "ETLPipeline")
+
+MILLISECONDS = "Milliseconds"
+COUNT = "Count"
+BYTES = "Bytes"
+
+
+class StdoutSink:
+    """Print EMF documents to stdout, where Lambda forwards them to CloudWatch Logs."""
+
+    def emit(self, document: dict) -> None:
+        # Raw stdout, not the logging module: EMF lines must be bare JSON
+        sys.stdout.write(json.dumps(document) + "\n")
+        sys.stdout.flush()
+
+
+class MemorySink:
+    """Collect EMF documents in memory for assertions in tests."""
+
+    def __init__(self):
+        self.documents = []
+
+    def emit(self, document: dict) -> None:
+        self.documents.append(document)
+
+    def values(self, name: str, function: str = None) -> list:
+        """Every recorded value of metric `name`, optionally for one Function."""
+        return [
+            doc[name]
+            for doc in self.documents
+            if name in doc and (function is None or doc.get("Function") == function)
+        ]
+
+
+_sink = StdoutSink()
+_sink_lock = threading.Lock()
+
+
+def set_sink(sink):
+    """Replace the process-wide sink and return the previous one."""
+    global _sink
+    with _sink_lock:
+        previous, _sink = _sink, sink
+    return previous
+
+
+@contextmanager
+def capture():
+    """Route every flushed document into a fresh MemorySink for the duration of the block."""
+    sink = MemorySink()
+    previous = set_sink(sink)
+    try:
+        yield sink
+    finally:
+        set_sink(previous)
+
+
+class Metrics:
+    """Measurements for one unit of work, emitted together as one EMF document."""
+
+    def __init__(self, function: str, correlation_id: str, namespace: str = None):
+        self.function = function
+        self.correlation_id = correlation_id
+        self.namespace = namespace or NAMESPACE
+        self._values = {}
+        self._units = {}
+        self._properties = {}
+        self._lock = threading.Lock()  # add() is called from extraction worker threads
+
+    def put(self, name: str, value: float, unit: str = MILLISECONDS) -> None:
+        """Record a metric value (the last value wins)."""
+        with self._lock:
+            self._values[name] = value
+            self._units[name] = unit
+
+    def add(self, name: str, value: float = 1, unit: str = COUNT) -> None:
+        """Increment a metric, e.g. retries summed across concurrent chunk extractions."""
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + value
+            self._units[name] = unit
+
+    def set_property(self, name: str, value) -> None:
+        """Attach a non-metric field (searchable in Logs Insights, not a dimension)."""
+        self._properties[name] = value
+
+    @contextmanager
+    def timer(self, name: str):
+        """Record the wall-clock duration of the block in milliseconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.put(name, round((time.perf_counter() - start) * 1000, 1))
+
+    def flush(self) -> dict:
+        """Emit the collected metrics as one EMF document (no-op if nothing was recorded)."""
+        with self._lock:
+            values, units = self._values, self._units
+            self._values, self._units = {}, {}
+        if not values:
+            return {}
+
+        document = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": self.namespace,
+                    "Dimensions": [["Function"]],
+                    "Metrics": [{"Name": name, "Unit": units[name]} for name in values],
+                }],
+            },
+            "Function": self.function,
+            "correlation_id": self.correlation_id,
+            **self._properties,
+            **values,
+        }
+        _sink.emit(document)
+        return document
@@ -0,0 +1,8 @@
+"""
+Put the etl-common layer on sys.path, as Lambda does from /opt/python.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "python"))
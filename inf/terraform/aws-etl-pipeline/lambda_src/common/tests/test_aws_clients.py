@@ -0,0 +1,55 @@
+"""
+Unit tests for the lazily created, cached boto3 clients in etl_common.
+"""
+
+import os
+import unittest
+from unittest.mock import patch
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-southeast-1")
+
+from etl_common import aws_clients  # noqa: E402
+from etl_common.aws_clients import LazyClient  # noqa: E402
+
+
+class TestLazyClient(unittest.TestCase):
+
+    def setUp(self):
+        aws_clients.reset()
+        self.addCleanup(aws_clients.reset)
+
+    def test_client_is_not_created_until_first_attribute_access(self):
+        with patch("etl_common.aws_clients.boto3.client") as create:
+            s3 = LazyClient("s3")
+            create.assert_not_called()
+
+            s3.put_object(Bucket="b", Key="k", Body=b"")
+            create.assert_called_once()
+
+    def test_clients_are_shared_per_service(self):
+        assert LazyClient("s3").meta is LazyClient("s3").meta
+        assert aws_clients.client("s3") is aws_clients.client("s3")
+        assert aws_clients.client("s3") is not aws_clients.client("dynamodb")
+
+    def test_attributes_set_on_the_proxy_take_precedence(self):
+        s3 = LazyClient("s3")
+        with patch.object(s3, "head_object", return_value={"ContentLength": 1}):
+            assert s3.head_object(Bucket="b", Key="k") == {"ContentLength": 1}
+
+
+class TestClientConfig(unittest.TestCase):
+
+    def setUp(self):
+        aws_clients.reset()
+        self.addCleanup(aws_clients.reset)
+
+    def test_tuned_config_is_applied(self):
+        config = aws_clients.client("s3").meta.config
+        assert config.max_pool_connections == aws_clients.BOTO_CONFIG.max_pool_connections
+        assert config.tcp_keepalive is True
+        assert config.connect_timeout == aws_clients.BOTO_CONFIG.connect_timeout
+
+    def test_bedrock_gets_a_longer_read_timeout(self):
+        config = aws_clients.client("bedrock-agent-runtime").meta.config
+        assert config.read_timeout == 120
+        assert config.max_pool_connections == aws_clients.BOTO_CONFIG.max_pool_connections
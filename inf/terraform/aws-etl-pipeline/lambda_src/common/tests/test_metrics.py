@@ -0,0 +1,61 @@
+"""
+Unit tests for the CloudWatch EMF instrumentation in etl_common.
+"""
+
+import io
+import json
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from etl_common import metrics
+from etl_common.metrics import Metrics
+
+
+class TestEmfDocument(unittest.TestCase):
+
+    def test_flush_emits_one_emf_document(self):
+        with metrics.capture() as sink:
+            m = Metrics("orchestrator", "evt-1", namespace="Test")
+            m.put("S3ReadMs", 12)
+            m.put("InputBytes", 2048, metrics.BYTES)
+            m.set_property("source_key", "a.md")
+            m.flush()
+
+        [doc] = sink.documents
+        directive = doc["_aws"]["CloudWatchMetrics"][0]
+        assert directive["Namespace"] == "Test"
+        assert directive["Dimensions"] == [["Function"]]
+        assert {"Name": "InputBytes", "Unit": "Bytes"} in directive["Metrics"]
+        assert doc["Function"] == "orchestrator"
+        assert doc["correlation_id"] == "evt-1"
+        assert doc["source_key"] == "a.md"
+        assert doc["S3ReadMs"] == 12
+
+    def test_flush_without_metrics_is_a_no_op(self):
+        with metrics.capture() as sink:
+            Metrics("loader", "evt-1").flush()
+        assert sink.documents == []
+
+    def test_add_accumulates_across_threads(self):
+        m = Metrics("orchestrator", "evt-1")
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: m.add("BedrockRetries"), range(100)))
+        with metrics.capture() as sink:
+            m.flush()
+        assert sink.values("BedrockRetries") == [100]
+
+    def test_timer_records_milliseconds(self):
+        m = Metrics("loader", "evt-1")
+        with patch("etl_common.metrics.time.perf_counter", side_effect=[1.0, 1.25]):
+            with m.timer("LoaderWriteMs"):
+                pass
+        with metrics.capture() as sink:
+            m.flush()
+        assert sink.values("LoaderWriteMs", function="loader") == [250.0]
+
+    def test_stdout_sink_writes_bare_json_lines(self):
+        out = io.StringIO()
+        with patch("sys.stdout", out):
+            metrics.StdoutSink().emit({"a": 1})
+        assert json.loads(out.getvalue()) == {"a": 1}
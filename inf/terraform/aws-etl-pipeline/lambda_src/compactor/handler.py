@@ -0,0 +1,253 @@
+"""
+ETL Metadata Compactor Lambda
+-----------------------------
+Triggered on a schedule by EventBridge (or manually with an explicit partition
+list). Rolls the many tiny per-article metadata objects written by the loader
+into one compressed file per year/month partition so Athena scans a handful of
+objects instead of one per article.
+
+Flow (per partition):
+  1. Read the previous rollup for the partition (if any)
+  2. Read the per-article sidecars    metadata/{year}/{month}/*.json
+     modified since the previous rollup (all of them without one, or with
+     "partitions": "all") and every loader buffer file
+                                      metadata-buffer/{year}/{month}/*.ndjson
+  3. De-duplicate by article_id (latest created_at wins)
+  4. Write rollups/metadata/{year}/{month}/part-00000.{ndjson.gz|parquet}
+  5. Delete the consumed buffer files (their records now live in the rollup)
+  6. Update rollups/metadata/_manifest.json
+
+Sidecars are left in place — they remain the source of the legacy
+clean_articles Athena table — so the manifest records the newest sidecar
+LastModified rolled up per partition, and later runs only GET sidecars
+modified after it (less SIDECAR_OVERLAP_SECONDS, which covers uploads still in
+flight when the previous run listed the partition). Parquet output needs pyarrow (attach a pyarrow
+layer); gzip NDJSON needs only the standard library.
+"""
+
+import gzip
+import io
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from botocore.exceptions import ClientError
+
+from etl_common.aws_clients import LazyClient
+
+try:  # Optional: only required for ROLLUP_FORMAT=parquet
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+SIDECAR_PREFIX = "metadata/"
+BUFFER_PREFIX = "metadata-buffer/"
+ROLLUP_PREFIX = "rollups/metadata/"
+MANIFEST_KEY = f"{ROLLUP_PREFIX}_manifest.json"
+
+ROLLUP_FORMAT = os.environ.get("ROLLUP_FORMAT", "ndjson")  # ndjson | parquet
+READ_MAX_WORKERS = int(os.environ.get("COMPACTOR_READ_MAX_WORKERS", "16"))
+SIDECAR_OVERLAP_SECONDS = int(os.environ.get("COMPACTOR_SIDECAR_OVERLAP_SECONDS", "900"))
+
+_EXTENSIONS = {"ndjson": "ndjson.gz", "parquet": "parquet"}
+
+# Created on first use (etl_common layer)
+s3_client = LazyClient("s3")
+
+
+def handler(event: dict, context) -> dict:
+    correlation_id = event.get("id", context.aws_request_id)
+
+    def log(msg: str, **kwargs):
+        logger.info(json.dumps({"correlation_id": correlation_id, "msg": msg, **kwargs}))
+
+    if ROLLUP_FORMAT not in _EXTENSIONS:
+        raise ValueError(f"Unsupported ROLLUP_FORMAT: {ROLLUP_FORMAT!r}. Expected one of {list(_EXTENSIONS)}")
+    if ROLLUP_FORMAT == "parquet" and pa is None:
+        raise RuntimeError("ROLLUP_FORMAT=parquet requires pyarrow — attach a pyarrow Lambda layer")
+
+    bucket = os.environ["CLEAN_BUCKET_NAME"]
+    partitions = _resolve_partitions(event, bucket)
+    rebuild = event.get("partitions") == "all"
+    log("Compaction started", bucket=bucket, partitions=partitions, format=ROLLUP_FORMAT)
+
+    manifest = _read_manifest(bucket)
+    for partition in partitions:
+        start_ms = int(time.time() * 1000)
+        previous = None if rebuild else manifest["partitions"].get(partition)
+        entry = compact_partition(bucket, partition, previous)
+        if entry is None:
+            log("Partition empty — skipped", partition=partition)
+            continue
+        manifest["partitions"][partition] = entry
+        log("Partition compacted", partition=partition, compaction_ms=int(time.time() * 1000) - start_ms, **entry)
+
+    manifest["format"] = ROLLUP_FORMAT
+    manifest["generated_at"] = datetime.now(timezone.utc).isoformat()
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=MANIFEST_KEY,
+        Body=json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8"),
+        ContentType="application/json; charset=utf-8",
+    )
+
+    return {"status": "ok", "partitions": partitions, "correlation_id": correlation_id}
+
+
+def compact_partition(bucket: str, partition: str, previous: dict = None):
+    """
+    Compact one "{year}/{month}" partition; return its manifest entry, or None
+    if empty. previous is the partition's last manifest entry: with it, only
+    sidecars modified after its sidecars_through are read.
+    """
+    sidecars = _list_objects(bucket, f"{SIDECAR_PREFIX}{partition}/", ".json")
+    buffer_keys = [key for key, _ in _list_objects(bucket, f"{BUFFER_PREFIX}{partition}/", ".ndjson")]
+    rollup_key = f"{ROLLUP_PREFIX}{partition}/part-00000.{_EXTENSIONS[ROLLUP_FORMAT]}"
+
+    records = _read_rollup(bucket, partition)
+    if not records and not sidecars and not buffer_keys:
+        return None
+
+    sidecars_through = max((modified for _, modified in sidecars), default=None)
+    sidecar_keys = [key for key, _ in sidecars]
+    # The watermark only holds while the rollup it describes is still there
+    if records and previous and previous.get("key") == rollup_key and previous.get("sidecars_through"):
+        cutoff = datetime.fromisoformat(previous["sidecars_through"]) - timedelta(seconds=SIDECAR_OVERLAP_SECONDS)
+        sidecar_keys = [key for key, modified in sidecars if modified > cutoff]
+        if not sidecar_keys and not buffer_keys:
+            return previous
+
+    with ThreadPoolExecutor(max_workers=READ_MAX_WORKERS) as pool:
+        for lines in pool.map(lambda key: _read_ndjson(bucket, key), sidecar_keys + buffer_keys):
+            records.extend(lines)
+
+    merged = _deduplicate(records)
+    body = _serialise(merged)
+    s3_client.put_object(Bucket=bucket, Key=rollup_key, Body=body)
+
+    # Buffer files are only deleted once their records are durably in the rollup
+    for start in range(0, len(buffer_keys), 1000):
+        s3_client.delete_objects(
+            Bucket=bucket,
+            Delete={"Objects": [{"Key": k} for k in buffer_keys[start:start + 1000]], "Quiet": True},
+        )
+
+    return {
+        "key": rollup_key,
+        "records": len(merged),
+        "bytes": len(body),
+        "sidecars": len(sidecar_keys),
+        "buffers": len(buffer_keys),
+        "sidecars_through": sidecars_through.isoformat() if sidecars_through else None,
+    }
+
+
+def _resolve_partitions(event: dict, bucket: str) -> list:
+    """
+    Partitions to compact: an explicit event["partitions"] list, "all" to
+    rebuild everything, or by default the current and previous month.
+    """
+    requested = event.get("partitions")
+    if requested == "all":
+        found = set()
+        for prefix in (SIDECAR_PREFIX, BUFFER_PREFIX):
+            for year in _list_prefixes(bucket, prefix):
+                for month in _list_prefixes(bucket, year):
+                    found.add(month[len(prefix):].rstrip("/"))
+        return sorted(found)
+    if requested:
+        return list(requested)
+
+    now = datetime.now(timezone.utc)
+    previous = now.replace(day=1) - timedelta(days=1)
+    return [previous.strftime("%Y/%m"), now.strftime("%Y/%m")]
+
+
+def _list_objects(bucket: str, prefix: str, suffix: str) -> list:
+    """(key, LastModified) of every object under prefix whose key ends with suffix."""
+    paginator = s3_client.get_paginator("list_objects_v2")
+    objects = []
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        objects.extend(
+            (obj["Key"], obj["LastModified"]) for obj in page.get("Contents", []) if obj["Key"].endswith(suffix)
+        )
+    return objects
+
+
+def _list_prefixes(bucket: str, prefix: str) -> list:
+    paginator = s3_client.get_paginator("list_objects_v2")
+    prefixes = []
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix, Delimiter="/"):
+        prefixes.extend(p["Prefix"] for p in page.get("CommonPrefixes", []))
+    return prefixes
+
+
+def _read_ndjson(bucket: str, key: str) -> list:
+    """Read a sidecar (one JSON object) or buffer file (one JSON object per line)."""
+    body = s3_client.get_object(Bucket=bucket, Key=key)["Body"].read().decode("utf-8")
+    return [json.loads(line) for line in body.splitlines() if line.strip()]
+
+
+def _read_rollup(bucket: str, partition: str) -> list:
+    """Return the records of the partition's previous rollup, or [] if none exists."""
+    key = f"{ROLLUP_PREFIX}{partition}/part-00000.{_EXTENSIONS[ROLLUP_FORMAT]}"
+    body = _get_if_exists(bucket, key)
+    if body is None:
+        return []
+
+    if ROLLUP_FORMAT == "parquet":
+        return pq.read_table(io.BytesIO(body)).to_pylist()
+    return [json.loads(line) for line in gzip.decompress(body).decode("utf-8").splitlines() if line]
+
+
+def _deduplicate(records: list) -> list:
+    """Keep one record per article_id — the one with the latest created_at."""
+    latest = {}
+    for record in records:
+        current = latest.get(record["article_id"])
+        if current is None or record.get("created_at", "") >= current.get("created_at", ""):
+            latest[record["article_id"]] = record
+    return sorted(latest.values(), key=lambda r: (r.get("created_at", ""), r["article_id"]))
+
+
+def _serialise(records: list) -> bytes:
+    if ROLLUP_FORMAT == "parquet":
+        buffer = io.BytesIO()
+        # from_pylist infers the schema from the first row — normalise every row
+        # to the union of fields so columns added later are never dropped
+        columns = sorted({name for record in records for name in record})
+        rows = [{name: record.get(name) for name in columns} for record in records]
+        pq.write_table(pa.Table.from_pylist(rows), buffer, compression="snappy")
+        return buffer.getvalue()
+
+    lines = "".join(json.dumps(r, ensure_ascii=False, sort_keys=True) + "\n" for r in records)
+    # mtime=0 keeps the output byte-identical for identical input
+    return gzip.compress(lines.encode("utf-8"), mtime=0)
+
+
+def _read_manifest(bucket: str) -> dict:
+    body = _get_if_exists(bucket, MANIFEST_KEY)
+    if body is None:
+        return {"partitions": {}}
+    return json.loads(body)
+
+
+def _get_if_exists(bucket: str, key: str):
+    """
+    Object body, or None when the key does not exist. AccessDenied is raised,
+    never read as "missing": an empty rollup or manifest would be written over
+    the real one. (Without s3:ListBucket S3 reports a missing key as 403.)
+    """
+    try:
+        return s3_client.get_object(Bucket=bucket, Key=key)["Body"].read()
+    except ClientError as exc:
+        if exc.response["Error"]["Code"] in ("NoSuchKey", "404"):
+            return None
+        raise
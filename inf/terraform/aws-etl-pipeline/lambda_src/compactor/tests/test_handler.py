@@ -0,0 +1,240 @@
+"""
+Unit tests for the ETL metadata compactor Lambda handler.
+Uses moto to mock S3 — no real AWS calls.
+"""
+
+import gzip
+import json
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+import boto3
+import pytest
+from moto import mock_aws
+
+os.environ.setdefault("CLEAN_BUCKET_NAME", "test-clean-bucket")
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-southeast-1")
+
+from handler import handler, MANIFEST_KEY  # noqa: E402
+
+REGION = "ap-southeast-1"
+CLEAN_BUCKET = "test-clean-bucket"
+PARTITION = "2025/04"
+ROLLUP_KEY = f"rollups/metadata/{PARTITION}/part-00000.ndjson.gz"
+
+
+def _record(article_id: str, created_at: str = "2025-04-01T00:00:00+00:00", **extra) -> dict:
+    return {
+        "article_id": article_id,
+        "title": f"Title {article_id}",
+        "word_count": 10,
+        "s3_key": f"2025/04/{article_id}.md",
+        "source_url": "example.com",
+        "created_at": created_at,
+        "status": "PUBLISHED",
+        "extraction_model": "test-model",
+        **extra,
+    }
+
+
+def _make_context():
+    ctx = MagicMock()
+    ctx.aws_request_id = "req-abc"
+    return ctx
+
+
+def _setup_s3():
+    s3 = boto3.client("s3", region_name=REGION)
+    s3.create_bucket(
+        Bucket=CLEAN_BUCKET,
+        CreateBucketConfiguration={"LocationConstraint": REGION},
+    )
+    return s3
+
+
+def _put_sidecar(s3, record: dict):
+    s3.put_object(
+        Bucket=CLEAN_BUCKET,
+        Key=f"metadata/{PARTITION}/{record['article_id']}.json",
+        Body=json.dumps(record).encode(),
+    )
+
+
+def _put_buffer(s3, name: str, records: list):
+    s3.put_object(
+        Bucket=CLEAN_BUCKET,
+        Key=f"metadata-buffer/{PARTITION}/{name}.ndjson",
+        Body="".join(json.dumps(r) + "\n" for r in records).encode(),
+    )
+
+
+def _read_rollup(s3) -> list:
+    body = s3.get_object(Bucket=CLEAN_BUCKET, Key=ROLLUP_KEY)["Body"].read()
+    return [json.loads(line) for line in gzip.decompress(body).decode().splitlines()]
+
+
+# ---------------------------------------------------------------------------
+# Compaction
+# ---------------------------------------------------------------------------
+
+class TestCompaction(unittest.TestCase):
+
+    @mock_aws
+    def test_rolls_sidecars_and_buffers_into_one_gzip_ndjson(self):
+        s3 = _setup_s3()
+        _put_sidecar(s3, _record("a1"))
+        _put_sidecar(s3, _record("a2"))
+        _put_buffer(s3, "1-req", [_record("b1"), _record("b2")])
+
+        handler({"partitions": [PARTITION]}, _make_context())
+
+        ids = sorted(r["article_id"] for r in _read_rollup(s3))
+        assert ids == ["a1", "a2", "b1", "b2"]
+
+    @mock_aws
+    def test_consumed_buffers_are_deleted_and_sidecars_kept(self):
+        s3 = _setup_s3()
+        _put_sidecar(s3, _record("a1"))
+        _put_buffer(s3, "1-req", [_record("b1")])
+
+        handler({"partitions": [PARTITION]}, _make_context())
+
+        assert s3.list_objects_v2(Bucket=CLEAN_BUCKET, Prefix="metadata-buffer/")["KeyCount"] == 0
+        assert s3.list_objects_v2(Bucket=CLEAN_BUCKET, Prefix="metadata/")["KeyCount"] == 1
+
+    @mock_aws
+    def test_incremental_run_keeps_previously_rolled_records(self):
+        s3 = _setup_s3()
+        _put_buffer(s3, "1-req", [_record("b1")])
+        handler({"partitions": [PARTITION]}, _make_context())
+
+        _put_buffer(s3, "2-req", [_record("b2")])
+        handler({"partitions": [PARTITION]}, _make_context())
+
+        ids = sorted(r["article_id"] for r in _read_rollup(s3))
+        assert ids == ["b1", "b2"]
+
+    @mock_aws
+    def test_later_runs_only_read_new_sidecars(self):
+        import time
+
+        import handler as handler_module
+
+        s3 = _setup_s3()
+        _put_sidecar(s3, _record("a1"))
+        handler({"partitions": [PARTITION]}, _make_context())
+        time.sleep(1.1)  # LastModified has one-second resolution
+        _put_sidecar(s3, _record("a2"))
+
+        with patch("handler.SIDECAR_OVERLAP_SECONDS", 0), \
+             patch("handler._read_ndjson", wraps=handler_module._read_ndjson) as read:
+            handler({"partitions": [PARTITION]}, _make_context())
+            read_keys = [call.args[1] for call in read.call_args_list]
+            handler({"partitions": [PARTITION]}, _make_context())  # nothing new
+
+        assert read_keys == [f"metadata/{PARTITION}/a2.json"]
+        assert read.call_count == 1
+        assert sorted(r["article_id"] for r in _read_rollup(s3)) == ["a1", "a2"]
+
+    @mock_aws
+    def test_rebuild_reads_every_sidecar(self):
+        import handler as handler_module
+
+        s3 = _setup_s3()
+        _put_sidecar(s3, _record("a1"))
+        handler({"partitions": [PARTITION]}, _make_context())
+
+        with patch("handler.SIDECAR_OVERLAP_SECONDS", 0), \
+             patch("handler._read_ndjson", wraps=handler_module._read_ndjson) as read:
+            handler({"partitions": [PARTITION]}, _make_context())
+            assert read.call_count == 0
+            handler({"partitions": "all"}, _make_context())
+
+        assert read.call_count == 1
+
+    @mock_aws
+    def test_latest_record_wins_on_duplicate_article_id(self):
+        s3 = _setup_s3()
+        _put_sidecar(s3, _record("a1", created_at="2025-04-01T00:00:00+00:00", title="Old"))
+        _put_buffer(s3, "1-req", [_record("a1", created_at="2025-04-02T00:00:00+00:00", title="New")])
+
+        handler({"partitions": [PARTITION]}, _make_context())
+
+        rollup = _read_rollup(s3)
+        assert len(rollup) == 1
+        assert rollup[0]["title"] == "New"
+
+    @mock_aws
+    def test_writes_manifest(self):
+        s3 = _setup_s3()
+        _put_sidecar(s3, _record("a1"))
+        _put_buffer(s3, "1-req", [_record("b1")])
+
+        handler({"partitions": [PARTITION]}, _make_context())
+
+        manifest = json.loads(s3.get_object(Bucket=CLEAN_BUCKET, Key=MANIFEST_KEY)["Body"].read())
+        entry = manifest["partitions"][PARTITION]
+        assert manifest["format"] == "ndjson"
+        assert entry["key"] == ROLLUP_KEY
+        assert entry["records"] == 2
+        assert entry["sidecars"] == 1
+        assert entry["buffers"] == 1
+
+    @mock_aws
+    def test_all_discovers_partitions(self):
+        s3 = _setup_s3()
+        _put_sidecar(s3, _record("a1"))
+        s3.put_object(Bucket=CLEAN_BUCKET, Key="metadata-buffer/2025/05/1-req.ndjson",
+                      Body=(json.dumps(_record("c1")) + "\n").encode())
+
+        result = handler({"partitions": "all"}, _make_context())
+
+        assert result["partitions"] == ["2025/04", "2025/05"]
+
+    @mock_aws
+    def test_empty_partition_is_skipped(self):
+        s3 = _setup_s3()
+        handler({"partitions": [PARTITION]}, _make_context())
+        assert s3.list_objects_v2(Bucket=CLEAN_BUCKET, Prefix="rollups/metadata/2025")["KeyCount"] == 0
+
+    @mock_aws
+    def test_access_denied_is_not_read_as_a_missing_rollup(self):
+        from botocore.exceptions import ClientError
+
+        s3 = _setup_s3()
+        _put_sidecar(s3, _record("a1"))
+        denied = ClientError({"Error": {"Code": "AccessDenied", "Message": "Access Denied"}}, "GetObject")
+
+        with patch("handler.s3_client.get_object", side_effect=denied):
+            with pytest.raises(ClientError, match="AccessDenied"):
+                handler({"partitions": [PARTITION]}, _make_context())
+
+        assert s3.list_objects_v2(Bucket=CLEAN_BUCKET, Prefix="rollups/")["KeyCount"] == 0
+
+
+class TestParquetFormat(unittest.TestCase):
+
+    def test_parquet_without_pyarrow_fails_loud(self):
+        with patch("handler.ROLLUP_FORMAT", "parquet"), patch("handler.pa", None):
+            with pytest.raises(RuntimeError, match="requires pyarrow"):
+                handler({"partitions": [PARTITION]}, _make_context())
+
+    @mock_aws
+    def test_parquet_rollup_round_trips(self):
+        pytest.importorskip("pyarrow")
+        import pyarrow.parquet as pq
+        from io import BytesIO
+
+        s3 = _setup_s3()
+        _put_sidecar(s3, _record("a1"))
+        _put_buffer(s3, "1-req", [_record("b1", link_count=3)])
+
+        with patch("handler.ROLLUP_FORMAT", "parquet"):
+            handler({"partitions": [PARTITION]}, _make_context())
+
+        body = s3.get_object(Bucket=CLEAN_BUCKET,
+                             Key=f"rollups/metadata/{PARTITION}/part-00000.parquet")["Body"].read()
+        rows = pq.read_table(BytesIO(body)).to_pylist()
+        assert sorted(r["article_id"] for r in rows) == ["a1", "b1"]
+        assert "link_count" in rows[0]
@@ -1,51 +1,345 @@
 """
 ETL Loader Lambda
 -----------------
-Invoked asynchronously by the orchestrator after Bedrock content extraction.
+Invoked asynchronously by the orchestrator after Bedrock content extraction,
+with either one article payload or a batch ({"articles": [...]}) whose S3
+writes run concurrently and whose DynamoDB items go through BatchWriteItem.
+With LOADER_HANDOFF_MODE=sqs it instead drains the loader queue (one payload
+per record, partial failures reported as batchItemFailures), and with
+LOADER_HANDOFF_MODE=inline the orchestrator imports this module and calls
+handler() in-process.
 
 Flow:
-  1. Validate data contract (schema_version — REC-016)
+  1. Validate data contract (schema_version — REC-016) and resolve the clean
+     content: inline (1.0) or from the S3 staging object it was streamed to (1.1)
   2. Derive deterministic article_id from source path (REC-001 — idempotent upserts)
+     and skip every write below when the stored content_hash (clean content +
+     markdown_stats.STATS_VERSION) matches (replays)
   3. Write clean Markdown to S3 clean bucket at {year}/{month}/{filename}
-  4. Write metadata JSON sidecar at metadata/{year}/{month}/{article_id}.json (for Athena/Glue)
+  4. Write metadata JSON sidecar at metadata/{year}/{month}/{article_id}.json (for Athena/Glue),
+     or with METADATA_OUTPUT=rollup_buffer append the invocation's records to one
+     NDJSON buffer object per partition for the compactor to roll up
   5. Write DynamoDB item (PutItem — idempotent due to deterministic PK)
+
+Write latency, outcomes and end-to-end TotalPipelineMs (from the orchestrator's
+pipeline_start_ms) are emitted as CloudWatch EMF metrics (etl_common.metrics).
 """
 
 import hashlib
 import json
 import logging
 import os
-import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+from etl_common import metrics as emf
+from etl_common.aws_clients import LazyClient
 
-import boto3
+import markdown_stats
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-s3_client = boto3.client("s3")
-dynamodb = boto3.resource("dynamodb")
+# Created on first use (etl_common layer). The low-level DynamoDB client avoids
+# the boto3 resource layer, which is slow to import and memory heavy.
+s3_client = LazyClient("s3")
+dynamodb_client = LazyClient("dynamodb")
+
+_serializer = TypeSerializer()
+
+# Batch mode: concurrent S3 writers per invocation (each article is two PutObjects)
+LOADER_MAX_WORKERS = int(os.environ.get("LOADER_MAX_WORKERS", "8"))
+
+# "sidecar": one metadata JSON object per article (legacy clean_articles table).
+# "rollup_buffer": one NDJSON object per invocation and partition under
+# metadata-buffer/, folded into the compressed rollups by the compactor Lambda.
+METADATA_OUTPUT = os.environ.get("METADATA_OUTPUT", "sidecar")
+
+# DynamoDB BatchGetItem / BatchWriteItem request limits
+BATCH_GET_MAX_KEYS = 100
+BATCH_WRITE_MAX_ITEMS = 25
+BATCH_WRITE_MAX_ATTEMPTS = 8
+
+SCHEMA_VERSION = "1.1"
 
-SCHEMA_VERSION = "1.0"
+# 1.0 carries clean_content inline; 1.1 may instead carry clean_content_s3, a
+# {"bucket", "key"} pointer to the staging object the orchestrator streamed to.
+SUPPORTED_SCHEMA_VERSIONS = ("1.0", "1.1")
 
 
 def handler(event: dict, context) -> dict:
+    # SQS event source mapping (LOADER_HANDOFF_MODE=sqs): one payload per record
+    if "Records" in event:
+        return sqs_handler(event, context)
+
+    # Batch payload: {"articles": [<single-article payload>, ...]}
+    if "articles" in event:
+        return batch_handler(event, context)
+
+    return _handle_article(event, context)
+
+
+def _handle_article(event: dict, context) -> dict:
+    """Load one article payload and emit its EMF metrics, even on failure."""
     correlation_id = event.get("correlation_id", context.aws_request_id)
+    metrics = emf.Metrics("loader", correlation_id)
+    try:
+        return _load_article(event, context, correlation_id, metrics)
+    except Exception:
+        metrics.add("LoaderErrors")
+        raise
+    finally:
+        metrics.flush()
+
+
+def _load_article(event: dict, context, correlation_id: str, metrics) -> dict:
+    """Load one article payload, recording write latency and outcome on `metrics`."""
+    log = _make_log(correlation_id)
+
+    article = _prepare_article(event, log)
+    table_name = os.environ["DYNAMODB_TABLE_NAME"]
+
+    # ── 2b. Skip unchanged content (replays / backfills) ──────────────────────
+    if _is_unchanged(article, _stored_hashes(table_name, [article["article_id"]])):
+        log("Content unchanged — skipped writes", article_id=article["article_id"])
+        metrics.put("ArticlesUnchanged", 1, emf.COUNT)
+        _record_pipeline_latency(metrics, article)
+        return {
+            "status": "ok",
+            "article_id": article["article_id"],
+            "clean_key": article["clean_key"],
+            "unchanged": True,
+            "correlation_id": correlation_id,
+        }
+
+    with metrics.timer("LoaderWriteMs"):
+        # ── 3 + 4. Write clean Markdown and metadata sidecar / rollup buffer ─────
+        _write_s3_objects(article, log)
+        if METADATA_OUTPUT == "rollup_buffer":
+            _write_metadata_buffer([article], context.aws_request_id, log)
+
+        # ── 5. Write DynamoDB item (idempotent PutItem) ───────────────────────────
+        # Conditional on the hash so a concurrent load of the same content is a no-op
+        try:
+            dynamodb_client.put_item(
+                TableName=table_name,
+                Item=_serialise_item(article["item"]),
+                ConditionExpression="attribute_not_exists(content_hash) OR content_hash <> :content_hash",
+                ExpressionAttributeValues={":content_hash": {"S": article["item"]["content_hash"]}},
+            )
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            log("Content unchanged — item already current", article_id=article["article_id"])
+    metrics.put("ArticlesLoaded", 1, emf.COUNT)
+    _record_pipeline_latency(metrics, article)
+    log(
+        "Wrote DynamoDB item",
+        article_id=article["article_id"],
+        title=article["item"]["title"],
+        word_count=article["item"]["word_count"],
+    )
+
+    return {
+        "status": "ok",
+        "article_id": article["article_id"],
+        "clean_key": article["clean_key"],
+        "unchanged": False,
+        "correlation_id": correlation_id,
+    }
+
+
+def sqs_handler(event: dict, context) -> dict:
+    """
+    Load the payloads of an SQS batch from the loader queue.
+
+    Records are loaded concurrently (LOADER_MAX_WORKERS), each exactly like a
+    directly invoked single-article payload. Failed records are returned as
+    batchItemFailures so only they are redelivered (and reach the loader DLQ
+    after maxReceiveCount); the queue's maximum concurrency is what applies
+    back-pressure to the orchestrators.
+    """
+    records = event.get("Records", [])
+    if not records:
+        return {"batchItemFailures": []}
+
+    def load_record(record: dict) -> bool:
+        try:
+            # Per-record request id keeps rollup-buffer object keys unique within the batch
+            _handle_article(json.loads(record["body"]), SimpleNamespace(aws_request_id=record["messageId"]))
+        except Exception as exc:  # reported back to SQS as a batch item failure
+            _make_log(record.get("messageId", "unknown"))(
+                "Record failed", error_type=type(exc).__name__, error=str(exc)
+            )
+            return False
+        return True
+
+    with ThreadPoolExecutor(max_workers=min(LOADER_MAX_WORKERS, len(records))) as pool:
+        outcomes = list(pool.map(load_record, records))
+
+    failures = [
+        {"itemIdentifier": record["messageId"]}
+        for record, ok in zip(records, outcomes)
+        if not ok
+    ]
+    _make_log(context.aws_request_id)("Loader queue batch complete", records=len(records), failed=len(failures))
+    return {"batchItemFailures": failures}
+
+
+def batch_handler(event: dict, context) -> dict:
+    """
+    Load many articles in one invocation.
+
+    Payloads are prepared concurrently on a thread pool (LOADER_MAX_WORKERS).
+    Payloads for the same article_id are collapsed to the last one in the
+    batch before any write — concurrent writes of one key could leave S3 and
+    DynamoDB holding different versions — and the dropped ones are reported
+    as superseded. Stored content hashes are fetched with BatchGetItem, and
+    S3 objects are written only for articles whose content changed. Every article whose
+    objects landed is then written to DynamoDB with BatchWriteItem (25 items
+    per request, unprocessed items re-sent). If any article failed, the
+    invocation raises after the successful ones are persisted so the async
+    retry / DLQ sees the failure — re-running already loaded articles is safe
+    because every write is idempotent (and unchanged ones are skipped).
+    """
+    payloads = event["articles"]
+    batch_log = _make_log(context.aws_request_id)
+    batch_log("Loader batch started", articles=len(payloads))
+
+    start_ms = int(time.time() * 1000)
+    table_name = os.environ["DYNAMODB_TABLE_NAME"]
+    prepared = []
+    superseded = []
+    loaded = []
+    unchanged = []
+    failed = []
+
+    def article_failure(log, exc, correlation_id, source_key) -> dict:
+        log("Article failed", error_type=type(exc).__name__, error=str(exc))
+        return {"correlation_id": correlation_id, "source_key": source_key, "error": str(exc)}
+
+    def prepare(indexed_payload):
+        index, payload = indexed_payload
+        correlation_id = payload.get("correlation_id", f"{context.aws_request_id}#{index}")
+        log = _make_log(correlation_id)
+        try:
+            article = _prepare_article(payload, log)
+        except (KeyError, ValueError, ClientError) as exc:
+            return None, article_failure(log, exc, correlation_id, payload.get("source_key"))
+        article["correlation_id"] = correlation_id
+        return article, None
+
+    def write_objects(article):
+        log = _make_log(article["correlation_id"])
+        try:
+            _write_s3_objects(article, log)
+        except ClientError as exc:
+            return None, article_failure(log, exc, article["correlation_id"], article["source_key"])
+        return article, None
+
+    if payloads:
+        with ThreadPoolExecutor(max_workers=min(LOADER_MAX_WORKERS, len(payloads))) as pool:
+            latest = {}
+            for article, failure in pool.map(prepare, enumerate(payloads)):
+                if failure is not None:
+                    failed.append(failure)
+                    continue
+                if article["article_id"] in latest:
+                    superseded.append(latest[article["article_id"]])
+                latest[article["article_id"]] = article
+            prepared = list(latest.values())
+            for article in superseded:
+                log = _make_log(article["correlation_id"])
+                log("Article superseded by a later payload in the batch", article_id=article["article_id"])
+
+            stored = _stored_hashes(table_name, [a["article_id"] for a in prepared])
+            changed = []
+            for article in prepared:
+                (unchanged if _is_unchanged(article, stored) else changed).append(article)
+
+            write_start = time.perf_counter()
+            for article, failure in pool.map(write_objects, changed):
+                if failure is None:
+                    loaded.append(article)
+                else:
+                    failed.append(failure)
+
+    if METADATA_OUTPUT == "rollup_buffer" and loaded:
+        _write_metadata_buffer(loaded, context.aws_request_id, batch_log)
+
+    # Only index articles whose S3 objects exist — DynamoDB never points at a missing key
+    _batch_write_items(table_name, [a["item"] for a in loaded])
+    write_ms = round((time.perf_counter() - write_start) * 1000, 1) if payloads else 0
+
+    batch_metrics = emf.Metrics("loader", context.aws_request_id)
+    batch_metrics.put("LoaderWriteMs", write_ms)
+    batch_metrics.put("BatchSize", len(payloads), emf.COUNT)
+    batch_metrics.put("ArticlesLoaded", len(loaded), emf.COUNT)
+    batch_metrics.put("ArticlesUnchanged", len(unchanged), emf.COUNT)
+    batch_metrics.put("ArticlesSuperseded", len(superseded), emf.COUNT)
+    batch_metrics.put("ArticlesFailed", len(failed), emf.COUNT)
+    batch_metrics.flush()
+    # End-to-end latency is per document, so each article gets its own EMF record
+    for article in loaded + unchanged:
+        article_metrics = emf.Metrics("loader", article["correlation_id"])
+        _record_pipeline_latency(article_metrics, article)
+        article_metrics.flush()
+
+    batch_log(
+        "Loader batch complete",
+        loaded=len(loaded),
+        unchanged=len(unchanged),
+        superseded=len(superseded),
+        failed=len(failed),
+        batch_ms=int(time.time() * 1000) - start_ms,
+    )
+
+    if failed:
+        raise RuntimeError(
+            f"{len(failed)} of {len(payloads)} articles failed to load: {json.dumps(failed)}"
+        )
+
+    return {
+        "status": "ok",
+        "articles": [
+            {"article_id": a["article_id"], "clean_key": a["clean_key"], "unchanged": False}
+            for a in loaded
+        ] + [
+            {"article_id": a["article_id"], "clean_key": a["clean_key"], "unchanged": True}
+            for a in unchanged
+        ],
+        "superseded": [
+            {"article_id": a["article_id"], "correlation_id": a["correlation_id"]} for a in superseded
+        ],
+    }
+
+
+def _make_log(correlation_id: str):
+    """Return a structured JSON logger bound to a correlation ID."""
 
     def log(msg: str, **kwargs):
         logger.info(json.dumps({"correlation_id": correlation_id, "msg": msg, **kwargs}))
 
+    return log
+
+
+def _prepare_article(event: dict, log) -> dict:
+    """Validate one payload and derive every key, sidecar and item to write for it."""
     # ── 1. Validate data contract (REC-016) ───────────────────────────────────
     schema_version = event.get("schema_version")
-    if schema_version != SCHEMA_VERSION:
+    if schema_version not in SUPPORTED_SCHEMA_VERSIONS:
         raise ValueError(
             f"Unsupported schema_version: {schema_version!r}. "
-            f"Expected '{SCHEMA_VERSION}'. Check orchestrator deployment."
+            f"Expected one of {SUPPORTED_SCHEMA_VERSIONS}. Check orchestrator deployment."
         )
 
     source_bucket: str = event["source_bucket"]
     source_key: str = event["source_key"]
-    clean_content: str = event["clean_content"]
+    clean_content: str = _resolve_clean_content(event)
 
     log("Loader started", source_bucket=source_bucket, source_key=source_key)
 
@@ -60,28 +354,18 @@ def handler(event: dict, context) -> dict:
     year = now.strftime("%Y")
     month = now.strftime("%m")
     filename = os.path.basename(source_key)
-    clean_bucket = os.environ["CLEAN_BUCKET_NAME"]
 
-    # ── 3. Write clean Markdown ───────────────────────────────────────────────
     clean_key = f"{year}/{month}/{filename}"
-    s3_client.put_object(
-        Bucket=clean_bucket,
-        Key=clean_key,
-        Body=clean_content.encode("utf-8"),
-        ContentType="text/markdown; charset=utf-8",
-    )
-    log("Wrote clean Markdown", clean_key=clean_key)
-
-    # ── 4. Write metadata sidecar JSON for Athena/Glue (REC-004) ─────────────
-    title = _extract_title(clean_content)
-    word_count = len(clean_content.split())
+    content_hash = _content_hash(clean_content)
+    # One pass over the content for title, word count, outline, links, reading time
+    stats = markdown_stats.analyse(clean_content)
     source_url = _derive_source_url(source_key)
     created_at = now.isoformat()
 
+    # Metadata sidecar JSON for Athena/Glue (REC-004)
     metadata = {
         "article_id": article_id,
-        "title": title,
-        "word_count": word_count,
+        **stats,
         "s3_key": clean_key,
         "source_url": source_url,
         "created_at": created_at,
@@ -89,42 +373,150 @@ def handler(event: dict, context) -> dict:
         "extraction_model": event.get("extraction_model", ""),
     }
 
-    metadata_key = f"metadata/{year}/{month}/{article_id}.json"
-    s3_client.put_object(
-        Bucket=clean_bucket,
-        Key=metadata_key,
-        Body=json.dumps(metadata, ensure_ascii=False).encode("utf-8"),
-        ContentType="application/json; charset=utf-8",
-    )
-    log("Wrote metadata sidecar", metadata_key=metadata_key)
-
-    # ── 5. Write DynamoDB item (idempotent PutItem) ───────────────────────────
-    table = dynamodb.Table(os.environ["DYNAMODB_TABLE_NAME"])
-    table.put_item(
-        Item={
+    return {
+        "article_id": article_id,
+        "source_key": source_key,
+        "pipeline_start_ms": event.get("pipeline_start_ms"),
+        "clean_bucket": os.environ["CLEAN_BUCKET_NAME"],
+        "clean_key": clean_key,
+        "clean_content": clean_content,
+        "partition": f"{year}/{month}",
+        "metadata_key": f"metadata/{year}/{month}/{article_id}.json",
+        "metadata": metadata,
+        "item": {
             "article_id": article_id,
-            "title": title,
-            "word_count": word_count,
+            **stats,
             "s3_key": clean_key,
             "source_url": source_url,
             "created_at": created_at,
             "status": "PUBLISHED",
+            "content_hash": content_hash,
+        },
+    }
+
+
+def _record_pipeline_latency(metrics, article: dict) -> None:
+    """Record TotalPipelineMs — orchestrator start to load complete — when the payload carries it."""
+    if article.get("pipeline_start_ms") is not None:
+        metrics.put("TotalPipelineMs", int(time.time() * 1000) - article["pipeline_start_ms"])
+
+
+def _stored_hashes(table_name: str, article_ids: list) -> dict:
+    """Return {article_id: content_hash} for the ids already stored in DynamoDB."""
+    ids = list(dict.fromkeys(article_ids))
+    hashes = {}
+    for start in range(0, len(ids), BATCH_GET_MAX_KEYS):
+        request = {
+            table_name: {
+                "Keys": [{"article_id": {"S": i}} for i in ids[start:start + BATCH_GET_MAX_KEYS]],
+                "ProjectionExpression": "article_id, content_hash",
+            }
         }
+        while request:
+            response = dynamodb_client.batch_get_item(RequestItems=request)
+            for item in response["Responses"].get(table_name, []):
+                hashes[item["article_id"]["S"]] = item.get("content_hash", {}).get("S")
+            request = response.get("UnprocessedKeys")
+    return hashes
+
+
+def _batch_write_items(table_name: str, items: list) -> None:
+    """
+    Put items with BatchWriteItem, 25 per request. Duplicate article_ids are
+    collapsed (last wins — a request may not contain the same key twice) and
+    unprocessed items are re-sent with exponential backoff.
+    """
+    unique = list({item["article_id"]: item for item in items}.values())
+    for start in range(0, len(unique), BATCH_WRITE_MAX_ITEMS):
+        requests = [
+            {"PutRequest": {"Item": _serialise_item(item)}}
+            for item in unique[start:start + BATCH_WRITE_MAX_ITEMS]
+        ]
+        for attempt in range(BATCH_WRITE_MAX_ATTEMPTS):
+            response = dynamodb_client.batch_write_item(RequestItems={table_name: requests})
+            requests = response.get("UnprocessedItems", {}).get(table_name)
+            if not requests:
+                break
+            time.sleep(min(0.05 * 2 ** attempt, 2.0))
+        else:
+            raise RuntimeError(
+                f"{len(requests)} DynamoDB items still unprocessed after "
+                f"{BATCH_WRITE_MAX_ATTEMPTS} BatchWriteItem attempts"
+            )
+
+
+def _serialise_item(item: dict) -> dict:
+    """Convert a plain item dict to DynamoDB attribute values."""
+    return {key: _serializer.serialize(value) for key, value in item.items()}
+
+
+def _content_hash(clean_content: str) -> str:
+    """Hash of everything the stored item is derived from: the content and the stats derivation."""
+    digest = hashlib.sha256(f"stats-v{markdown_stats.STATS_VERSION}\n".encode("utf-8"))
+    digest.update(clean_content.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _is_unchanged(article: dict, stored_hashes: dict) -> bool:
+    """True when DynamoDB already holds this article with identical clean content and derived fields."""
+    return stored_hashes.get(article["article_id"]) == article["item"]["content_hash"]
+
+
+def _write_s3_objects(article: dict, log) -> None:
+    """Write the clean Markdown and its metadata sidecar to the clean bucket."""
+    # ── 3. Write clean Markdown ───────────────────────────────────────────────
+    s3_client.put_object(
+        Bucket=article["clean_bucket"],
+        Key=article["clean_key"],
+        Body=article["clean_content"].encode("utf-8"),
+        ContentType="text/markdown; charset=utf-8",
     )
-    log("Wrote DynamoDB item", article_id=article_id, title=title, word_count=word_count)
+    log("Wrote clean Markdown", clean_key=article["clean_key"])
 
-    return {
-        "status": "ok",
-        "article_id": article_id,
-        "clean_key": clean_key,
-        "correlation_id": correlation_id,
-    }
+    # ── 4. Write metadata sidecar JSON for Athena/Glue (REC-004) ─────────────
+    if METADATA_OUTPUT == "rollup_buffer":
+        return  # written once per invocation by _write_metadata_buffer
+    s3_client.put_object(
+        Bucket=article["clean_bucket"],
+        Key=article["metadata_key"],
+        Body=json.dumps(article["metadata"], ensure_ascii=False).encode("utf-8"),
+        ContentType="application/json; charset=utf-8",
+    )
+    log("Wrote metadata sidecar", metadata_key=article["metadata_key"])
+
+
+def _write_metadata_buffer(articles: list, request_id: str, log) -> None:
+    """Write the articles' metadata as one NDJSON object per year/month partition."""
+    by_partition = {}
+    for article in articles:
+        by_partition.setdefault(article["partition"], []).append(article["metadata"])
+
+    now_ms = int(time.time() * 1000)
+    for partition, records in by_partition.items():
+        key = f"metadata-buffer/{partition}/{now_ms}-{request_id}.ndjson"
+        body = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+        s3_client.put_object(
+            Bucket=articles[0]["clean_bucket"],
+            Key=key,
+            Body=body.encode("utf-8"),
+            ContentType="application/x-ndjson; charset=utf-8",
+        )
+        log("Wrote metadata rollup buffer", buffer_key=key, records=len(records))
+
+
+def _resolve_clean_content(event: dict) -> str:
+    """Return inline clean_content, or read it from the staged S3 object (schema 1.1)."""
+    if "clean_content" in event:
+        return event["clean_content"]
 
+    ref = event.get("clean_content_s3")
+    if not ref:
+        raise ValueError("Payload has neither clean_content nor clean_content_s3")
 
-def _extract_title(content: str) -> str:
-    """Extract the first H1 heading from Markdown. Falls back to 'Untitled'."""
-    match = re.search(r"^#\s+(.+)$", content, re.MULTILINE)
-    return match.group(1).strip() if match else "Untitled"
+    # Staging objects are left for the clean-bucket lifecycle rule to expire so
+    # that async retries of this invocation can still read them.
+    obj = s3_client.get_object(Bucket=ref["bucket"], Key=ref["key"])
+    return obj["Body"].read().decode("utf-8")
 
 
 def _derive_source_url(source_key: str) -> str:
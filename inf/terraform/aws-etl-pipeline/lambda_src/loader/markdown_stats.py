@@ -0,0 +1,81 @@
+"""
+Single-pass Markdown analysis
+-----------------------------
+Walks the clean Markdown once, line by line, and collects every statistic the
+loader stores for an article:
+
+  title                 — first H1 heading outside fenced code ("Untitled" if none)
+  word_count            — whitespace-separated tokens in the whole document
+  heading_outline       — [{"level", "text"}] for ATX headings outside fenced code
+  link_count            — inline links and autolinks outside fenced code (images excluded)
+  reading_time_minutes  — word_count / READING_WPM, rounded up
+
+Lines are sliced from the document one at a time, so peak extra memory is one
+line rather than a list of every line or every word in the document.
+"""
+
+import re
+
+READING_WPM = 200
+
+# Bump whenever a statistic is added or derived differently. The loader mixes
+# it into content_hash, so replays rewrite every stored article once instead of
+# skipping them as unchanged (1: title and word_count only).
+STATS_VERSION = 2
+
+# Bounds the outline stored on the DynamoDB item (400 KB item limit)
+MAX_OUTLINE_HEADINGS = 100
+
+_HEADING_RE = re.compile(r"^(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$")
+_FENCE_RE = re.compile(r"^[ \t]{0,3}(```|~~~)")
+_LINK_RE = re.compile(r"(?<!!)\[[^\]]*\]\([^)\s]+[^)]*\)|<https?://[^>\s]+>")
+
+
+def analyse(content: str) -> dict:
+    """Return title, word_count, heading_outline, link_count and reading_time_minutes."""
+    title = None
+    word_count = 0
+    outline = []
+    link_count = 0
+    in_fence = False
+
+    for line in _iter_lines(content):
+        word_count += len(line.split())
+
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+            continue
+        if in_fence:
+            continue
+
+        if line.startswith("#"):
+            match = _HEADING_RE.match(line)
+            if match and match.group(2):
+                level, text = len(match.group(1)), match.group(2).strip()
+                if title is None and level == 1:
+                    title = text
+                if len(outline) < MAX_OUTLINE_HEADINGS:
+                    outline.append({"level": level, "text": text})
+
+        if "](" in line or "<http" in line:
+            link_count += len(_LINK_RE.findall(line))
+
+    return {
+        "title": title or "Untitled",
+        "word_count": word_count,
+        "heading_outline": outline,
+        "link_count": link_count,
+        "reading_time_minutes": -(-word_count // READING_WPM),
+    }
+
+
+def _iter_lines(text: str):
+    """Yield the lines of `text` without materialising the full list."""
+    start = 0
+    length = len(text)
+    while start < length:
+        end = text.find("\n", start)
+        if end == -1:
+            end = length
+        yield text[start:end].rstrip("\r")
+        start = end + 1
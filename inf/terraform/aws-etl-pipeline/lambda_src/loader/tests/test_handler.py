@@ -16,7 +16,8 @@ os.environ.setdefault("CLEAN_BUCKET_NAME", "test-clean-bucket")
 os.environ.setdefault("DYNAMODB_TABLE_NAME", "test-article-metadata")
 os.environ.setdefault("AWS_DEFAULT_REGION", "ap-southeast-1")
 
-from handler import handler, _extract_title, _derive_source_url  # noqa: E402
+import markdown_stats  # noqa: E402
+from handler import handler, _derive_source_url  # noqa: E402
 
 REGION = "ap-southeast-1"
 CLEAN_BUCKET = "test-clean-bucket"
@@ -120,6 +121,8 @@ class TestHappyPath(unittest.TestCase):
         metadata = json.loads(obj["Body"].read())
         assert metadata["title"] == "Hello World"
         assert metadata["status"] == "PUBLISHED"
+        assert metadata["heading_outline"] == [{"level": 1, "text": "Hello World"}]
+        assert metadata["link_count"] == 0
         assert "article_id" in metadata
 
     @mock_aws
@@ -135,6 +138,9 @@ class TestHappyPath(unittest.TestCase):
         item = resp.get("Item", {})
         assert item["title"]["S"] == "Hello World"
         assert item["status"]["S"] == "PUBLISHED"
+        assert item["word_count"]["N"] == "9"
+        assert item["reading_time_minutes"]["N"] == "1"
+        assert item["heading_outline"]["L"][0]["M"]["text"]["S"] == "Hello World"
 
     @mock_aws
     def test_returns_ok_with_article_id(self):
@@ -145,6 +151,303 @@ class TestHappyPath(unittest.TestCase):
         assert "clean_key" in result
 
 
+# ---------------------------------------------------------------------------
+# Staged clean content (schema 1.1)
+# ---------------------------------------------------------------------------
+
+class TestStagedContent(unittest.TestCase):
+
+    @mock_aws
+    def test_reads_clean_content_from_staging_pointer(self):
+        s3, _ = _setup_aws()
+        s3.put_object(Bucket=CLEAN_BUCKET, Key="staging/abc.md", Body=CLEAN_CONTENT.encode())
+
+        ev = _base_event(
+            schema_version="1.1",
+            clean_content_s3={"bucket": CLEAN_BUCKET, "key": "staging/abc.md"},
+        )
+        del ev["clean_content"]
+        result = handler(ev, _make_context())
+
+        obj = s3.get_object(Bucket=CLEAN_BUCKET, Key=result["clean_key"])
+        assert obj["Body"].read().decode() == CLEAN_CONTENT
+
+    @mock_aws
+    def test_rejects_payload_without_content(self):
+        _setup_aws()
+        ev = _base_event(schema_version="1.1")
+        del ev["clean_content"]
+        with pytest.raises(ValueError, match="neither clean_content"):
+            handler(ev, _make_context())
+
+
+# ---------------------------------------------------------------------------
+# Batch mode (concurrent S3 writes + DynamoDB batch_writer)
+# ---------------------------------------------------------------------------
+
+class TestBatchMode(unittest.TestCase):
+
+    @mock_aws
+    def test_loads_every_article_in_batch(self):
+        s3, dynamodb = _setup_aws()
+        articles = [
+            _base_event(source_key=f"site{i}_20240401T120000.md", correlation_id=f"c-{i}")
+            for i in range(30)  # > 25 exercises more than one BatchWriteItem call
+        ]
+
+        result = handler({"articles": articles}, _make_context())
+
+        assert result["status"] == "ok"
+        assert len(result["articles"]) == 30
+        assert dynamodb.scan(TableName=DYNAMO_TABLE)["Count"] == 30
+        md = s3.list_objects_v2(Bucket=CLEAN_BUCKET, Prefix="20")["KeyCount"]
+        sidecars = s3.list_objects_v2(Bucket=CLEAN_BUCKET, Prefix="metadata/")["KeyCount"]
+        assert md == 30
+        assert sidecars == 30
+
+    @mock_aws
+    def test_duplicate_articles_in_batch_are_deduplicated(self):
+        _, dynamodb = _setup_aws()
+        result = handler({"articles": [_base_event(), _base_event()]}, _make_context())
+
+        assert len(result["articles"]) == 1
+        assert len(result["superseded"]) == 1
+        assert dynamodb.scan(TableName=DYNAMO_TABLE)["Count"] == 1
+
+    @mock_aws
+    def test_last_duplicate_in_batch_wins_in_s3_and_dynamodb(self):
+        s3, dynamodb = _setup_aws()
+        newer = "# Test Article\n\nThis is the newer revision of the article."
+        articles = [
+            _base_event(correlation_id="older"),
+            _base_event(correlation_id="newer", clean_content=newer),
+        ]
+
+        result = handler({"articles": articles}, _make_context())
+
+        assert result["superseded"] == [{"article_id": result["articles"][0]["article_id"], "correlation_id": "older"}]
+        item = dynamodb.scan(TableName=DYNAMO_TABLE)["Items"][0]
+        body = s3.get_object(Bucket=CLEAN_BUCKET, Key=result["articles"][0]["clean_key"])["Body"].read().decode()
+        assert body == newer
+        expected = hashlib.sha256(f"stats-v{markdown_stats.STATS_VERSION}\n{newer}".encode()).hexdigest()
+        assert item["content_hash"]["S"] == expected
+
+    @mock_aws
+    def test_failed_article_raises_after_loading_the_rest(self):
+        _, dynamodb = _setup_aws()
+        articles = [
+            _base_event(source_key="good_20240401T120000.md"),
+            _base_event(source_key="bad_20240401T120000.md", schema_version="9.9"),
+        ]
+
+        with pytest.raises(RuntimeError, match="1 of 2 articles failed"):
+            handler({"articles": articles}, _make_context())
+
+        # The valid article is still persisted; the retry re-upserts it idempotently
+        assert dynamodb.scan(TableName=DYNAMO_TABLE)["Count"] == 1
+
+    @mock_aws
+    def test_unprocessed_items_are_resent(self):
+        from unittest.mock import patch
+
+        import handler as loader
+
+        _setup_aws()
+        original = loader.dynamodb_client.batch_write_item
+        calls = []
+
+        def throttled_once(RequestItems):
+            calls.append(RequestItems)
+            if len(calls) == 1:
+                return {"UnprocessedItems": RequestItems}
+            return original(RequestItems=RequestItems)
+
+        with patch.object(loader.dynamodb_client, "batch_write_item", side_effect=throttled_once), \
+             patch("handler.time.sleep") as sleep:
+            handler({"articles": [_base_event()]}, _make_context())
+
+        assert len(calls) == 2
+        sleep.assert_called_once()
+
+
+# ---------------------------------------------------------------------------
+# Loader queue (LOADER_HANDOFF_MODE=sqs)
+# ---------------------------------------------------------------------------
+
+class TestQueueMode(unittest.TestCase):
+
+    @mock_aws
+    def test_loads_each_record_and_reports_only_failures(self):
+        _, dynamodb = _setup_aws()
+        records = [
+            {"messageId": "m-1", "body": json.dumps(_base_event(source_key="a_20240401T120000.md"))},
+            {"messageId": "m-2", "body": json.dumps(_base_event(schema_version="9.9"))},
+            {"messageId": "m-3", "body": "not json"},
+            {"messageId": "m-4", "body": json.dumps(_base_event(source_key="b_20240401T120000.md"))},
+        ]
+
+        result = handler({"Records": records}, _make_context())
+
+        assert result == {"batchItemFailures": [{"itemIdentifier": "m-2"}, {"itemIdentifier": "m-3"}]}
+        assert dynamodb.scan(TableName=DYNAMO_TABLE)["Count"] == 2
+
+
+# ---------------------------------------------------------------------------
+# Metadata rollup buffer (METADATA_OUTPUT=rollup_buffer)
+# ---------------------------------------------------------------------------
+
+class TestRollupBuffer(unittest.TestCase):
+
+    @mock_aws
+    def test_batch_writes_one_buffer_object_instead_of_sidecars(self):
+        from unittest.mock import patch
+
+        s3, _ = _setup_aws()
+        articles = [
+            _base_event(source_key=f"site{i}_20240401T120000.md") for i in range(5)
+        ]
+        with patch("handler.METADATA_OUTPUT", "rollup_buffer"):
+            handler({"articles": articles}, _make_context())
+
+        assert s3.list_objects_v2(Bucket=CLEAN_BUCKET, Prefix="metadata/")["KeyCount"] == 0
+        buffers = s3.list_objects_v2(Bucket=CLEAN_BUCKET, Prefix="metadata-buffer/")["Contents"]
+        assert len(buffers) == 1
+
+        body = s3.get_object(Bucket=CLEAN_BUCKET, Key=buffers[0]["Key"])["Body"].read()
+        records = [json.loads(line) for line in body.decode().splitlines()]
+        assert len(records) == 5
+        assert all(r["status"] == "PUBLISHED" for r in records)
+
+
+# ---------------------------------------------------------------------------
+# Skip-unchanged writes (content_hash)
+# ---------------------------------------------------------------------------
+
+class TestSkipUnchanged(unittest.TestCase):
+
+    @mock_aws
+    def test_stores_content_hash_on_item(self):
+        _, dynamodb = _setup_aws()
+        result = handler(_base_event(), _make_context())
+
+        item = dynamodb.get_item(
+            TableName=DYNAMO_TABLE, Key={"article_id": {"S": result["article_id"]}}
+        )["Item"]
+        expected = hashlib.sha256(f"stats-v{markdown_stats.STATS_VERSION}\n{CLEAN_CONTENT}".encode()).hexdigest()
+        assert item["content_hash"]["S"] == expected
+
+    @mock_aws
+    def test_replay_rewrites_articles_stored_before_a_stats_change(self):
+        from unittest.mock import patch
+
+        _, dynamodb = _setup_aws()
+        result = handler(_base_event(), _make_context())
+        # Items written before heading_outline / link_count existed hash the content alone
+        dynamodb.update_item(
+            TableName=DYNAMO_TABLE,
+            Key={"article_id": {"S": result["article_id"]}},
+            UpdateExpression="SET content_hash = :legacy REMOVE link_count",
+            ExpressionAttributeValues={":legacy": {"S": hashlib.sha256(CLEAN_CONTENT.encode()).hexdigest()}},
+        )
+
+        replay = handler(_base_event(), _make_context())
+        with patch("markdown_stats.STATS_VERSION", markdown_stats.STATS_VERSION + 1):
+            bumped = handler(_base_event(), _make_context())
+
+        item = dynamodb.get_item(TableName=DYNAMO_TABLE, Key={"article_id": {"S": result["article_id"]}})["Item"]
+        assert replay["unchanged"] is False
+        assert "link_count" in item
+        assert bumped["unchanged"] is False
+
+    @mock_aws
+    def test_replay_of_identical_content_skips_all_writes(self):
+        from unittest.mock import patch
+
+        _setup_aws()
+        handler(_base_event(), _make_context())
+
+        with patch("handler.s3_client.put_object") as put_object:
+            result = handler(_base_event(), _make_context())
+
+        assert result["unchanged"] is True
+        put_object.assert_not_called()
+
+    @mock_aws
+    def test_changed_content_is_rewritten(self):
+        s3, _ = _setup_aws()
+        handler(_base_event(), _make_context())
+
+        result = handler(_base_event(clean_content="# Hello World\n\nRevised."), _make_context())
+
+        assert result["unchanged"] is False
+        body = s3.get_object(Bucket=CLEAN_BUCKET, Key=result["clean_key"])["Body"].read()
+        assert body.decode() == "# Hello World\n\nRevised."
+
+    @mock_aws
+    def test_batch_replay_only_writes_changed_articles(self):
+        from unittest.mock import patch
+
+        import handler as loader
+
+        _setup_aws()
+        articles = [
+            _base_event(source_key=f"site{i}_20240401T120000.md") for i in range(3)
+        ]
+        handler({"articles": articles}, _make_context())
+
+        articles[1]["clean_content"] = "# Changed\n\nNew body."
+        original = loader.s3_client.put_object
+        with patch("handler.s3_client.put_object", wraps=original) as put_object:
+            result = handler({"articles": articles}, _make_context())
+
+        flags = {a["article_id"]: a["unchanged"] for a in result["articles"]}
+        assert sorted(flags.values()) == [False, True, True]
+        assert put_object.call_count == 2  # clean Markdown + sidecar of the changed article
+
+
+# ---------------------------------------------------------------------------
+# EMF metrics (etl_common.metrics)
+# ---------------------------------------------------------------------------
+
+class TestMetrics(unittest.TestCase):
+
+    @mock_aws
+    def test_records_write_latency_and_total_pipeline_time(self):
+        import time
+
+        from etl_common import metrics
+
+        _setup_aws()
+        started = int(time.time() * 1000) - 1500
+        with metrics.capture() as sink:
+            handler(_base_event(pipeline_start_ms=started), _make_context())
+
+        [doc] = sink.documents
+        assert doc["Function"] == "loader"
+        assert doc["correlation_id"] == "corr-xyz"
+        assert doc["ArticlesLoaded"] == 1
+        assert doc["LoaderWriteMs"] >= 0
+        assert doc["TotalPipelineMs"] >= 1500
+
+    @mock_aws
+    def test_batch_emits_batch_and_per_article_records(self):
+        from etl_common import metrics
+
+        _setup_aws()
+        articles = [
+            _base_event(source_key=f"site{i}_20240401T120000.md", correlation_id=f"c-{i}",
+                        pipeline_start_ms=0)
+            for i in range(3)
+        ]
+        with metrics.capture() as sink:
+            handler({"articles": articles}, _make_context())
+
+        assert sink.values("ArticlesLoaded") == [3]
+        assert sink.values("BatchSize") == [3]
+        per_article = [d for d in sink.documents if "TotalPipelineMs" in d]
+        assert sorted(d["correlation_id"] for d in per_article) == ["c-0", "c-1", "c-2"]
+
+
 # ---------------------------------------------------------------------------
 # Idempotency (REC-001)
 # ---------------------------------------------------------------------------
@@ -170,21 +473,6 @@ class TestIdempotency(unittest.TestCase):
 # Unit tests for helper functions
 # ---------------------------------------------------------------------------
 
-class TestExtractTitle(unittest.TestCase):
-
-    def test_extracts_first_h1(self):
-        assert _extract_title("# My Title\n\nBody text.") == "My Title"
-
-    def test_falls_back_to_untitled(self):
-        assert _extract_title("No headings here.") == "Untitled"
-
-    def test_strips_whitespace(self):
-        assert _extract_title("#   Padded Title  \nBody.") == "Padded Title"
-
-    def test_ignores_h2_and_below(self):
-        assert _extract_title("## Sub\n# Main\nBody.") == "Main"
-
-
 class TestDeriveSourceUrl(unittest.TestCase):
 
     def test_standard_convention(self):
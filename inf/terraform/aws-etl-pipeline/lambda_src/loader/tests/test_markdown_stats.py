@@ -0,0 +1,68 @@
+"""
+Unit tests for the single-pass Markdown analysis used by the loader.
+"""
+
+import unittest
+
+from markdown_stats import MAX_OUTLINE_HEADINGS, READING_WPM, analyse
+
+
+class TestTitle(unittest.TestCase):
+
+    def test_extracts_first_h1(self):
+        assert analyse("# My Title\n\nBody text.")["title"] == "My Title"
+
+    def test_falls_back_to_untitled(self):
+        assert analyse("No headings here.")["title"] == "Untitled"
+
+    def test_strips_whitespace(self):
+        assert analyse("#   Padded Title  \nBody.")["title"] == "Padded Title"
+
+    def test_ignores_h2_and_below(self):
+        assert analyse("## Sub\n# Main\nBody.")["title"] == "Main"
+
+    def test_ignores_headings_inside_code_fences(self):
+        text = "```bash\n# not a title\n```\n# Real Title\n"
+        assert analyse(text)["title"] == "Real Title"
+
+
+class TestWordCount(unittest.TestCase):
+
+    def test_matches_str_split(self):
+        text = "# Title\n\nOne two  three\tfour\r\n\n```\ncode line\n```\n"
+        assert analyse(text)["word_count"] == len(text.split())
+
+    def test_empty_document(self):
+        stats = analyse("")
+        assert stats["word_count"] == 0
+        assert stats["reading_time_minutes"] == 0
+
+    def test_reading_time_rounds_up(self):
+        text = " ".join(["word"] * (READING_WPM + 1))
+        assert analyse(text)["reading_time_minutes"] == 2
+
+
+class TestOutline(unittest.TestCase):
+
+    def test_collects_levels_in_document_order(self):
+        text = "# A\n\n## B ##\n\ntext\n\n### C\n#nospace\n"
+        assert analyse(text)["heading_outline"] == [
+            {"level": 1, "text": "A"},
+            {"level": 2, "text": "B"},
+            {"level": 3, "text": "C"},
+        ]
+
+    def test_outline_is_capped(self):
+        text = "".join(f"## H{i}\n" for i in range(MAX_OUTLINE_HEADINGS + 10))
+        assert len(analyse(text)["heading_outline"]) == MAX_OUTLINE_HEADINGS
+
+
+class TestLinks(unittest.TestCase):
+
+    def test_counts_inline_links_and_autolinks(self):
+        text = "See [a](https://a.example) and [b](/b \"t\").\n<https://c.example>\n"
+        assert analyse(text)["link_count"] == 3
+
+    def test_excludes_images_and_fenced_code(self):
+        text = "![img](x.png)\n```\n[a](https://a.example)\n```\n"
+        assert analyse(text)["link_count"] == 0
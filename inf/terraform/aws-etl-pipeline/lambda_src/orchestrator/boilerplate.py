@@ -0,0 +1,250 @@
+"""
+Rule-based boilerplate stripping
+--------------------------------
+Deterministic pre-extraction stage that removes whole Markdown blocks (blank-
+line separated; fenced code is one block) which are obviously not article
+content, so Bedrock reads — and bills — fewer input tokens:
+
+  link_dense  — blocks whose visible text is mostly link anchors (menus, tag
+                clouds, "related posts" lists): LINK_DENSITY_MIN_LINKS or more
+                links and anchor text above LINK_DENSITY_MAX of the text
+  edge        — header / footer blocks: short blocks among the first and last
+                EDGE_BLOCKS that match copyright, privacy, cookie, newsletter,
+                share / follow-us patterns, or one-line menus of MENU_MIN_ITEMS
+                or more short "|"-separated items with at least one link
+                ("[nav menu](/) Home | About")
+  repeated    — blocks seen on at least min_repeat_pages other pages of the
+                same site, tracked per site in a DynamoDB table (hash key
+                `site`, range key `block_hash`) by RepeatedBlockStore. Pages are
+                identified by page_of (the raw key without its timestamp), so
+                re-scrapes and edited revisions of one article never count as
+                other pages
+
+Headings and fenced code blocks are always kept, and a document that would be
+stripped down to nothing is returned unchanged. Only boilerplate-shaped blocks
+among the first and last REPEAT_EDGE_BLOCKS are fingerprinted — short blocks
+in the header / footer positions of the edge rule, or blocks with
+LINK_DENSITY_MIN_LINKS or more links — so body paragraphs are never candidates,
+and it bounds the DynamoDB work per document.
+"""
+
+import hashlib
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+from etl_common.aws_clients import LazyClient
+
+LINK_DENSITY_MIN_LINKS = 2
+LINK_DENSITY_MAX = 0.6
+
+EDGE_BLOCKS = 3
+EDGE_MAX_CHARS = 400
+MENU_MIN_ITEMS = 3
+MENU_MAX_ITEM_WORDS = 3
+
+REPEAT_EDGE_BLOCKS = 10
+# Distinct pages remembered per block — enough to cross any sensible threshold
+REPEAT_MAX_PAGES = 20
+REPEAT_TTL_SECONDS = 30 * 86400
+
+_FENCE_RE = re.compile(r"^[ \t]{0,3}(```|~~~)")
+_HEADING_RE = re.compile(r"^#{1,6}\s")
+_LINK_RE = re.compile(r"(!?)\[([^\]]*)\]\([^)]*\)")
+_MARKUP_RE = re.compile(r"[\s#>*_|`~\-+•·»›:;,.()\[\]]+")
+_EDGE_RE = re.compile(
+    r"©|\(c\)\s*\d{4}|copyright|all rights reserved|privacy policy|cookie"
+    r"|terms (?:of (?:use|service)|(?:&|and) conditions)"
+    r"|(?:subscribe to|sign up for) (?:our|the) newsletter|follow us|share (?:this|on)|powered by",
+    re.IGNORECASE,
+)
+_MENU_SEPARATOR_RE = re.compile(r"\s*[|•·]\s*")
+_WHITESPACE_RE = re.compile(r"\s+")
+_DIGITS_RE = re.compile(r"\d+")
+
+dynamodb_client = LazyClient("dynamodb")
+
+
+def strip(text: str, site: str = "", page_id: str = "", store=None, min_repeat_pages: int = 3) -> tuple:
+    """
+    Remove boilerplate blocks from `text`. Returns (text, stats) where stats
+    counts the removed blocks per rule and the input / output UTF-8 bytes.
+    Repeated-block detection runs only with a store, a site and a page_id;
+    store errors are reported in stats["repeat_error"] and never raise.
+    """
+    blocks = split_blocks(text)
+    stats = {"blocks": len(blocks), "link_dense": 0, "edge": 0, "repeated": 0}
+    removed = [None] * len(blocks)
+
+    first_heading = next((i for i, block in enumerate(blocks) if _HEADING_RE.match(block)), len(blocks))
+    for index, block in enumerate(blocks):
+        if _is_protected(block):
+            continue
+        if _is_link_dense(block):
+            removed[index] = "link_dense"
+        elif _is_edge(block, index, len(blocks), first_heading):
+            removed[index] = "edge"
+
+    if store is not None and site and page_id and min_repeat_pages > 0:
+        edge_indexes = sorted(set(range(min(REPEAT_EDGE_BLOCKS, len(blocks))))
+                              | set(range(max(len(blocks) - REPEAT_EDGE_BLOCKS, 0), len(blocks))))
+        fingerprints = {
+            index: block_fingerprint(blocks[index])
+            for index in edge_indexes
+            if _is_repeat_candidate(blocks[index], index, len(blocks), first_heading)
+        }
+        try:
+            pages = store.page_counts(site, page_id, set(fingerprints.values()))
+            store.record(site, page_id, set(fingerprints.values()))
+        except ClientError as exc:
+            stats["repeat_error"] = str(exc)
+            pages = {}
+        for index, fingerprint in fingerprints.items():
+            if removed[index] is None and pages.get(fingerprint, 0) >= min_repeat_pages:
+                removed[index] = "repeated"
+
+    kept = [block for block, reason in zip(blocks, removed) if reason is None]
+    if not any(not _HEADING_RE.match(block) for block in kept):
+        # Everything but headings looked like boilerplate — trust the model instead
+        kept, removed = blocks, [None] * len(blocks)
+
+    for reason in removed:
+        if reason is not None:
+            stats[reason] += 1
+    stats["input_bytes"] = len(text.encode("utf-8"))
+    result = "\n\n".join(kept) if any(removed) else text
+    stats["output_bytes"] = len(result.encode("utf-8")) if any(removed) else stats["input_bytes"]
+    return result, stats
+
+
+def split_blocks(text: str) -> list:
+    """Blank-line separated blocks; a fenced code block is never split."""
+    blocks = []
+    current = []
+    in_fence = False
+    for line in text.split("\n"):
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        if not line.strip() and not in_fence:
+            if current:
+                blocks.append("\n".join(current))
+                current = []
+            continue
+        current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+
+def block_fingerprint(block: str) -> str:
+    """Hash of the block's normalised text — case, spacing and numbers (years, counts) ignored."""
+    normalised = _DIGITS_RE.sub("0", _WHITESPACE_RE.sub(" ", block.strip().lower()))
+    return hashlib.sha256(normalised.encode("utf-8")).hexdigest()[:20]
+
+
+def site_of(source_key: str) -> str:
+    """Site of a raw object named {sanitized-domain}_{timestamp}.md, or "" when the key has no site part."""
+    filename = source_key.rsplit("/", 1)[-1]
+    return filename.rsplit("_", 1)[0] if "_" in filename else ""
+
+
+def page_of(source_key: str) -> str:
+    """Page of a raw object: its key without the _{timestamp}.md suffix, shared by every scrape of the page."""
+    directory, _, filename = source_key.rpartition("/")
+    name = filename.rsplit("_", 1)[0] if "_" in filename else filename.rsplit(".", 1)[0]
+    return f"{directory}/{name}" if directory else name
+
+
+def _is_protected(block: str) -> bool:
+    return bool(_FENCE_RE.match(block)) or (bool(_HEADING_RE.match(block)) and "\n" not in block)
+
+
+def _is_link_dense(block: str) -> bool:
+    links = _LINK_RE.findall(block)
+    if len(links) < LINK_DENSITY_MIN_LINKS:
+        return False
+    anchor_chars = sum(len(_MARKUP_RE.sub("", anchor)) for image, anchor in links if not image)
+    visible_chars = len(_MARKUP_RE.sub("", _LINK_RE.sub(lambda m: "" if m.group(1) else m.group(2), block)))
+    return visible_chars == 0 or anchor_chars / visible_chars > LINK_DENSITY_MAX
+
+
+def _is_edge(block: str, index: int, block_count: int, first_heading: int) -> bool:
+    if not _in_edge_position(block, index, block_count, first_heading):
+        return False
+    return bool(_EDGE_RE.search(block)) or _is_menu(block)
+
+
+def _in_edge_position(block: str, index: int, block_count: int, first_heading: int) -> bool:
+    in_header = index < min(EDGE_BLOCKS, first_heading) if first_heading else False
+    in_footer = index >= block_count - EDGE_BLOCKS
+    return (in_header or in_footer) and len(block) <= EDGE_MAX_CHARS
+
+
+def _is_repeat_candidate(block: str, index: int, block_count: int, first_heading: int) -> bool:
+    if _is_protected(block):
+        return False
+    return (_in_edge_position(block, index, block_count, first_heading)
+            or len(_LINK_RE.findall(block)) >= LINK_DENSITY_MIN_LINKS)
+
+
+def _is_menu(block: str) -> bool:
+    if "\n" in block or block.lstrip().startswith("|") or not _MENU_SEPARATOR_RE.search(block):
+        return False
+    if not _LINK_RE.search(block):
+        return False
+    # Each link is an item of its own, even when only spaces separate it from the next
+    items = [item for item in _MENU_SEPARATOR_RE.split(_LINK_RE.sub(r"|\2|", block)) if item.strip()]
+    return len(items) >= MENU_MIN_ITEMS and all(len(item.split()) <= MENU_MAX_ITEM_WORDS for item in items)
+
+
+class RepeatedBlockStore:
+    """Per-site block fingerprints and the distinct pages they appeared on, in DynamoDB."""
+
+    def __init__(self, table_name: str, client=None, max_workers: int = 8):
+        self.table_name = table_name
+        self.client = client or dynamodb_client
+        self.max_workers = max_workers
+
+    def page_counts(self, site: str, page_id: str, fingerprints: set) -> dict:
+        """Number of other pages of `site` each fingerprint has been seen on."""
+        counts = {}
+        keys = [{"site": {"S": site}, "block_hash": {"S": fingerprint}} for fingerprint in sorted(fingerprints)]
+        for start in range(0, len(keys), 100):  # BatchGetItem limit
+            request = {self.table_name: {"Keys": keys[start:start + 100], "ProjectionExpression": "block_hash, pages"}}
+            for _ in range(3):  # unprocessed keys are only a missed optimisation
+                response = self.client.batch_get_item(RequestItems=request)
+                for item in response.get("Responses", {}).get(self.table_name, []):
+                    pages = set(item.get("pages", {}).get("SS", [])) - {page_id}
+                    counts[item["block_hash"]["S"]] = len(pages)
+                request = response.get("UnprocessedKeys")
+                if not request:
+                    break
+        return counts
+
+    def record(self, site: str, page_id: str, fingerprints: set) -> None:
+        """Add page_id to each fingerprint's page set (bounded at REPEAT_MAX_PAGES) and refresh its TTL."""
+        expires_at = str(int(time.time()) + REPEAT_TTL_SECONDS)
+
+        def update(fingerprint: str) -> None:
+            try:
+                self.client.update_item(
+                    TableName=self.table_name,
+                    Key={"site": {"S": site}, "block_hash": {"S": fingerprint}},
+                    UpdateExpression="ADD pages :page SET expires_at = :expires_at",
+                    ConditionExpression="attribute_not_exists(pages) OR size(pages) < :max_pages",
+                    ExpressionAttributeValues={
+                        ":page": {"SS": [page_id]},
+                        ":expires_at": {"N": expires_at},
+                        ":max_pages": {"N": str(REPEAT_MAX_PAGES)},
+                    },
+                )
+            except ClientError as exc:
+                if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+
+        if not fingerprints:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(fingerprints))) as pool:
+            list(pool.map(update, fingerprints))
@@ -0,0 +1,102 @@
+"""
+Markdown chunking for large-document extraction
+-----------------------------------------------
+Splits a Markdown document into token-budgeted chunks on structural
+boundaries so each chunk can be extracted by its own InvokeAgent call:
+
+  1. sections — split before every ATX heading (`#` … `######`)
+  2. paragraphs — blank-line separated blocks inside an oversized section
+  3. lines — hard split of a single block that still exceeds the budget
+
+Fenced code blocks (``` / ~~~) are never split at headings or blank lines
+inside the fence. Adjacent pieces are packed greedily up to the budget, so
+chunk order always matches document order and "".join(chunks) == text.
+"""
+
+import re
+from typing import List
+
+# Rough Claude tokenisation for English prose/Markdown — good enough for budgeting
+CHARS_PER_TOKEN = 4
+
+_HEADING_RE = re.compile(r"^#{1,6}\s")
+_FENCE_RE = re.compile(r"^(```|~~~)")
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the token count of `text` from its character length."""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def split_markdown(text: str, max_tokens: int) -> List[str]:
+    """Split `text` into ordered chunks of at most ~max_tokens tokens each."""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if len(text) <= max_chars:
+        return [text]
+
+    pieces = []
+    for section in _split_blocks(text, at_headings=True):
+        if len(section) <= max_chars:
+            pieces.append(section)
+            continue
+        for paragraph in _split_blocks(section, at_headings=False):
+            if len(paragraph) <= max_chars:
+                pieces.append(paragraph)
+            else:
+                pieces.extend(_split_lines(paragraph, max_chars))
+
+    return _pack(pieces, max_chars)
+
+
+def _split_blocks(text: str, at_headings: bool) -> List[str]:
+    """
+    Split before headings (at_headings=True) or after blank lines
+    (at_headings=False), ignoring boundaries inside fenced code blocks.
+    """
+    blocks = []
+    current = []
+    in_fence = False
+
+    for line in text.splitlines(keepends=True):
+        if _FENCE_RE.match(line):
+            in_fence = not in_fence
+        elif not in_fence:
+            if at_headings and _HEADING_RE.match(line) and current:
+                blocks.append("".join(current))
+                current = []
+            elif not at_headings and not line.strip() and current:
+                current.append(line)
+                blocks.append("".join(current))
+                current = []
+                continue
+        current.append(line)
+
+    if current:
+        blocks.append("".join(current))
+    return blocks
+
+
+def _split_lines(text: str, max_chars: int) -> List[str]:
+    """Last resort for a single oversized block: split on lines, then characters."""
+    pieces = []
+    for line in text.splitlines(keepends=True):
+        while len(line) > max_chars:
+            pieces.append(line[:max_chars])
+            line = line[max_chars:]
+        if line:
+            pieces.append(line)
+    return pieces
+
+
+def _pack(pieces: List[str], max_chars: int) -> List[str]:
+    """Greedily merge adjacent pieces into chunks no larger than max_chars."""
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += piece
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,126 @@
+"""
+Bedrock completion sinks
+------------------------
+Destinations for the streamed InvokeAgent completion. Both sinks accept raw
+chunk bytes as they arrive and can be reset when a throttled stream is retried.
+
+  BufferedCompletion   — collects the completion in memory (inline payload mode)
+  S3StagingCompletion  — streams the completion to a staging object in S3 so the
+                         loader receives a pointer instead of the content. Small
+                         completions are written with a single PutObject; once
+                         the buffer exceeds PART_SIZE the sink switches to a
+                         multipart upload, so memory stays bounded at one part.
+"""
+
+from typing import Optional
+
+# S3 multipart parts must be >= 5 MiB (except the last); 8 MiB matches the
+# boto3 TransferConfig default chunk size.
+PART_SIZE = 8 * 1024 * 1024
+
+CONTENT_TYPE = "text/markdown; charset=utf-8"
+
+
+class BufferedCompletion:
+    """Collect completion chunks in memory."""
+
+    def __init__(self):
+        self._parts = []
+        self.bytes_written = 0
+
+    def write(self, chunk: bytes) -> None:
+        self._parts.append(chunk)
+        self.bytes_written += len(chunk)
+
+    def reset(self) -> None:
+        self._parts = []
+        self.bytes_written = 0
+
+    def buffered_text(self) -> Optional[str]:
+        """Return the full completion as text."""
+        return b"".join(self._parts).decode("utf-8")
+
+
+class S3StagingCompletion:
+    """Stream completion chunks to s3://bucket/key with a lazily started multipart upload."""
+
+    def __init__(self, s3_client, bucket: str, key: str, part_size: int = PART_SIZE):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+        self.part_size = part_size
+        self._buffer = bytearray()
+        self._upload_id = None
+        self._parts = []
+        self.bytes_written = 0
+
+    def write(self, chunk: bytes) -> None:
+        self._buffer += chunk
+        self.bytes_written += len(chunk)
+        if len(self._buffer) >= self.part_size:
+            self._flush_part()
+
+    def reset(self) -> None:
+        """Discard everything written so far (used before retrying a failed stream)."""
+        self.abort()
+        self._buffer = bytearray()
+        self.bytes_written = 0
+
+    def buffered_text(self) -> Optional[str]:
+        """
+        Return the completion as text if it never spilled into a multipart
+        upload, else None — callers use this to decide whether it is cacheable.
+        """
+        if self._upload_id is not None:
+            return None
+        return bytes(self._buffer).decode("utf-8")
+
+    def close(self) -> dict:
+        """Finish the upload and return the S3 pointer handed to the loader."""
+        if self._upload_id is None:
+            self.s3_client.put_object(
+                Bucket=self.bucket,
+                Key=self.key,
+                Body=bytes(self._buffer),
+                ContentType=CONTENT_TYPE,
+            )
+        else:
+            if self._buffer:
+                self._flush_part()
+            self.s3_client.complete_multipart_upload(
+                Bucket=self.bucket,
+                Key=self.key,
+                UploadId=self._upload_id,
+                MultipartUpload={"Parts": self._parts},
+            )
+            self._upload_id = None
+
+        self._buffer = bytearray()
+        return {"bucket": self.bucket, "key": self.key, "size_bytes": self.bytes_written}
+
+    def abort(self) -> None:
+        """Abort an in-flight multipart upload so no orphaned parts are billed."""
+        if self._upload_id is not None:
+            self.s3_client.abort_multipart_upload(
+                Bucket=self.bucket, Key=self.key, UploadId=self._upload_id
+            )
+            self._upload_id = None
+            self._parts = []
+
+    def _flush_part(self) -> None:
+        if self._upload_id is None:
+            response = self.s3_client.create_multipart_upload(
+                Bucket=self.bucket, Key=self.key, ContentType=CONTENT_TYPE
+            )
+            self._upload_id = response["UploadId"]
+
+        part_number = len(self._parts) + 1
+        response = self.s3_client.upload_part(
+            Bucket=self.bucket,
+            Key=self.key,
+            UploadId=self._upload_id,
+            PartNumber=part_number,
+            Body=bytes(self._buffer),
+        )
+        self._parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+        self._buffer = bytearray()
@@ -0,0 +1,73 @@
+"""
+Content-addressed extraction cache
+----------------------------------
+Bedrock extraction results keyed by sha256(agent ID + alias ID + model ID +
+raw Markdown bytes). Identical input — re-uploads, re-scrapes of unchanged
+pages, DLQ replays — skips InvokeAgent entirely.
+
+Items live in a DynamoDB table and expire through DynamoDB TTL on `expires_at`.
+Changing the agent, alias or model changes every key, so a prompt or model
+upgrade never serves stale extractions.
+"""
+
+import hashlib
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from etl_common.aws_clients import LazyClient
+
+# DynamoDB items are capped at 400 KB; leave headroom for the other attributes
+MAX_CACHED_BYTES = 350 * 1024
+
+dynamodb_client = LazyClient("dynamodb")
+
+
+def cache_key(raw_markdown: str, agent_id: str, agent_alias_id: str, model_id: str) -> str:
+    """Return the hex sha256 cache key for a document and extraction configuration."""
+    digest = hashlib.sha256()
+    for part in (agent_id, agent_alias_id, model_id):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")  # separator so ("ab", "c") and ("a", "bc") differ
+    digest.update(raw_markdown.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def lookup(table_name: str, key: str) -> Optional[str]:
+    """Return the cached clean content for `key`, or None on a miss."""
+    response = dynamodb_client.get_item(
+        TableName=table_name,
+        Key={"cache_key": {"S": key}},
+        ProjectionExpression="clean_content, expires_at",
+    )
+    item = response.get("Item")
+    if not item:
+        return None
+
+    # TTL deletion is lazy (can lag by up to ~48h) — treat expired items as misses
+    if int(item["expires_at"]["N"]) <= int(time.time()):
+        return None
+
+    return item["clean_content"]["S"]
+
+
+def store(table_name: str, key: str, clean_content: str, model_id: str, ttl_seconds: int) -> bool:
+    """
+    Cache an extraction result. Returns False when the content is too large to
+    fit in a DynamoDB item (the pipeline still succeeds, it just isn't cached).
+    """
+    if len(clean_content.encode("utf-8")) > MAX_CACHED_BYTES:
+        return False
+
+    now = int(time.time())
+    dynamodb_client.put_item(
+        TableName=table_name,
+        Item={
+            "cache_key": {"S": key},
+            "clean_content": {"S": clean_content},
+            "extraction_model": {"S": model_id},
+            "created_at": {"S": datetime.now(timezone.utc).isoformat()},
+            "expires_at": {"N": str(now + ttl_seconds)},
+        },
+    )
+    return True
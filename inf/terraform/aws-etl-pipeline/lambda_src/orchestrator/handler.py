@@ -1,13 +1,42 @@
 """
 ETL Orchestrator Lambda
 -----------------------
-Triggered by EventBridge on S3 raw-bucket PutObject events (.md files).
+Triggered by EventBridge on S3 raw-bucket PutObject events (.md files), either
+directly (one object per invocation) or through an SQS ingest queue in batch
+mode, where each invocation fans a batch of records out across a bounded
+worker pool and reports per-record partial failures (batchItemFailures).
 
-Flow:
+Flow (per object):
   1. Validate file size (reject > MAX_FILE_BYTES to guard Bedrock cost — REC-006)
-  2. Read raw Markdown from S3
-  3. Call Bedrock Agent (InvokeAgent) with retry/backoff (REC-015)
-  4. Invoke the loader Lambda asynchronously with the extracted clean content
+     from the event's detail.object.size, before any S3 request
+  2. Read raw Markdown from S3 with a single GetObject, re-checking the size from
+     the GET response and never reading past MAX_FILE_BYTES + 1 bytes. The body
+     is streamed through an incremental UTF-8 decoder and pre-cleaned (HTML
+     comments, base64 images, navigation lines — PRECLEAN_MARKDOWN) so neither
+     a raw copy nor the stripped content reaches Bedrock
+  2b. Strip boilerplate blocks (BOILERPLATE_STRIP) — link-dense blocks, header /
+     footer blocks and blocks repeated across the site's pages (BOILERPLATE_TABLE);
+     pages left with fewer than MODEL_MIN_WORDS words skip Bedrock and are
+     handed to the loader as stripped
+  3. Call Bedrock Agent (InvokeAgent) with retry/backoff (REC-015), paced by an
+     adaptive request budget shared across invocations (RATE_LIMITER_TABLE), unless the
+     content-addressed extraction cache already holds a result for these bytes.
+     Files above MAX_FILE_BYTES (large-document mode) are split on heading /
+     paragraph boundaries and the chunks are extracted concurrently.
+  4. Hand the extracted clean content to the loader — inline, or
+     (COMPLETION_STAGING_BUCKET set) as a pointer to a staging object the
+     completion was streamed into, which lifts the 256 KB payload limit.
+     LOADER_HANDOFF_MODE selects the path:
+       lambda — async Invoke of the loader function (default; own retries + DLQ)
+       inline — run the loader handler in-process as a library (loader_library)
+                — no second invocation, lowest latency, loader failures fail
+                this document
+       sqs    — SendMessage to the loader queue, drained by the loader through
+                an event source mapping capped at a maximum concurrency
+                (back-pressure on DynamoDB / S3 during bursts)
+
+Per-object stage timings, retries, sizes and estimated tokens are emitted as
+CloudWatch EMF metrics (etl_common.metrics) keyed by correlation_id.
 """
 
 import hashlib
@@ -16,9 +45,20 @@ import logging
 import os
 import random
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
 
-import boto3
 from botocore.exceptions import ClientError
+from etl_common import metrics as emf
+from etl_common.aws_clients import LazyClient
+
+import boilerplate
+import chunking
+import completion_sink
+import extraction_cache
+import loader_library
+import preclean
+import rate_limiter
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -26,86 +66,447 @@ logger.setLevel(logging.INFO)
 # REC-006: reject files above this threshold before calling Bedrock
 MAX_FILE_BYTES = int(os.environ.get("MAX_FILE_BYTES", str(200 * 1024)))  # 200 KB
 
-s3_client = boto3.client("s3")
-bedrock_agent_runtime = boto3.client("bedrock-agent-runtime")
-lambda_client = boto3.client("lambda")
+# Strip HTML comments, base64 images and navigation lines before Bedrock sees
+# the document (fewer input tokens); the read is streamed either way
+PRECLEAN_MARKDOWN = os.environ.get("PRECLEAN_MARKDOWN", "true").lower() == "true"
+
+# Rule-based boilerplate stripping before extraction. The repeated-block rule
+# needs the per-site table; empty table name disables that rule only.
+BOILERPLATE_STRIP = os.environ.get("BOILERPLATE_STRIP", "true").lower() == "true"
+BOILERPLATE_TABLE = os.environ.get("BOILERPLATE_TABLE", "")
+BOILERPLATE_MIN_REPEAT_PAGES = int(os.environ.get("BOILERPLATE_MIN_REPEAT_PAGES", "3"))
+
+# Documents with fewer words than this after stripping skip Bedrock. 0 disables it.
+MODEL_MIN_WORDS = int(os.environ.get("MODEL_MIN_WORDS", "0"))
+RULE_BASED_MODEL = "rule-based"
+
+# Large-document mode: files above MAX_FILE_BYTES and up to LARGE_DOC_MAX_BYTES
+# are split into CHUNK_MAX_TOKENS chunks extracted with at most
+# CHUNK_MAX_CONCURRENCY in-flight InvokeAgent calls. 0 disables the mode.
+LARGE_DOC_MAX_BYTES = int(os.environ.get("LARGE_DOC_MAX_BYTES", "0"))
+CHUNK_MAX_TOKENS = int(os.environ.get("CHUNK_MAX_TOKENS", "12000"))
+CHUNK_MAX_CONCURRENCY = int(os.environ.get("CHUNK_MAX_CONCURRENCY", "4"))
+
+# Batch mode: records processed concurrently per invocation. Effective Bedrock
+# concurrency is reserved_concurrency x BATCH_MAX_WORKERS — size both together.
+BATCH_MAX_WORKERS = int(os.environ.get("BATCH_MAX_WORKERS", "4"))
+
+# Content-addressed extraction cache (DynamoDB). Empty table name disables it.
+EXTRACTION_CACHE_TABLE = os.environ.get("EXTRACTION_CACHE_TABLE", "")
+EXTRACTION_CACHE_TTL_SECONDS = int(os.environ.get("EXTRACTION_CACHE_TTL_DAYS", "30")) * 86400
+
+# Shared adaptive (AIMD) Bedrock rate limiter in DynamoDB. Empty table name disables it.
+RATE_LIMITER_TABLE = os.environ.get("RATE_LIMITER_TABLE", "")
+BEDROCK_MAX_RETRIES = int(os.environ.get("BEDROCK_MAX_RETRIES", "3"))
+
+# Staging mode: stream completions to S3 and hand the loader a pointer (schema 1.1)
+COMPLETION_STAGING_BUCKET = os.environ.get("COMPLETION_STAGING_BUCKET", "")
+COMPLETION_STAGING_PREFIX = os.environ.get("COMPLETION_STAGING_PREFIX", "staging/")
+
+# Orchestrator → loader hand-off: "lambda" (async Invoke), "inline" or "sqs"
+LOADER_HANDOFF_MODE = os.environ.get("LOADER_HANDOFF_MODE", "lambda")
+LOADER_HANDOFF_MODES = ("lambda", "inline", "sqs")
+LOADER_QUEUE_URL = os.environ.get("LOADER_QUEUE_URL", "")
+
+# Created on first use (etl_common layer) — keeps client construction out of the cold-start init
+s3_client = LazyClient("s3")
+bedrock_agent_runtime = LazyClient("bedrock-agent-runtime")
+lambda_client = LazyClient("lambda")
+sqs_client = LazyClient("sqs")
+
+boilerplate_store = boilerplate.RepeatedBlockStore(BOILERPLATE_TABLE) if BOILERPLATE_TABLE else None
+
+bedrock_rate_limiter = (
+    rate_limiter.AdaptiveRateLimiter(
+        RATE_LIMITER_TABLE,
+        "bedrock-invoke-agent",
+        initial_rps=float(os.environ.get("BEDROCK_INITIAL_RPS", "2")),
+        min_rps=float(os.environ.get("BEDROCK_MIN_RPS", "1")),
+        max_rps=float(os.environ.get("BEDROCK_MAX_RPS", "20")),
+    )
+    if RATE_LIMITER_TABLE
+    else None
+)
 
 
 def handler(event: dict, context) -> dict:
+    # SQS event source mapping delivers a list of records — batch mode
+    if "Records" in event:
+        return batch_handler(event, context)
+
     # Use EventBridge event ID as correlation ID for end-to-end tracing (REC-013)
     correlation_id = event.get("id", context.aws_request_id)
+    return _process_event(event, correlation_id)
+
+
+def batch_handler(event: dict, context) -> dict:
+    """
+    Process an SQS batch of EventBridge S3 events across a bounded worker pool.
+
+    Each record is processed independently with its own correlation ID. Failed
+    records are returned as batchItemFailures so that only they are retried
+    (requires ReportBatchItemFailures on the event source mapping).
+    """
+    records = event.get("Records", [])
+    batch_log = _make_log(context.aws_request_id)
+
+    if not records:
+        return {"batchItemFailures": []}
+
+    max_workers = min(BATCH_MAX_WORKERS, len(records))
+    batch_log("Batch started", records=len(records), max_workers=max_workers)
+
+    start_ms = int(time.time() * 1000)
+    failures = []
+    results = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(_process_record, record): record["messageId"] for record in records}
+        for future in as_completed(futures):
+            result = future.result()
+            if result is None:
+                failures.append({"itemIdentifier": futures[future]})
+            else:
+                results.append(result)
+
+    batch_log(
+        "Batch complete",
+        records=len(records),
+        failed=len(failures),
+        cache_hits=sum(1 for r in results if r.get("extraction_cache") == "hit"),
+        cache_misses=sum(1 for r in results if r.get("extraction_cache") == "miss"),
+        batch_ms=int(time.time() * 1000) - start_ms,
+    )
+    return {"batchItemFailures": failures}
+
+
+def _process_record(record: dict):
+    """Process one SQS record; return None on failure (never raise) so siblings keep running."""
+    try:
+        event = json.loads(record["body"])
+    except (KeyError, TypeError, ValueError) as exc:
+        _make_log(record.get("messageId", "unknown"))(
+            "Record body is not a valid EventBridge event", error=str(exc)
+        )
+        return None
+
+    correlation_id = event.get("id", record["messageId"])
+    try:
+        return _process_event(event, correlation_id)
+    except Exception as exc:  # reported back to SQS as a batch item failure
+        _make_log(correlation_id)(
+            "Record failed",
+            error_type=type(exc).__name__,
+            error=str(exc),
+        )
+        return None
+
+
+def _make_log(correlation_id: str):
+    """Return a structured JSON logger bound to a correlation ID (REC-013)."""
 
     def log(msg: str, **kwargs):
         logger.info(json.dumps({"correlation_id": correlation_id, "msg": msg, **kwargs}))
 
+    return log
+
+
+def _process_event(event: dict, correlation_id: str) -> dict:
+    """Run the flow for one S3 object event and emit its EMF metrics, even on failure."""
+    pipeline_start_ms = int(time.time() * 1000)
+    metrics = emf.Metrics("orchestrator", correlation_id)
+    try:
+        with metrics.timer("OrchestratorMs"):
+            return _run_pipeline(event, correlation_id, pipeline_start_ms, metrics)
+    except Exception:
+        metrics.add("OrchestratorErrors")
+        raise
+    finally:
+        metrics.flush()
+
+
+def _run_pipeline(event: dict, correlation_id: str, pipeline_start_ms: int, metrics) -> dict:
+    """Run the size guard → read → extract → hand-off flow for one S3 object event."""
+    log = _make_log(correlation_id)
+
     detail = event.get("detail", {})
     source_bucket = detail["bucket"]["name"]
     source_key = detail["object"]["key"]
 
     log("Orchestrator started", source_bucket=source_bucket, source_key=source_key)
+    metrics.set_property("source_key", source_key)
 
-    # ── 1. Guard: validate file size ──────────────────────────────────────────
-    head = s3_client.head_object(Bucket=source_bucket, Key=source_key)
-    file_size = head["ContentLength"]
+    # ── 1. Guard: validate file size from the event (no S3 request) ──────────
+    event_size = detail["object"].get("size")
+    if event_size is not None:
+        _check_file_size(event_size, source_key)
 
-    if file_size > MAX_FILE_BYTES:
-        # Let the error propagate to the DLQ for inspection
-        raise ValueError(
-            f"File too large: {file_size} bytes (max {MAX_FILE_BYTES}). "
-            "Rejecting to prevent runaway Bedrock cost. Key: {source_key}"
+    # ── 2. Read raw Markdown — one GetObject, size re-checked from the response,
+    #       streamed through an incremental UTF-8 decoder and pre-cleaned
+    start_ms = int(time.time() * 1000)
+    obj = s3_client.get_object(Bucket=source_bucket, Key=source_key)
+    try:
+        file_size = obj["ContentLength"]
+        _check_file_size(file_size, source_key)
+        # Bound the read even if the object changed after the event was emitted
+        raw_markdown, bytes_read, preclean_stats = preclean.read_markdown(
+            obj["Body"], _max_accepted_bytes(), clean=PRECLEAN_MARKDOWN
         )
+    finally:
+        obj["Body"].close()
+    _check_file_size(bytes_read, source_key)
+    s3_read_ms = int(time.time() * 1000) - start_ms
+
+    log(
+        "Raw Markdown read",
+        size_bytes=file_size,
+        chars=preclean_stats["raw_chars"],
+        preclean=preclean_stats,
+        s3_requests=1,
+        s3_read_ms=s3_read_ms,
+    )
+    metrics.put("S3ReadMs", s3_read_ms)
+    metrics.put("InputBytes", file_size, emf.BYTES)
+    metrics.put("InputChars", preclean_stats["raw_chars"], emf.COUNT)
+    metrics.put("PrecleanRemovedChars", preclean_stats["raw_chars"] - len(raw_markdown), emf.COUNT)
+    metrics.put("BedrockCalls", 0, emf.COUNT)  # incremented per InvokeAgent attempt
+    metrics.put("BedrockRetries", 0, emf.COUNT)
 
-    log("File size OK", size_bytes=file_size)
+    # ── 2b. Strip boilerplate blocks; tiny pages skip the model ──────────────
+    if BOILERPLATE_STRIP:
+        raw_markdown, strip_stats = boilerplate.strip(
+            raw_markdown,
+            site=boilerplate.site_of(source_key),
+            # Every scrape of a page shares its key minus the timestamp
+            page_id=boilerplate.page_of(source_key),
+            store=boilerplate_store,
+            min_repeat_pages=BOILERPLATE_MIN_REPEAT_PAGES,
+        )
+        removed_bytes = strip_stats["input_bytes"] - strip_stats["output_bytes"]
+        log("Boilerplate stripped", removed_bytes=removed_bytes, boilerplate=strip_stats)
+        metrics.put("BoilerplateRemovedBytes", removed_bytes, emf.BYTES)
+    metrics.put("EstimatedInputTokens", chunking.estimate_tokens(raw_markdown), emf.COUNT)
 
-    # ── 2. Read raw Markdown ──────────────────────────────────────────────────
-    obj = s3_client.get_object(Bucket=source_bucket, Key=source_key)
-    raw_markdown = obj["Body"].read().decode("utf-8")
+    skip_model = MODEL_MIN_WORDS > 0 and len(raw_markdown.split()) < MODEL_MIN_WORDS
+    metrics.put("ModelSkipped", int(skip_model), emf.COUNT)
 
-    log("Raw Markdown read", chars=len(raw_markdown))
+    # ── 3. Bedrock Agent extraction (extraction cache first) ─────────────────
+    if COMPLETION_STAGING_BUCKET:
+        staging_key = f"{COMPLETION_STAGING_PREFIX}{_session_id(correlation_id)}.md"
+        sink = completion_sink.S3StagingCompletion(s3_client, COMPLETION_STAGING_BUCKET, staging_key)
+    else:
+        sink = completion_sink.BufferedCompletion()
 
-    # ── 3. Bedrock Agent extraction ───────────────────────────────────────────
     start_ms = int(time.time() * 1000)
-    clean_content = _invoke_agent_with_retry(raw_markdown, correlation_id, log)
+    content_ref = None
+    try:
+        if skip_model:
+            # Too little text left for the agent to improve on — hand it over as stripped
+            sink.write(raw_markdown.encode("utf-8"))
+            cache_status = "skipped"
+        else:
+            cache_status = _extract_with_cache(raw_markdown, correlation_id, log, sink, metrics)
+        if COMPLETION_STAGING_BUCKET:
+            content_ref = sink.close()
+    except Exception:
+        if COMPLETION_STAGING_BUCKET:
+            sink.abort()
+        raise
     extraction_ms = int(time.time() * 1000) - start_ms
 
     log(
         "Bedrock extraction complete",
-        output_chars=len(clean_content),
+        output_bytes=sink.bytes_written,
         extraction_ms=extraction_ms,
+        extraction_cache=cache_status,
     )
+    metrics.set_property("extraction_cache", cache_status)
+    metrics.put("ExtractionMs", extraction_ms)
+    metrics.put("ExtractionCacheHit", int(cache_status == "hit"), emf.COUNT)
+    if cache_status not in ("hit", "skipped"):
+        metrics.put("BedrockMs", extraction_ms)
 
-    # ── 4. Invoke loader asynchronously ───────────────────────────────────────
+    # ── 4. Hand off to the loader (LOADER_HANDOFF_MODE) ───────────────────────
     payload = {
         "schema_version": "1.0",
         "source_bucket": source_bucket,
         "source_key": source_key,
-        "clean_content": clean_content,
         "correlation_id": correlation_id,
-        "extraction_model": os.environ["BEDROCK_MODEL_ID"],
+        "extraction_model": RULE_BASED_MODEL if skip_model else os.environ["BEDROCK_MODEL_ID"],
         "extraction_ms": extraction_ms,
+        # Lets the loader report end-to-end TotalPipelineMs for this correlation_id
+        "pipeline_start_ms": pipeline_start_ms,
     }
+    if content_ref is None:
+        payload["clean_content"] = sink.buffered_text()
+        output_chars = len(payload["clean_content"])
+    else:
+        # Schema 1.1: pointer to the staged completion instead of inline content
+        payload["schema_version"] = "1.1"
+        payload["clean_content_s3"] = content_ref
+        output_chars = sink.bytes_written  # spilled to S3 — bytes approximate chars
+    metrics.put("OutputBytes", sink.bytes_written, emf.BYTES)
+    metrics.put("OutputChars", output_chars, emf.COUNT)
+    metrics.put("EstimatedOutputTokens", -(-output_chars // chunking.CHARS_PER_TOKEN), emf.COUNT)
+
+    with metrics.timer("LoaderHandoffMs"):
+        _hand_off_to_loader(payload, log)
+
+    return {
+        "status": "ok",
+        "source_key": source_key,
+        "correlation_id": correlation_id,
+        "extraction_cache": cache_status,
+        "loader_handoff": LOADER_HANDOFF_MODE,
+    }
+
+
+def _hand_off_to_loader(payload: dict, log) -> None:
+    """Deliver the loader payload by the configured LOADER_HANDOFF_MODE."""
+    if LOADER_HANDOFF_MODE == "lambda":
+        lambda_client.invoke(
+            FunctionName=os.environ["LOADER_FUNCTION_NAME"],
+            InvocationType="Event",  # fire-and-forget; loader has its own DLQ
+            Payload=json.dumps(payload),
+        )
+        log("Loader Lambda invoked asynchronously")
+    elif LOADER_HANDOFF_MODE == "inline":
+        # Same handler, same schema_version validation — just no second invocation
+        result = loader_library.load(payload)
+        log("Loader ran in-process", article_id=result["article_id"], unchanged=result["unchanged"])
+    elif LOADER_HANDOFF_MODE == "sqs":
+        response = sqs_client.send_message(QueueUrl=LOADER_QUEUE_URL, MessageBody=json.dumps(payload))
+        log("Loader payload queued", message_id=response["MessageId"])
+    else:
+        raise ValueError(
+            f"Unsupported LOADER_HANDOFF_MODE: {LOADER_HANDOFF_MODE!r}. Expected one of {LOADER_HANDOFF_MODES}."
+        )
+
 
-    lambda_client.invoke(
-        FunctionName=os.environ["LOADER_FUNCTION_NAME"],
-        InvocationType="Event",  # fire-and-forget; loader has its own DLQ
-        Payload=json.dumps(payload),
+def _max_accepted_bytes() -> int:
+    """Largest file accepted: MAX_FILE_BYTES, or LARGE_DOC_MAX_BYTES when chunking is enabled."""
+    return max(MAX_FILE_BYTES, LARGE_DOC_MAX_BYTES)
+
+
+def _check_file_size(size_bytes: int, source_key: str) -> None:
+    """Reject files above the accepted size; the error propagates to the DLQ for inspection."""
+    max_bytes = _max_accepted_bytes()
+    if size_bytes > max_bytes:
+        raise ValueError(
+            f"File too large: {size_bytes} bytes (max {max_bytes}). "
+            f"Rejecting to prevent runaway Bedrock cost. Key: {source_key}"
+        )
+
+
+def _extract_with_cache(raw_markdown: str, correlation_id: str, log, sink, metrics=None) -> str:
+    """
+    Write the clean content into `sink` and return the cache status: "hit",
+    "miss" or "disabled". Cache read/write errors are logged and never fail the
+    pipeline.
+    """
+    if not EXTRACTION_CACHE_TABLE:
+        _extract(raw_markdown, correlation_id, log, sink, metrics)
+        return "disabled"
+
+    model_id = os.environ["BEDROCK_MODEL_ID"]
+    key = extraction_cache.cache_key(
+        raw_markdown,
+        os.environ["BEDROCK_AGENT_ID"],
+        os.environ["BEDROCK_AGENT_ALIAS_ID"],
+        model_id,
     )
 
-    log("Loader Lambda invoked asynchronously")
-    return {"status": "ok", "source_key": source_key, "correlation_id": correlation_id}
+    try:
+        cached = extraction_cache.lookup(EXTRACTION_CACHE_TABLE, key)
+    except ClientError as exc:
+        log("Extraction cache lookup failed — calling Bedrock", cache_key=key, error=str(exc))
+        cached = None
+
+    if cached is not None:
+        log("Extraction cache hit", cache_key=key, cache_hits=1, cache_misses=0)
+        sink.write(cached.encode("utf-8"))
+        return "hit"
 
+    log("Extraction cache miss", cache_key=key, cache_hits=0, cache_misses=1)
+    _extract(raw_markdown, correlation_id, log, sink, metrics)
 
-def _invoke_agent_with_retry(raw_markdown: str, correlation_id: str, log, max_retries: int = 3) -> str:
-    """Call InvokeAgent with full-jitter exponential backoff on throttling (REC-015)."""
+    # None when the completion already spilled into a multipart staging upload
+    clean_content = sink.buffered_text()
+    try:
+        stored = clean_content is not None and extraction_cache.store(
+            EXTRACTION_CACHE_TABLE, key, clean_content, model_id, EXTRACTION_CACHE_TTL_SECONDS
+        )
+        if not stored:
+            log("Extraction too large to cache", cache_key=key, output_bytes=sink.bytes_written)
+    except ClientError as exc:
+        log("Extraction cache write failed", cache_key=key, error=str(exc))
+
+    return "miss"
+
+
+def _extract(raw_markdown: str, correlation_id: str, log, sink, metrics=None) -> None:
+    """One InvokeAgent call for normal files; chunked parallel extraction for large ones."""
+    if len(raw_markdown.encode("utf-8")) <= MAX_FILE_BYTES:
+        _invoke_agent_with_retry(raw_markdown, correlation_id, log, sink, metrics=metrics)
+        return
+
+    chunks = chunking.split_markdown(raw_markdown, CHUNK_MAX_TOKENS)
+    max_workers = min(CHUNK_MAX_CONCURRENCY, len(chunks))
+    log(
+        "Large document — chunked extraction",
+        chunks=len(chunks),
+        max_workers=max_workers,
+        estimated_tokens=chunking.estimate_tokens(raw_markdown),
+    )
+
+    def extract_chunk(indexed_chunk) -> str:
+        index, chunk = indexed_chunk
+        chunk_sink = completion_sink.BufferedCompletion()
+        # Own session per chunk so concurrent calls never share agent conversation state
+        _invoke_agent_with_retry(chunk, f"{correlation_id}#chunk-{index}", log, chunk_sink, metrics=metrics)
+        return chunk_sink.buffered_text()
+
+    # pool.map yields results in submission order, so stitching preserves document order
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = list(pool.map(extract_chunk, enumerate(chunks)))
+
+    for index, text in enumerate(results):
+        if index:
+            sink.write(b"\n\n")
+        sink.write(text.strip().encode("utf-8"))
+
+
+def _session_id(correlation_id: str) -> str:
+    """Deterministic ID per source correlation so re-runs reuse the same session/object."""
+    return hashlib.sha256(correlation_id.encode()).hexdigest()[:32]
+
+
+def _invoke_agent_with_retry(
+    raw_markdown: str,
+    correlation_id: str,
+    log,
+    sink,
+    max_retries: Optional[int] = None,
+    metrics=None,
+) -> None:
+    """
+    Call InvokeAgent with full-jitter exponential backoff on throttling (REC-015),
+    streaming completion chunks into `sink` as they arrive. Each attempt first
+    takes a slot from the shared rate limiter and reports its outcome back to it.
+    Calls and retries are counted on `metrics` when given.
+    """
+    if max_retries is None:
+        max_retries = BEDROCK_MAX_RETRIES
     agent_id = os.environ["BEDROCK_AGENT_ID"]
     agent_alias_id = os.environ["BEDROCK_AGENT_ALIAS_ID"]
-
-    # Deterministic session ID per source correlation so re-runs reuse the same session
-    session_id = hashlib.sha256(correlation_id.encode()).hexdigest()[:32]
+    session_id = _session_id(correlation_id)
 
     retryable_codes = {"ThrottlingException", "ServiceUnavailableException", "ModelNotReadyException"}
 
     for attempt in range(max_retries):
+        _acquire_bedrock_slot(log)
+        if metrics is not None:
+            metrics.add("BedrockCalls")
         try:
             response = bedrock_agent_runtime.invoke_agent(
                 agentId=agent_id,
@@ -115,17 +516,20 @@ def _invoke_agent_with_retry(raw_markdown: str, correlation_id: str, log, max_re
                 enableTrace=False,
             )
 
-            # Collect completion chunks from the streaming response
-            completion_parts = []
+            # Forward completion chunks from the streaming response
             for evt in response["completion"]:
                 if "chunk" in evt:
-                    completion_parts.append(evt["chunk"]["bytes"].decode("utf-8"))
-
-            return "".join(completion_parts)
+                    sink.write(evt["chunk"]["bytes"])
+            _record_bedrock_outcome(throttled=False, log=log)
+            return
 
         except ClientError as exc:
             code = exc.response["Error"]["Code"]
+            if code == "ThrottlingException":
+                _record_bedrock_outcome(throttled=True, log=log)
             if code in retryable_codes and attempt < max_retries - 1:
+                # Throttles can also arrive mid-stream — drop any partial output
+                sink.reset()
                 # Full-jitter: sleep between 0 and (2^attempt) seconds
                 sleep_s = random.uniform(0, 2 ** attempt)
                 log(
@@ -135,6 +539,39 @@ def _invoke_agent_with_retry(raw_markdown: str, correlation_id: str, log, max_re
                     error_code=code,
                     sleep_s=round(sleep_s, 2),
                 )
+                if metrics is not None:
+                    metrics.add("BedrockRetries")
                 time.sleep(sleep_s)
             else:
                 raise
+
+
+def _acquire_bedrock_slot(log) -> None:
+    """Wait for the shared Bedrock budget. Limiter errors fail open — never block extraction."""
+    if bedrock_rate_limiter is None:
+        return
+    try:
+        waited_s = bedrock_rate_limiter.acquire()
+    except ClientError as exc:
+        log("Rate limiter unavailable — proceeding without it", error=str(exc))
+        return
+    if waited_s > 0:
+        log(
+            "Rate limiter wait",
+            waited_ms=int(waited_s * 1000),
+            rate_rps=bedrock_rate_limiter.current_rate(),
+        )
+
+
+def _record_bedrock_outcome(throttled: bool, log) -> None:
+    """Feed the AIMD limiter: grow the budget on success, shrink it on throttling."""
+    if bedrock_rate_limiter is None:
+        return
+    try:
+        if throttled:
+            if bedrock_rate_limiter.record_throttle():
+                log("Rate limiter decreased", rate_rps=bedrock_rate_limiter.current_rate())
+        else:
+            bedrock_rate_limiter.record_success()
+    except ClientError as exc:
+        log("Rate limiter update failed", error=str(exc))
@@ -0,0 +1,53 @@
+"""
+Loader as a library (LOADER_HANDOFF_MODE=inline)
+------------------------------------------------
+Runs the loader Lambda's handler inside the orchestrator process instead of
+invoking the loader function, saving the async Invoke round trip and the
+loader's own cold/warm start per document.
+
+The loader source is shipped unchanged — as the etl-loader-library layer,
+extracted to /opt/loader (LOADER_SOURCE_DIR) — and imported once per container
+under its own module name, because both Lambdas name their entry point
+handler.py. The payload therefore goes through exactly the same code path as
+an invoked loader: the same schema_version validation, idempotent writes and
+EMF metrics.
+"""
+
+import importlib.util
+import os
+import sys
+import threading
+from types import SimpleNamespace
+
+LOADER_SOURCE_DIR = os.environ.get("LOADER_SOURCE_DIR", "/opt/loader")
+MODULE_NAME = "etl_loader_handler"
+
+_lock = threading.Lock()
+
+
+def load_module(source_dir: str = None):
+    """Import the loader handler once (thread-safe) and return the module."""
+    with _lock:
+        module = sys.modules.get(MODULE_NAME)
+        if module is not None:
+            return module
+
+        source_dir = source_dir or LOADER_SOURCE_DIR
+        path = os.path.join(source_dir, "handler.py")
+        if not os.path.isfile(path):
+            raise ImportError(f"Loader source not found at {path} — is the loader library layer attached?")
+
+        # Appended, not prepended: the orchestrator's own modules keep priority
+        if source_dir not in sys.path:
+            sys.path.append(source_dir)
+        spec = importlib.util.spec_from_file_location(MODULE_NAME, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        sys.modules[MODULE_NAME] = module
+        return module
+
+
+def load(payload: dict) -> dict:
+    """Run one loader payload in-process and return the loader's result."""
+    loader = load_module()
+    return loader.handler(payload, SimpleNamespace(aws_request_id=payload["correlation_id"]))
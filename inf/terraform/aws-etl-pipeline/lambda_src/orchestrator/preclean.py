@@ -0,0 +1,211 @@
+"""
+Streaming read and pre-cleaning of raw Markdown
+-----------------------------------------------
+Reads the S3 body in READ_CHUNK_BYTES pieces through an incremental UTF-8
+decoder and cleans it line by line, so the raw bytes are never held alongside
+a full decoded copy: peak memory is one chunk plus the cleaned text that is
+sent to Bedrock.
+
+Outside fenced code blocks the cleaner removes content the agent would only
+discard anyway (and bill as input tokens):
+
+  comments     — HTML comments, including ones spanning several lines
+  data_images  — inline base64 images (![alt](data:...) and <img src="data:...">);
+                 the alt text is kept
+  nav_lines    — navigation bars: lines made of NAV_MIN_LINKS or more links
+                 with hardly any other text, and "skip to content" style links.
+                 Markdown table rows (outer pipes, or next to a |---| delimiter
+                 row) and comma-separated link lists are content, never nav
+  blank_lines  — blank lines beyond one in a row (left behind by removals)
+
+Chunk boundaries may fall inside a multi-byte character or a line; the
+decoder and the pending-line buffer carry the partial piece over.
+"""
+
+import codecs
+import re
+
+READ_CHUNK_BYTES = 64 * 1024
+
+# A line with at least this many links and at most NAV_MAX_TEXT_RATIO of
+# non-link text (separators excluded) is treated as a navigation bar
+NAV_MIN_LINKS = 3
+NAV_MAX_TEXT_RATIO = 0.2
+
+_FENCE_RE = re.compile(r"^[ \t]{0,3}(```|~~~)")
+_LINK_RE = re.compile(r"!?\[[^\]]*\]\([^)]*\)")
+_NAV_SEPARATORS_RE = re.compile(r"[\s|•·»›/\-–—*>]+")
+_TABLE_DELIMITER_RE = re.compile(r"^[ \t]*\|?[ \t]*:?-+:?[ \t]*(?:\|[ \t]*:?-+:?[ \t]*)*\|?[ \t]*$")
+_DATA_IMAGE_MD_RE = re.compile(r"!\[([^\]]*)\]\(\s*<?data:[^)]*\)")
+_DATA_IMAGE_HTML_RE = re.compile(r"""<img\b[^>]*?\bsrc\s*=\s*["']data:[^"']*["'][^>]*>""", re.IGNORECASE)
+_SKIP_LINK_RE = re.compile(
+    r"^\s*\[?(?:skip to (?:main )?content|skip navigation|back to top|toggle navigation)\]?(?:\([^)]*\))?\s*$",
+    re.IGNORECASE,
+)
+
+
+def read_markdown(body, max_bytes: int, clean: bool = True, chunk_bytes: int = READ_CHUNK_BYTES) -> tuple:
+    """
+    Stream at most max_bytes + 1 bytes of `body` (a file-like S3 body) into
+    text. Returns (text, bytes_read, stats); text is None when the body is
+    larger than max_bytes, so the caller can reject it without decoding the rest.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    cleaner = MarkdownCleaner(enabled=clean)
+    remaining = max_bytes + 1
+    bytes_read = 0
+
+    while remaining > 0:
+        chunk = body.read(min(chunk_bytes, remaining))
+        if not chunk:
+            break
+        bytes_read += len(chunk)
+        remaining -= len(chunk)
+        cleaner.feed(decoder.decode(chunk))
+
+    if bytes_read > max_bytes:
+        return None, bytes_read, cleaner.stats
+    cleaner.feed(decoder.decode(b"", final=True))  # raises on a truncated character
+    return cleaner.finish(), bytes_read, cleaner.stats
+
+
+class MarkdownCleaner:
+    """Incremental line-by-line cleaner: feed() decoded text, then finish()."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stats = {
+            "raw_chars": 0,
+            "clean_chars": 0,
+            "comments": 0,
+            "data_images": 0,
+            "nav_lines": 0,
+            "blank_lines": 0,
+        }
+        self._pending = ""
+        self._lines = []
+        self._in_fence = False
+        self._in_comment = False
+        self._in_table = False
+        # A nav-shaped "|" line kept back until the next line shows whether it heads a table
+        self._held_row = None
+        self._previous_blank = False
+
+    def feed(self, text: str) -> None:
+        self.stats["raw_chars"] += len(text)
+        if not self.enabled:
+            self._lines.append(text)
+            return
+        text = self._pending + text
+        start = 0
+        while True:
+            end = text.find("\n", start)
+            if end == -1:
+                break
+            self._emit(text[start:end])
+            start = end + 1
+        self._pending = text[start:]
+
+    def finish(self) -> str:
+        """Flush the last (unterminated) line and return the cleaned text."""
+        if self._pending:
+            self._emit(self._pending, terminated=False)
+            self._pending = ""
+        if self._held_row is not None:
+            self.stats["nav_lines"] += 1
+            self._held_row = None
+        result = "".join(self._lines)
+        self._lines = []
+        self.stats["clean_chars"] = len(result)
+        return result
+
+    def _emit(self, line: str, terminated: bool = True) -> None:
+        line = line.rstrip("\r")
+        if self._held_row is not None:
+            held, self._held_row = self._held_row, None
+            if "|" in line and _TABLE_DELIMITER_RE.match(line):
+                self._append(held, terminated=True)  # header row of a table without outer pipes
+            else:
+                self.stats["nav_lines"] += 1
+        cleaned = self._clean_line(line)
+        if cleaned is not None:
+            self._append(cleaned, terminated)
+
+    def _append(self, cleaned: str, terminated: bool) -> None:
+        blank = not cleaned.strip()
+        if blank and self._previous_blank and not self._in_fence:
+            self.stats["blank_lines"] += 1
+            return
+        self._previous_blank = blank
+        self._lines.append(cleaned + "\n" if terminated else cleaned)
+
+    def _clean_line(self, line: str):
+        """Return the cleaned line, or None to drop it."""
+        original = line
+        if self._in_comment:
+            end = line.find("-->")
+            if end == -1:
+                return None
+            self._in_comment = False
+            line = line[end + 3:]
+
+        if _FENCE_RE.match(line):
+            self._in_fence = not self._in_fence
+            return line
+        if self._in_fence:
+            return line
+
+        if "<!--" in line:
+            line = self._strip_comments(line)
+        if "data:" in line:
+            line, md_images = _DATA_IMAGE_MD_RE.subn(r"![\1]()", line)
+            line, html_images = _DATA_IMAGE_HTML_RE.subn("", line)
+            self.stats["data_images"] += md_images + html_images
+        if "|" in line and _TABLE_DELIMITER_RE.match(line):
+            self._in_table = True
+            return line
+        if self._in_table:
+            if "|" in line:
+                return line
+            self._in_table = False
+        if "](" in line and (_SKIP_LINK_RE.match(line) or _is_nav_line(line)):
+            if "|" in line and not _SKIP_LINK_RE.match(line):
+                self._held_row = line
+                return None
+            self.stats["nav_lines"] += 1
+            return None
+
+        # A line emptied by the removals above disappears instead of leaving a gap
+        if line != original and original.strip() and not line.strip():
+            return None
+        return line
+
+    def _strip_comments(self, line: str) -> str:
+        parts = []
+        start = 0
+        while True:
+            opening = line.find("<!--", start)
+            if opening == -1:
+                parts.append(line[start:])
+                break
+            parts.append(line[start:opening])
+            self.stats["comments"] += 1
+            closing = line.find("-->", opening + 4)
+            if closing == -1:
+                self._in_comment = True
+                break
+            start = closing + 3
+        return "".join(parts)
+
+
+def _is_nav_line(line: str) -> bool:
+    links = _LINK_RE.findall(line)
+    if len(links) < NAV_MIN_LINKS:
+        return False
+    stripped = line.strip()
+    if stripped.startswith("|") and stripped.endswith("|"):
+        return False  # a table row
+    if "," in _LINK_RE.sub("", line):
+        return False  # links listed in a sentence
+    text = _NAV_SEPARATORS_RE.sub("", _LINK_RE.sub("", line))
+    return len(text) <= NAV_MAX_TEXT_RATIO * len(line.strip())
@@ -0,0 +1,218 @@
+"""
+Adaptive shared rate limiter
+----------------------------
+Client-side request budget for Bedrock shared by every concurrent orchestrator
+invocation through a DynamoDB table (hash key `limiter_id`).
+
+Two kinds of items per limiter:
+
+  {limiter_id}#config            — `rate`: current requests/second budget,
+                                   `last_decrease_at`: epoch seconds of the last cut
+  {limiter_id}#window#{epoch_s}  — `request_count`: requests admitted in that
+                                   one-second window (expires via TTL)
+
+acquire() admits a request with a single conditional atomic counter update
+(ADD request_count 1 IF request_count < floor(rate)); when the current window
+is full the caller sleeps until the next one.
+
+The rate adapts with AIMD: every success adds `increase_step` (capped at
+`max_rps`), every throttle multiplies it by `decrease_factor` (floored at
+`min_rps`). Throttles within `decrease_window_s` of the last cut are folded
+into it, so a burst of simultaneous throttles halves the budget once rather
+than N times. The decrease is also conditional on the rate it was computed
+from; when a concurrent success moved the rate, it is re-read and the cut is
+retried rather than dropped.
+"""
+
+import random
+import time
+from typing import Callable, Optional
+
+from botocore.exceptions import ClientError
+
+from etl_common.aws_clients import LazyClient
+
+# Window items only matter for the second they describe; keep them briefly for debugging
+WINDOW_TTL_SECONDS = 120
+
+# Conditional decrease attempts before giving up to a stream of concurrent successes
+DECREASE_ATTEMPTS = 5
+
+
+class AdaptiveRateLimiter:
+    """AIMD requests-per-second budget stored in DynamoDB and shared across Lambdas."""
+
+    def __init__(
+        self,
+        table_name: str,
+        limiter_id: str,
+        initial_rps: float = 2.0,
+        min_rps: float = 1.0,
+        max_rps: float = 20.0,
+        increase_step: float = 0.1,
+        decrease_factor: float = 0.5,
+        max_wait_s: float = 30.0,
+        rate_cache_s: float = 1.0,
+        decrease_window_s: float = 1.0,
+        client=None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.table_name = table_name
+        self.limiter_id = limiter_id
+        self.initial_rps = initial_rps
+        self.min_rps = min_rps
+        self.max_rps = max_rps
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.max_wait_s = max_wait_s
+        self.rate_cache_s = rate_cache_s
+        self.decrease_window_s = decrease_window_s
+        self.client = client or LazyClient("dynamodb")
+        self._clock = clock
+        self._sleep = sleep
+        self._rate: Optional[float] = None
+        self._rate_read_at = 0.0
+
+    @property
+    def _config_key(self) -> dict:
+        return {"limiter_id": {"S": f"{self.limiter_id}#config"}}
+
+    def acquire(self) -> float:
+        """
+        Block until the shared budget admits one request and return the seconds
+        waited. Gives up after max_wait_s and returns without a slot — the
+        caller's throttle retry remains the backstop, so work is never dropped.
+        """
+        start = self._clock()
+        while True:
+            now = self._clock()
+            window = int(now)
+            limit = max(1, int(self.current_rate()))
+            try:
+                self.client.update_item(
+                    TableName=self.table_name,
+                    Key={"limiter_id": {"S": f"{self.limiter_id}#window#{window}"}},
+                    UpdateExpression="ADD request_count :one SET expires_at = :expires_at",
+                    ConditionExpression="attribute_not_exists(request_count) OR request_count < :limit",
+                    ExpressionAttributeValues={
+                        ":one": {"N": "1"},
+                        ":limit": {"N": str(limit)},
+                        ":expires_at": {"N": str(window + WINDOW_TTL_SECONDS)},
+                    },
+                )
+                return self._clock() - start
+            except ClientError as exc:
+                if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+
+            waited = now - start
+            if waited >= self.max_wait_s:
+                return waited
+            # Window is full — wait for the next one, jittered so waiters don't stampede
+            self._sleep(window + 1 - now + random.uniform(0, 0.05))
+
+    def record_success(self) -> None:
+        """Additive increase: grow the shared budget by increase_step up to max_rps."""
+        try:
+            response = self.client.update_item(
+                TableName=self.table_name,
+                Key=self._config_key,
+                UpdateExpression="ADD rate :step",
+                ConditionExpression="attribute_exists(rate) AND rate < :max",
+                ExpressionAttributeValues={
+                    ":step": {"N": str(self.increase_step)},
+                    ":max": {"N": str(self.max_rps)},
+                },
+                ReturnValues="UPDATED_NEW",
+            )
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            return
+
+        # Cache the stored value, not a locally summed float (2.0 + 0.1 * 3 != 2.3) —
+        # record_throttle's condition compares against it exactly
+        self._rate = float(response["Attributes"]["rate"]["N"])
+        self._rate_read_at = self._clock()
+
+    def record_throttle(self) -> bool:
+        """
+        Multiplicative decrease: shrink the shared budget after a throttle.
+        Returns False when the throttle was folded into a decrease made within
+        decrease_window_s (by this or another invocation).
+        """
+        now = self._clock()
+        observed = self.current_rate()
+        for _ in range(DECREASE_ATTEMPTS):
+            reduced = round(max(self.min_rps, observed * self.decrease_factor), 3)
+            try:
+                self.client.update_item(
+                    TableName=self.table_name,
+                    Key=self._config_key,
+                    UpdateExpression="SET rate = :reduced, last_decrease_at = :now",
+                    ConditionExpression=(
+                        "rate = :observed AND "
+                        "(attribute_not_exists(last_decrease_at) OR last_decrease_at < :window_start)"
+                    ),
+                    ExpressionAttributeValues={
+                        ":reduced": {"N": str(reduced)},
+                        ":observed": {"N": str(observed)},
+                        ":now": {"N": str(now)},
+                        ":window_start": {"N": str(now - self.decrease_window_s)},
+                    },
+                )
+            except ClientError as exc:
+                if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                    raise
+            else:
+                self._rate = reduced
+                self._rate_read_at = self._clock()
+                return True
+
+            # Either a recent cut already covers this throttle, or a concurrent
+            # success moved the rate — re-read and retry the decrease on the new rate
+            item = self._read_config()
+            self._rate, self._rate_read_at = float(item["rate"]["N"]), self._clock()
+            if float(item.get("last_decrease_at", {}).get("N", "-inf")) >= now - self.decrease_window_s:
+                return False
+            observed = self._rate
+        return False
+
+    def current_rate(self) -> float:
+        """Return the shared rate, re-reading DynamoDB at most every rate_cache_s seconds."""
+        now = self._clock()
+        if self._rate is not None and now - self._rate_read_at < self.rate_cache_s:
+            return self._rate
+
+        item = self._read_config()
+        if item is None:
+            self._rate = self._initialise()
+        else:
+            self._rate = float(item["rate"]["N"])
+        self._rate_read_at = now
+        return self._rate
+
+    def _read_config(self) -> Optional[dict]:
+        return self.client.get_item(
+            TableName=self.table_name,
+            Key=self._config_key,
+            ConsistentRead=True,
+        ).get("Item")
+
+    def _initialise(self) -> float:
+        """Create the config item with initial_rps unless another invocation won the race."""
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item={**self._config_key, "rate": {"N": str(self.initial_rps)}},
+                ConditionExpression="attribute_not_exists(limiter_id)",
+            )
+        except ClientError as exc:
+            if exc.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                raise
+            response = self.client.get_item(
+                TableName=self.table_name, Key=self._config_key, ConsistentRead=True
+            )
+            return float(response["Item"]["rate"]["N"])
+        return self.initial_rps
@@ -0,0 +1,186 @@
+"""
+Unit tests for the rule-based boilerplate stripper.
+"""
+
+import unittest
+
+import boto3
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+import boilerplate
+
+REGION = "ap-southeast-1"
+TABLE = "test-boilerplate-blocks"
+
+ARTICLE = (
+    "# Deploying with Terraform\n"
+    "\n"
+    "Terraform keeps the [state](https://developer.hashicorp.com/terraform/language/state) of every "
+    "resource it manages, so a plan only shows what actually changed.\n"
+    "\n"
+    "```hcl\n"
+    "resource \"aws_s3_bucket\" \"raw\" {}\n"
+    "\n"
+    "# [link](/in/code) [kept](/too)\n"
+    "```\n"
+    "\n"
+    "Apply the plan once the diff looks right."
+)
+RELATED = "Related posts:\n- [Terraform modules](/modules)\n- [Remote state](/state)\n- [Workspaces](/ws)"
+FOOTER = "© 2024 Example Blog. All rights reserved."
+SUBSCRIBE = "Enjoyed this? Subscribe to our newsletter for more."
+
+
+def _page(*blocks: str) -> str:
+    return "\n\n".join(blocks)
+
+
+def _create_table():
+    boto3.client("dynamodb", region_name=REGION).create_table(
+        TableName=TABLE,
+        AttributeDefinitions=[
+            {"AttributeName": "site", "AttributeType": "S"},
+            {"AttributeName": "block_hash", "AttributeType": "S"},
+        ],
+        KeySchema=[
+            {"AttributeName": "site", "KeyType": "HASH"},
+            {"AttributeName": "block_hash", "KeyType": "RANGE"},
+        ],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+class TestStrip(unittest.TestCase):
+
+    def test_removes_link_dense_and_footer_blocks(self):
+        page = _page(ARTICLE, RELATED, SUBSCRIBE, FOOTER)
+
+        text, stats = boilerplate.strip(page)
+
+        assert text == ARTICLE
+        assert stats["link_dense"] == 1
+        assert stats["edge"] == 2
+        assert stats["input_bytes"] - stats["output_bytes"] == len(page.encode()) - len(ARTICLE.encode())
+
+    def test_keeps_prose_with_links_and_fenced_code(self):
+        text, stats = boilerplate.strip(ARTICLE)
+
+        assert text == ARTICLE
+        assert stats["output_bytes"] == stats["input_bytes"]
+
+    def test_footer_pattern_in_the_middle_of_the_page_is_kept(self):
+        middle = "Read the privacy policy of each provider before sending it data."
+        page = _page("# Title", "Intro paragraph.", middle, "More text.", "Even more.", "The end.")
+
+        text, _ = boilerplate.strip(page)
+
+        assert middle in text
+
+    def test_never_strips_a_page_to_nothing(self):
+        page = _page("# Links", RELATED, FOOTER)
+
+        text, stats = boilerplate.strip(page)
+
+        assert text == page
+        assert stats["link_dense"] == stats["edge"] == 0
+
+    def test_removes_one_line_menu_at_the_page_edge(self):
+        text, stats = boilerplate.strip(_page("# Hello", "This is test content.", "[nav menu](/) Home | About"))
+
+        assert text == _page("# Hello", "This is test content.")
+        assert stats["edge"] == 1
+
+    def test_keeps_pipe_separated_prose_and_tables(self):
+        prose = "Compare [Terraform](/tf) with Pulumi | the results surprised the whole team"
+        table = "| Tool | Link |\n|---|---|\n| [tf](/tf) | [pulumi](/p) |"
+        page = _page("# Tools", "Intro.", prose, table)
+
+        text, _ = boilerplate.strip(page)
+
+        assert text == page
+
+    def test_site_of_uses_the_filename_prefix(self):
+        assert boilerplate.site_of("example_com_20240401T120000.md") == "example_com"
+        assert boilerplate.site_of("archive/blog_dev_20240401T120000.md") == "blog_dev"
+        assert boilerplate.site_of("untitled.md") == ""
+
+    def test_page_of_drops_only_the_timestamp(self):
+        assert boilerplate.page_of("example_com_20240401T120000.md") == "example_com"
+        assert boilerplate.page_of("blog/post/example_com_20240402T120000.md") == "blog/post/example_com"
+        assert boilerplate.page_of("untitled.md") == "untitled"
+
+
+class TestRepeatedBlocks(unittest.TestCase):
+
+    @mock_aws
+    def test_block_seen_on_other_pages_of_the_site_is_removed(self):
+        _create_table()
+        store = boilerplate.RepeatedBlockStore(TABLE, client=boto3.client("dynamodb", region_name=REGION))
+        # Same sidebar blurb on every page; the year differs and is ignored
+        topics = ["Terraform", "Kubernetes", "Ansible", "Helm"]
+        pages = [
+            _page(f"# {topic}", f"Notes on {topic}.", f"Written by Jane, a DevOps engineer since {2010 + n}.")
+            for n, topic in enumerate(topics)
+        ]
+
+        results = [
+            boilerplate.strip(page, site="example_com", page_id=f"page-{n}", store=store, min_repeat_pages=3)
+            for n, page in enumerate(pages)
+        ]
+
+        assert [stats["repeated"] for _, stats in results] == [0, 0, 0, 1]
+        assert results[3][0] == _page("# Helm", "Notes on Helm.")
+        # Re-processing a page does not count it twice
+        _, stats = boilerplate.strip(pages[0], site="example_com", page_id="page-0", store=store, min_repeat_pages=3)
+        assert stats["repeated"] == 1
+        _, stats = boilerplate.strip(pages[0], site="other_site", page_id="page-0", store=store, min_repeat_pages=3)
+        assert stats["repeated"] == 0
+
+    @mock_aws
+    def test_rescrapes_of_one_page_are_not_repeats(self):
+        _create_table()
+        store = boilerplate.RepeatedBlockStore(TABLE, client=boto3.client("dynamodb", region_name=REGION))
+        page = _page("# Long article", *(f"Paragraph {n} of the article about topic {chr(97 + n)}." for n in range(25)))
+
+        for day in range(1, 6):
+            page_id = boilerplate.page_of(f"blog/example_com_2024040{day}T120000.md")
+            text, stats = boilerplate.strip(page, site="example_com", page_id=page_id, store=store, min_repeat_pages=3)
+            assert text == page
+            assert stats["repeated"] == 0
+
+    @mock_aws
+    def test_edited_revisions_of_one_page_keep_their_body(self):
+        _create_table()
+        store = boilerplate.RepeatedBlockStore(TABLE, client=boto3.client("dynamodb", region_name=REGION))
+        body = [f"Unchanged paragraph {chr(97 + n)} of the article." for n in range(5)]
+
+        for revision in range(4):
+            page = _page("# Article", *body, f"Edited line, revision {chr(97 + revision)}.")
+            page_id = boilerplate.page_of(f"blog/example_com_2024040{revision + 1}T120000.md")
+            text, stats = boilerplate.strip(page, site="example_com", page_id=page_id, store=store, min_repeat_pages=3)
+            assert text == page
+            assert stats["repeated"] == 0
+
+    @mock_aws
+    def test_body_paragraphs_shared_by_pages_are_not_candidates(self):
+        _create_table()
+        store = boilerplate.RepeatedBlockStore(TABLE, client=boto3.client("dynamodb", region_name=REGION))
+        quote = "A paragraph quoted in every post of the series, long enough to be real prose."
+
+        for n in range(5):
+            page = _page(f"# Part {n}", f"Intro to part {chr(97 + n)}.", quote, *(f"Part {chr(97 + n)} point {chr(97 + m)}." for m in range(6)))
+            text, stats = boilerplate.strip(page, site="example_com", page_id=f"part-{n}", store=store, min_repeat_pages=3)
+            assert quote in text
+            assert stats["repeated"] == 0
+
+    def test_store_errors_fail_open(self):
+        class FailingStore:
+            def page_counts(self, *args):
+                raise ClientError({"Error": {"Code": "ResourceNotFoundException", "Message": "gone"}}, "BatchGetItem")
+
+        page = _page(ARTICLE, "Written by Jane.")
+        text, stats = boilerplate.strip(page, site="example_com", page_id="p", store=FailingStore())
+
+        assert text == page
+        assert "repeat_error" in stats
@@ -0,0 +1,64 @@
+"""
+Unit tests for Markdown chunking used by large-document extraction.
+"""
+
+import unittest
+
+from chunking import CHARS_PER_TOKEN, estimate_tokens, split_markdown
+
+
+def _doc(sections: int, paragraph_chars: int = 200) -> str:
+    parts = []
+    for i in range(sections):
+        parts.append(f"## Section {i}\n\n{'w' * paragraph_chars}\n\n{'v' * paragraph_chars}\n\n")
+    return "# Title\n\n" + "".join(parts)
+
+
+class TestSplitMarkdown(unittest.TestCase):
+
+    def test_small_document_is_single_chunk(self):
+        text = _doc(2)
+        assert split_markdown(text, max_tokens=10_000) == [text]
+
+    def test_chunks_preserve_content_and_order(self):
+        text = _doc(20)
+        chunks = split_markdown(text, max_tokens=200)
+        assert len(chunks) > 1
+        assert "".join(chunks) == text
+
+    def test_chunks_respect_budget(self):
+        chunks = split_markdown(_doc(20), max_tokens=200)
+        assert all(len(c) <= 200 * CHARS_PER_TOKEN for c in chunks)
+
+    def test_splits_at_heading_boundaries(self):
+        chunks = split_markdown(_doc(20), max_tokens=200)
+        # Every chunk after the first starts at a heading when sections fit the budget
+        assert all(c.startswith("## Section") for c in chunks[1:])
+
+    def test_oversized_section_falls_back_to_paragraphs(self):
+        text = "## Big\n\n" + "\n\n".join("p" * 300 for _ in range(10)) + "\n"
+        chunks = split_markdown(text, max_tokens=100)
+        assert len(chunks) > 1
+        assert "".join(chunks) == text
+        assert all(len(c) <= 100 * CHARS_PER_TOKEN for c in chunks)
+
+    def test_oversized_line_is_hard_split(self):
+        text = "x" * 5000
+        chunks = split_markdown(text, max_tokens=100)
+        assert "".join(chunks) == text
+        assert all(len(c) <= 100 * CHARS_PER_TOKEN for c in chunks)
+
+    def test_does_not_split_at_headings_inside_code_fence(self):
+        fence = "```\n# not a heading\n" + "c" * 300 + "\n```\n"
+        text = "## A\n\n" + "a" * 300 + "\n\n" + fence + "## B\n\n" + "b" * 300 + "\n"
+        chunks = split_markdown(text, max_tokens=150)
+        assert not any(c.startswith("# not a heading") for c in chunks)
+        assert "".join(chunks) == text
+
+
+class TestEstimateTokens(unittest.TestCase):
+
+    def test_rounds_up(self):
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("abc") == 1
+        assert estimate_tokens("a" * (CHARS_PER_TOKEN * 3 + 1)) == 4
@@ -28,16 +28,21 @@ REGION = "ap-southeast-1"
 RAW_BUCKET = "test-raw-bucket"
 TEST_KEY = "example_com_20240401T120000.md"
 RAW_MARKDOWN = "# Hello\n\nThis is test content.\n\n[nav menu](/) Home | About"
+# What Bedrock receives: the trailing one-line menu is stripped as boilerplate
+ARTICLE_MARKDOWN = "# Hello\n\nThis is test content."
 
 
-def _make_event(bucket: str, key: str) -> dict:
-    return {
+def _make_event(bucket: str, key: str, size: int = None) -> dict:
+    event = {
         "id": "evt-123",
         "detail": {
             "bucket": {"name": bucket},
             "object": {"key": key},
         },
     }
+    if size is not None:
+        event["detail"]["object"]["size"] = size
+    return event
 
 
 def _make_context():
@@ -87,6 +92,67 @@ class TestFileSizeGuard(unittest.TestCase):
             result = handler(_make_event(RAW_BUCKET, TEST_KEY), _make_context())
             assert result["status"] == "ok"
 
+    def test_rejects_from_event_size_without_s3_call(self):
+        """detail.object.size lets the guard run before any S3 request."""
+        with patch("handler.s3_client") as mock_s3:
+            with pytest.raises(ValueError, match="File too large"):
+                handler(
+                    _make_event(RAW_BUCKET, TEST_KEY, size=MAX_FILE_BYTES + 1),
+                    _make_context(),
+                )
+        mock_s3.get_object.assert_not_called()
+
+    @mock_aws
+    def test_reads_with_single_get_and_no_head(self):
+        import handler as handler_module
+
+        s3 = boto3.client("s3", region_name=REGION)
+        s3.create_bucket(
+            Bucket=RAW_BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": REGION},
+        )
+        s3.put_object(Bucket=RAW_BUCKET, Key=TEST_KEY, Body=RAW_MARKDOWN.encode())
+
+        with patch("handler.bedrock_agent_runtime") as mock_bedrock, \
+             patch("handler.lambda_client") as mock_lambda, \
+             patch.object(handler_module.s3_client, "head_object") as mock_head:
+            mock_bedrock.invoke_agent.return_value = {
+                "completion": [{"chunk": {"bytes": b"# Clean"}}]
+            }
+            mock_lambda.invoke.return_value = {"StatusCode": 202}
+            handler(
+                _make_event(RAW_BUCKET, TEST_KEY, size=len(RAW_MARKDOWN)),
+                _make_context(),
+            )
+
+        mock_head.assert_not_called()
+        sent = mock_bedrock.invoke_agent.call_args.kwargs["inputText"]
+        assert sent == ARTICLE_MARKDOWN
+
+    @mock_aws
+    def test_bedrock_receives_precleaned_markdown(self):
+        from etl_common import metrics
+
+        s3 = boto3.client("s3", region_name=REGION)
+        s3.create_bucket(
+            Bucket=RAW_BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": REGION},
+        )
+        noisy = "[Home](/) | [Blog](/blog) | [About](/about)\n<!-- build 42 -->\n" + RAW_MARKDOWN
+        s3.put_object(Bucket=RAW_BUCKET, Key=TEST_KEY, Body=noisy.encode())
+
+        with metrics.capture() as sink, \
+             patch("handler.bedrock_agent_runtime") as mock_bedrock, \
+             patch("handler.lambda_client"):
+            mock_bedrock.invoke_agent.return_value = {
+                "completion": [{"chunk": {"bytes": b"# Clean"}}]
+            }
+            handler(_make_event(RAW_BUCKET, TEST_KEY), _make_context())
+
+        assert mock_bedrock.invoke_agent.call_args.kwargs["inputText"] == ARTICLE_MARKDOWN
+        assert sink.values("InputChars") == [len(noisy)]
+        assert sink.values("PrecleanRemovedChars") == [len(noisy) - len(RAW_MARKDOWN)]
+
 
 # ---------------------------------------------------------------------------
 # Happy path
@@ -186,3 +252,575 @@ class TestBedrockRetry(unittest.TestCase):
                 handler(_make_event(RAW_BUCKET, TEST_KEY), _make_context())
 
         assert mock_bedrock.invoke_agent.call_count == 3  # max_retries
+
+
+# ---------------------------------------------------------------------------
+# Batch mode (SQS event source, partial batch failures)
+# ---------------------------------------------------------------------------
+
+def _make_sqs_event(keys: list) -> dict:
+    return {
+        "Records": [
+            {
+                "messageId": f"msg-{i}",
+                "body": json.dumps({**_make_event(RAW_BUCKET, key), "id": f"evt-{i}"}),
+            }
+            for i, key in enumerate(keys)
+        ]
+    }
+
+
+class TestBatchMode(unittest.TestCase):
+
+    @mock_aws
+    def test_processes_all_records_in_batch(self):
+        s3 = boto3.client("s3", region_name=REGION)
+        s3.create_bucket(
+            Bucket=RAW_BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": REGION},
+        )
+        keys = [f"site_{i}_20240401T120000.md" for i in range(5)]
+        for key in keys:
+            s3.put_object(Bucket=RAW_BUCKET, Key=key, Body=RAW_MARKDOWN.encode())
+
+        with patch("handler.bedrock_agent_runtime") as mock_bedrock, \
+             patch("handler.lambda_client") as mock_lambda:
+            mock_bedrock.invoke_agent.side_effect = lambda **_: {
+                "completion": [{"chunk": {"bytes": b"# Clean"}}]
+            }
+            mock_lambda.invoke.return_value = {"StatusCode": 202}
+
+            result = handler(_make_sqs_event(keys), _make_context())
+
+        assert result == {"batchItemFailures": []}
+        assert mock_lambda.invoke.call_count == 5
+
+        # Each record keeps its own EventBridge event ID as correlation ID
+        correlation_ids = {
+            json.loads(c.kwargs["Payload"])["correlation_id"]
+            for c in mock_lambda.invoke.call_args_list
+        }
+        assert correlation_ids == {f"evt-{i}" for i in range(5)}
+
+    @mock_aws
+    def test_reports_only_failed_records(self):
+        s3 = boto3.client("s3", region_name=REGION)
+        s3.create_bucket(
+            Bucket=RAW_BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": REGION},
+        )
+        s3.put_object(Bucket=RAW_BUCKET, Key=TEST_KEY, Body=RAW_MARKDOWN.encode())
+        s3.put_object(Bucket=RAW_BUCKET, Key="too_big_20240401T120000.md",
+                      Body=b"x" * (MAX_FILE_BYTES + 1))
+
+        event = _make_sqs_event([TEST_KEY, "too_big_20240401T120000.md", "missing.md"])
+        event["Records"].append({"messageId": "msg-bad", "body": "not json"})
+
+        with patch("handler.bedrock_agent_runtime") as mock_bedrock, \
+             patch("handler.lambda_client") as mock_lambda:
+            mock_bedrock.invoke_agent.return_value = {
+                "completion": [{"chunk": {"bytes": b"# Clean"}}]
+            }
+            mock_lambda.invoke.return_value = {"StatusCode": 202}
+
+            result = handler(event, _make_context())
+
+        failed = sorted(f["itemIdentifier"] for f in result["batchItemFailures"])
+        assert failed == ["msg-1", "msg-2", "msg-bad"]
+        assert mock_lambda.invoke.call_count == 1
+
+    def test_empty_batch_returns_no_failures(self):
+        assert handler({"Records": []}, _make_context()) == {"batchItemFailures": []}
+
+
+# ---------------------------------------------------------------------------
+# Content-addressed extraction cache
+# ---------------------------------------------------------------------------
+
+CACHE_TABLE = "test-extraction-cache"
+
+
+def _setup_cache_table():
+    dynamodb = boto3.client("dynamodb", region_name=REGION)
+    dynamodb.create_table(
+        TableName=CACHE_TABLE,
+        AttributeDefinitions=[{"AttributeName": "cache_key", "AttributeType": "S"}],
+        KeySchema=[{"AttributeName": "cache_key", "KeyType": "HASH"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    return dynamodb
+
+
+class TestExtractionCache(unittest.TestCase):
+
+    def _run(self, key: str):
+        with patch("handler.bedrock_agent_runtime") as mock_bedrock, \
+             patch("handler.lambda_client") as mock_lambda, \
+             patch("handler.EXTRACTION_CACHE_TABLE", CACHE_TABLE):
+            mock_bedrock.invoke_agent.return_value = {
+                "completion": [{"chunk": {"bytes": b"# Clean"}}]
+            }
+            mock_lambda.invoke.return_value = {"StatusCode": 202}
+            result = handler(_make_event(RAW_BUCKET, key), _make_context())
+        return result, mock_bedrock, mock_lambda
+
+    @mock_aws
+    def test_duplicate_content_skips_bedrock(self):
+        s3 = boto3.client("s3", region_name=REGION)
+        s3.create_bucket(
+            Bucket=RAW_BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": REGION},
+        )
+        _setup_cache_table()
+        s3.put_object(Bucket=RAW_BUCKET, Key="a_20240401T120000.md", Body=RAW_MARKDOWN.encode())
+        s3.put_object(Bucket=RAW_BUCKET, Key="b_20240402T120000.md", Body=RAW_MARKDOWN.encode())
+
+        first, bedrock1, _ = self._run("a_20240401T120000.md")
+        second, bedrock2, lambda2 = self._run("b_20240402T120000.md")
+
+        assert first["extraction_cache"] == "miss"
+        assert bedrock1.invoke_agent.call_count == 1
+        assert second["extraction_cache"] == "hit"
+        assert bedrock2.invoke_agent.call_count == 0
+
+        payload = json.loads(lambda2.invoke.call_args.kwargs["Payload"])
+        assert payload["clean_content"] == "# Clean"
+        assert payload["source_key"] == "b_20240402T120000.md"
+
+    @mock_aws
+    def test_expired_entry_is_a_miss(self):
+        import extraction_cache
+
+        _setup_cache_table()
+        key = extraction_cache.cache_key(RAW_MARKDOWN, "agent", "alias", "model")
+        extraction_cache.store(CACHE_TABLE, key, "# Clean", "model", ttl_seconds=-1)
+
+        assert extraction_cache.lookup(CACHE_TABLE, key) is None
+
+    def test_key_depends_on_model_and_content(self):
+        import extraction_cache
+
+        base = extraction_cache.cache_key(RAW_MARKDOWN, "agent", "alias", "model-a")
+        assert base == extraction_cache.cache_key(RAW_MARKDOWN, "agent", "alias", "model-a")
+        assert base != extraction_cache.cache_key(RAW_MARKDOWN, "agent", "alias", "model-b")
+        assert base != extraction_cache.cache_key(RAW_MARKDOWN + " ", "agent", "alias", "model-a")
+
+    @mock_aws
+    def test_cache_errors_fall_back_to_bedrock(self):
+        """A missing cache table must not fail the pipeline."""
+        s3 = boto3.client("s3", region_name=REGION)
+        s3.create_bucket(
+            Bucket=RAW_BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": REGION},
+        )
+        s3.put_object(Bucket=RAW_BUCKET, Key=TEST_KEY, Body=RAW_MARKDOWN.encode())
+
+        result, mock_bedrock, mock_lambda = self._run(TEST_KEY)
+
+        assert result["status"] == "ok"
+        assert mock_bedrock.invoke_agent.call_count == 1
+        assert mock_lambda.invoke.call_count == 1
+
+
+# ---------------------------------------------------------------------------
+# Streaming completions to an S3 staging object (schema 1.1)
+# ---------------------------------------------------------------------------
+
+STAGING_BUCKET = "test-clean-bucket"
+
+
+class TestCompletionStaging(unittest.TestCase):
+
+    @mock_aws
+    def test_loader_receives_pointer_to_staged_completion(self):
+        s3 = boto3.client("s3", region_name=REGION)
+        for bucket in (RAW_BUCKET, STAGING_BUCKET):
+            s3.create_bucket(
+                Bucket=bucket,
+                CreateBucketConfiguration={"LocationConstraint": REGION},
+            )
+        s3.put_object(Bucket=RAW_BUCKET, Key=TEST_KEY, Body=RAW_MARKDOWN.encode())
+
+        with patch("handler.bedrock_agent_runtime") as mock_bedrock, \
+             patch("handler.lambda_client") as mock_lambda, \
+             patch("handler.COMPLETION_STAGING_BUCKET", STAGING_BUCKET):
+            mock_bedrock.invoke_agent.return_value = {
+                "completion": [
+                    {"chunk": {"bytes": b"# Hello\n\n"}},
+                    {"chunk": {"bytes": "Caf\u00e9 content.".encode()}},
+                ]
+            }
+            mock_lambda.invoke.return_value = {"StatusCode": 202}
+            handler(_make_event(RAW_BUCKET, TEST_KEY), _make_context())
+
+        payload = json.loads(mock_lambda.invoke.call_args.kwargs["Payload"])
+        assert payload["schema_version"] == "1.1"
+        assert "clean_content" not in payload
+
+        ref = payload["clean_content_s3"]
+        assert ref["bucket"] == STAGING_BUCKET
+        assert ref["key"].startswith("staging/")
+        body = s3.get_object(Bucket=ref["bucket"], Key=ref["key"])["Body"].read()
+        assert body.decode() == "# Hello\n\nCaf\u00e9 content."
+
+    @mock_aws
+    def test_large_completion_uses_multipart_upload(self):
+        import completion_sink
+
+        s3 = boto3.client("s3", region_name=REGION)
+        s3.create_bucket(
+            Bucket=STAGING_BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": REGION},
+        )
+        part = b"a" * (5 * 1024 * 1024)
+        sink = completion_sink.S3StagingCompletion(s3, STAGING_BUCKET, "staging/big.md",
+                                                   part_size=len(part))
+        sink.write(part)
+        sink.write(b"tail")
+
+        assert sink.buffered_text() is None  # spilled — not cacheable
+        ref = sink.close()
+
+        head = s3.head_object(Bucket=STAGING_BUCKET, Key="staging/big.md")
+        assert head["ContentLength"] == len(part) + 4
+        assert ref["size_bytes"] == len(part) + 4
+        assert head["ETag"].strip('"').endswith("-2")
+
+    @mock_aws
+    def test_throttled_stream_is_reset_before_retry(self):
+        import completion_sink
+        from botocore.exceptions import ClientError
+
+        s3 = boto3.client("s3", region_name=REGION)
+        s3.create_bucket(
+            Bucket=STAGING_BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": REGION},
+        )
+        throttle_error = ClientError(
+            {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}},
+            "InvokeAgent",
+        )
+
+        def _partial_then_throttle():
+            yield {"chunk": {"bytes": b"partial "}}
+            raise throttle_error
+
+        sink = completion_sink.S3StagingCompletion(s3, STAGING_BUCKET, "staging/retry.md")
+        with patch("handler.bedrock_agent_runtime") as mock_bedrock, \
+             patch("handler.time.sleep"):
+            mock_bedrock.invoke_agent.side_effect = [
+                {"completion": _partial_then_throttle()},
+                {"completion": [{"chunk": {"bytes": b"complete"}}]},
+            ]
+            from handler import _invoke_agent_with_retry
+            _invoke_agent_with_retry(RAW_MARKDOWN, "evt-1", lambda *a, **k: None, sink)
+
+        assert sink.buffered_text() == "complete"
+
+
+# ---------------------------------------------------------------------------
+# Large-document mode (chunked, parallel extraction)
+# ---------------------------------------------------------------------------
+
+class TestLargeDocumentMode(unittest.TestCase):
+
+    @mock_aws
+    def test_large_file_is_chunked_and_stitched_in_order(self):
+        s3 = boto3.client("s3", region_name=REGION)
+        s3.create_bucket(
+            Bucket=RAW_BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": REGION},
+        )
+        sections = [f"## Part {i}\n\n" + "body " * 40 + "\n\n" for i in range(6)]
+        large_doc = "".join(sections)
+        s3.put_object(Bucket=RAW_BUCKET, Key=TEST_KEY, Body=large_doc.encode())
+
+        def fake_agent(**kwargs):
+            first_line = kwargs["inputText"].splitlines()[0]
+            return {"completion": [{"chunk": {"bytes": f"{first_line} extracted\n".encode()}}]}
+
+        with patch("handler.bedrock_agent_runtime") as mock_bedrock, \
+             patch("handler.lambda_client") as mock_lambda, \
+             patch("handler.MAX_FILE_BYTES", 300), \
+             patch("handler.LARGE_DOC_MAX_BYTES", 10_000), \
+             patch("handler.CHUNK_MAX_TOKENS", 60):
+            mock_bedrock.invoke_agent.side_effect = fake_agent
+            mock_lambda.invoke.return_value = {"StatusCode": 202}
+            result = handler(_make_event(RAW_BUCKET, TEST_KEY), _make_context())
+
+        assert result["status"] == "ok"
+        assert mock_bedrock.invoke_agent.call_count == 6
+
+        session_ids = {c.kwargs["sessionId"] for c in mock_bedrock.invoke_agent.call_args_list}
+        assert len(session_ids) == 6  # one session per chunk
+
+        payload = json.loads(mock_lambda.invoke.call_args.kwargs["Payload"])
+        expected = "\n\n".join(f"## Part {i} extracted" for i in range(6))
+        assert payload["clean_content"] == expected
+
+    @mock_aws
+    def test_rejects_above_large_document_limit(self):
+        s3 = boto3.client("s3", region_name=REGION)
+        s3.create_bucket(
+            Bucket=RAW_BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": REGION},
+        )
+        s3.put_object(Bucket=RAW_BUCKET, Key=TEST_KEY, Body=b"x" * 2_001)
+
+        with patch("handler.MAX_FILE_BYTES", 300), \
+             patch("handler.LARGE_DOC_MAX_BYTES", 2_000):
+            with pytest.raises(ValueError, match="max 2000"):
+                handler(_make_event(RAW_BUCKET, TEST_KEY), _make_context())
+
+
+# ---------------------------------------------------------------------------
+# EMF metrics (etl_common.metrics)
+# ---------------------------------------------------------------------------
+
+class TestMetrics(unittest.TestCase):
+
+    def _create_raw_object(self):
+        s3 = boto3.client("s3", region_name=REGION)
+        s3.create_bucket(
+            Bucket=RAW_BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": REGION},
+        )
+        s3.put_object(Bucket=RAW_BUCKET, Key=TEST_KEY, Body=RAW_MARKDOWN.encode())
+
+    @mock_aws
+    def test_emits_stage_metrics_keyed_by_correlation_id(self):
+        from botocore.exceptions import ClientError
+        from etl_common import metrics
+
+        self._create_raw_object()
+        throttle = ClientError({"Error": {"Code": "ThrottlingException", "Message": "slow"}}, "InvokeAgent")
+
+        with metrics.capture() as sink, \
+             patch("handler.bedrock_agent_runtime") as mock_bedrock, \
+             patch("handler.lambda_client") as mock_lambda, \
+             patch("handler.time.sleep"):
+            mock_bedrock.invoke_agent.side_effect = [
+                throttle,
+                {"completion": [{"chunk": {"bytes": b"# Clean"}}]},
+            ]
+            handler(_make_event(RAW_BUCKET, TEST_KEY), _make_context())
+
+        [doc] = sink.documents
+        assert doc["Function"] == "orchestrator"
+        assert doc["correlation_id"] == "evt-123"
+        assert doc["InputChars"] == len(RAW_MARKDOWN)
+        assert doc["OutputChars"] == len("# Clean")
+        assert doc["EstimatedInputTokens"] > 0
+        assert doc["BedrockCalls"] == 2
+        assert doc["BedrockRetries"] == 1
+        for name in ("S3ReadMs", "BedrockMs", "ExtractionMs", "OrchestratorMs"):
+            assert name in doc
+
+        payload = json.loads(mock_lambda.invoke.call_args.kwargs["Payload"])
+        assert isinstance(payload["pipeline_start_ms"], int)
+
+    def test_failed_event_still_emits_error_metric(self):
+        from etl_common import metrics
+
+        with metrics.capture() as sink, patch("handler.s3_client"):
+            with pytest.raises(ValueError):
+                handler(_make_event(RAW_BUCKET, TEST_KEY, size=MAX_FILE_BYTES + 1), _make_context())
+
+        assert sink.values("OrchestratorErrors") == [1]
+
+
+# ---------------------------------------------------------------------------
+# Boilerplate stripping and tiny-page model skip
+# ---------------------------------------------------------------------------
+
+class TestBoilerplateStripping(unittest.TestCase):
+
+    def _create_raw_object(self, body: str):
+        s3 = boto3.client("s3", region_name=REGION)
+        s3.create_bucket(
+            Bucket=RAW_BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": REGION},
+        )
+        s3.put_object(Bucket=RAW_BUCKET, Key=TEST_KEY, Body=body.encode())
+
+    @mock_aws
+    def test_bedrock_does_not_receive_footer_blocks(self):
+        from etl_common import metrics
+
+        footer = "\n\n© 2024 Example. All rights reserved. [Privacy policy](/privacy)"
+        self._create_raw_object(RAW_MARKDOWN + footer)
+
+        with metrics.capture() as sink, \
+             patch("handler.bedrock_agent_runtime") as mock_bedrock, \
+             patch("handler.lambda_client"):
+            mock_bedrock.invoke_agent.return_value = {
+                "completion": [{"chunk": {"bytes": b"# Clean"}}]
+            }
+            handler(_make_event(RAW_BUCKET, TEST_KEY), _make_context())
+
+        assert mock_bedrock.invoke_agent.call_args.kwargs["inputText"] == ARTICLE_MARKDOWN
+        assert sink.values("BoilerplateRemovedBytes") == [len((RAW_MARKDOWN + footer).encode()) - len(ARTICLE_MARKDOWN)]
+        assert sink.values("ModelSkipped") == [0]
+
+    @mock_aws
+    def test_rescraped_page_is_not_stripped_as_repeated(self):
+        import boilerplate
+
+        table = "test-boilerplate-blocks"
+        boto3.client("dynamodb", region_name=REGION).create_table(
+            TableName=table,
+            AttributeDefinitions=[
+                {"AttributeName": "site", "AttributeType": "S"},
+                {"AttributeName": "block_hash", "AttributeType": "S"},
+            ],
+            KeySchema=[
+                {"AttributeName": "site", "KeyType": "HASH"},
+                {"AttributeName": "block_hash", "KeyType": "RANGE"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        self._create_raw_object(RAW_MARKDOWN)
+        page = "\n\n".join(["# Long article"] + [f"Paragraph {n} about topic {chr(97 + n)}." for n in range(25)])
+        s3 = boto3.client("s3", region_name=REGION)
+        store = boilerplate.RepeatedBlockStore(table, client=boto3.client("dynamodb", region_name=REGION))
+
+        sent = []
+        with patch("handler.boilerplate_store", store), \
+             patch("handler.bedrock_agent_runtime") as mock_bedrock, \
+             patch("handler.lambda_client"):
+            mock_bedrock.invoke_agent.return_value = {"completion": [{"chunk": {"bytes": b"# Clean"}}]}
+            # The same article scraped five times lands under five timestamped keys
+            for day in range(1, 6):
+                key = f"example_com_2024040{day}T120000.md"
+                s3.put_object(Bucket=RAW_BUCKET, Key=key, Body=page.encode())
+                handler(_make_event(RAW_BUCKET, key), _make_context())
+                sent.append(mock_bedrock.invoke_agent.call_args.kwargs["inputText"])
+
+        assert sent == [page] * 5
+
+    @mock_aws
+    def test_edited_revisions_keep_their_body(self):
+        import boilerplate
+
+        table = "test-boilerplate-blocks"
+        boto3.client("dynamodb", region_name=REGION).create_table(
+            TableName=table,
+            AttributeDefinitions=[
+                {"AttributeName": "site", "AttributeType": "S"},
+                {"AttributeName": "block_hash", "AttributeType": "S"},
+            ],
+            KeySchema=[
+                {"AttributeName": "site", "KeyType": "HASH"},
+                {"AttributeName": "block_hash", "KeyType": "RANGE"},
+            ],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        self._create_raw_object(RAW_MARKDOWN)
+        body = [f"Unchanged paragraph {chr(97 + n)} of the article." for n in range(5)]
+        s3 = boto3.client("s3", region_name=REGION)
+        store = boilerplate.RepeatedBlockStore(table, client=boto3.client("dynamodb", region_name=REGION))
+
+        pages, sent = [], []
+        with patch("handler.boilerplate_store", store), \
+             patch("handler.bedrock_agent_runtime") as mock_bedrock, \
+             patch("handler.lambda_client"):
+            mock_bedrock.invoke_agent.return_value = {"completion": [{"chunk": {"bytes": b"# Clean"}}]}
+            # Four edited revisions of one article, each under its own timestamped key
+            for day in range(1, 5):
+                pages.append("\n\n".join(["# Article"] + body + [f"Edited line, revision {chr(96 + day)}."]))
+                key = f"blog/example_com_2024040{day}T120000.md"
+                s3.put_object(Bucket=RAW_BUCKET, Key=key, Body=pages[-1].encode())
+                handler(_make_event(RAW_BUCKET, key), _make_context())
+                sent.append(mock_bedrock.invoke_agent.call_args.kwargs["inputText"])
+
+        assert sent == pages
+
+    @mock_aws
+    def test_tiny_page_skips_bedrock(self):
+        from etl_common import metrics
+
+        self._create_raw_object(RAW_MARKDOWN)
+
+        with metrics.capture() as sink, \
+             patch("handler.MODEL_MIN_WORDS", 50), \
+             patch("handler.bedrock_agent_runtime") as mock_bedrock, \
+             patch("handler.lambda_client") as mock_lambda:
+            result = handler(_make_event(RAW_BUCKET, TEST_KEY), _make_context())
+
+        mock_bedrock.invoke_agent.assert_not_called()
+        assert result["extraction_cache"] == "skipped"
+        payload = json.loads(mock_lambda.invoke.call_args.kwargs["Payload"])
+        assert payload["clean_content"] == ARTICLE_MARKDOWN
+        assert payload["extraction_model"] == "rule-based"
+        assert sink.values("ModelSkipped") == [1]
+        assert sink.values("BedrockMs") == []
+
+
+# ---------------------------------------------------------------------------
+# Loader hand-off modes (LOADER_HANDOFF_MODE)
+# ---------------------------------------------------------------------------
+
+class TestLoaderHandoff(unittest.TestCase):
+
+    def _create_raw_object(self):
+        s3 = boto3.client("s3", region_name=REGION)
+        s3.create_bucket(
+            Bucket=RAW_BUCKET,
+            CreateBucketConfiguration={"LocationConstraint": REGION},
+        )
+        s3.put_object(Bucket=RAW_BUCKET, Key=TEST_KEY, Body=RAW_MARKDOWN.encode())
+
+    @mock_aws
+    def test_inline_mode_runs_the_loader_in_process(self):
+        from pathlib import Path
+
+        self._create_raw_object()
+        boto3.client("s3", region_name=REGION).create_bucket(
+            Bucket="test-clean-bucket",
+            CreateBucketConfiguration={"LocationConstraint": REGION},
+        )
+        dynamodb = boto3.client("dynamodb", region_name=REGION)
+        dynamodb.create_table(
+            TableName="test-article-metadata",
+            AttributeDefinitions=[{"AttributeName": "article_id", "AttributeType": "S"}],
+            KeySchema=[{"AttributeName": "article_id", "KeyType": "HASH"}],
+            BillingMode="PAY_PER_REQUEST",
+        )
+        loader_dir = str(Path(__file__).resolve().parents[2] / "loader")
+
+        with patch("handler.LOADER_HANDOFF_MODE", "inline"), \
+             patch("loader_library.LOADER_SOURCE_DIR", loader_dir), \
+             patch.dict(os.environ, {"CLEAN_BUCKET_NAME": "test-clean-bucket",
+                                     "DYNAMODB_TABLE_NAME": "test-article-metadata"}), \
+             patch("handler.bedrock_agent_runtime") as mock_bedrock, \
+             patch("handler.lambda_client") as mock_lambda:
+            mock_bedrock.invoke_agent.return_value = {
+                "completion": [{"chunk": {"bytes": b"# Hello\n\nClean body."}}]
+            }
+            result = handler(_make_event(RAW_BUCKET, TEST_KEY), _make_context())
+
+        assert result["loader_handoff"] == "inline"
+        mock_lambda.invoke.assert_not_called()
+        [item] = dynamodb.scan(TableName="test-article-metadata")["Items"]
+        assert item["title"] == {"S": "Hello"}
+
+    @mock_aws
+    def test_sqs_mode_queues_the_payload(self):
+        self._create_raw_object()
+        sqs = boto3.client("sqs", region_name=REGION)
+        queue_url = sqs.create_queue(QueueName="test-loader-queue")["QueueUrl"]
+
+        with patch("handler.LOADER_HANDOFF_MODE", "sqs"), \
+             patch("handler.LOADER_QUEUE_URL", queue_url), \
+             patch("handler.bedrock_agent_runtime") as mock_bedrock, \
+             patch("handler.lambda_client") as mock_lambda:
+            mock_bedrock.invoke_agent.return_value = {
+                "completion": [{"chunk": {"bytes": b"# Clean"}}]
+            }
+            handler(_make_event(RAW_BUCKET, TEST_KEY), _make_context())
+
+        mock_lambda.invoke.assert_not_called()
+        [message] = sqs.receive_message(QueueUrl=queue_url)["Messages"]
+        payload = json.loads(message["Body"])
+        assert payload["schema_version"] == "1.0"
+        assert payload["clean_content"] == "# Clean"
@@ -0,0 +1,96 @@
+"""
+Unit tests for the streaming read and pre-cleaning of raw Markdown.
+"""
+
+import unittest
+from io import BytesIO
+
+from preclean import read_markdown
+
+DOC = (
+    "# Title\n"
+    "\n"
+    "[Home](/) | [Docs](/docs) | [Blog](/blog) | [About](/about)\n"
+    "[Skip to content](#main)\n"
+    "\n"
+    "Intro <!-- tracking --> text about café ✓.\n"
+    "<!-- a comment\n"
+    "spanning lines -->\n"
+    "\n"
+    "\n"
+    "![diagram](data:image/png;base64,iVBORw0KGgo=) See [the docs](/docs).\n"
+    "```html\n"
+    "<!-- kept inside code -->\n"
+    "\n"
+    "\n"
+    "```\n"
+    "End"
+)
+
+
+class TestReadMarkdown(unittest.TestCase):
+
+    def test_strips_comments_data_images_and_navigation(self):
+        text, bytes_read, stats = read_markdown(BytesIO(DOC.encode()), max_bytes=10_000)
+
+        assert text == (
+            "# Title\n"
+            "\n"
+            "Intro  text about café ✓.\n"
+            "\n"
+            "![diagram]() See [the docs](/docs).\n"
+            "```html\n"
+            "<!-- kept inside code -->\n"
+            "\n"
+            "\n"
+            "```\n"
+            "End"
+        )
+        assert bytes_read == len(DOC.encode())
+        assert stats["comments"] == 2
+        assert stats["data_images"] == 1
+        assert stats["nav_lines"] == 2
+        assert stats["raw_chars"] == len(DOC)
+
+    def test_result_does_not_depend_on_chunk_boundaries(self):
+        # 1-byte chunks split every multi-byte character and every line
+        expected, _, _ = read_markdown(BytesIO(DOC.encode()), max_bytes=10_000)
+        for chunk_bytes in (1, 2, 3, 5, 17):
+            text, _, _ = read_markdown(BytesIO(DOC.encode()), max_bytes=10_000, chunk_bytes=chunk_bytes)
+            assert text == expected
+
+    def test_disabled_cleaning_returns_the_document_unchanged(self):
+        text, _, stats = read_markdown(BytesIO(DOC.encode()), max_bytes=10_000, clean=False, chunk_bytes=3)
+        assert text == DOC
+        assert stats["clean_chars"] == len(DOC)
+
+    def test_link_tables_and_link_lists_survive(self):
+        doc = (
+            "| Tool | Docs | Source |\n"
+            "|------|------|--------|\n"
+            "| [Terraform](/tf) | [docs](/tf/docs) | [repo](/tf/src) |\n"
+            "\n"
+            "[Helm](/helm) | [docs](/helm/docs) | [repo](/helm/src)\n"
+            ":--- | :---: | ---:\n"
+            "[Argo](/argo) | [docs](/argo/docs) | [repo](/argo/src)\n"
+            "\n"
+            "See [Terraform](/tf), [Helm](/helm), [Argo](/argo).\n"
+            "[Home](/) | [Docs](/docs) | [Blog](/blog)\n"
+            "End"
+        )
+
+        for chunk_bytes in (1, 7, 64 * 1024):
+            text, _, stats = read_markdown(BytesIO(doc.encode()), max_bytes=10_000, chunk_bytes=chunk_bytes)
+
+            assert text == doc.replace("[Home](/) | [Docs](/docs) | [Blog](/blog)\n", "")
+            assert stats["nav_lines"] == 1
+
+    def test_stops_one_byte_past_the_limit(self):
+        body = BytesIO(b"x" * 1_000)
+        text, bytes_read, _ = read_markdown(body, max_bytes=100, chunk_bytes=64)
+        assert text is None
+        assert bytes_read == 101
+
+    def test_invalid_utf8_raises(self):
+        with self.assertRaises(UnicodeDecodeError):
+            read_markdown(BytesIO("café".encode()[:-1]), max_bytes=100)
@@ -0,0 +1,244 @@
+"""
+Unit tests for the DynamoDB-backed adaptive rate limiter.
+Uses moto to mock DynamoDB — no real AWS calls.
+"""
+
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+import boto3
+from moto import mock_aws
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-southeast-1")
+
+from rate_limiter import AdaptiveRateLimiter  # noqa: E402
+
+REGION = "ap-southeast-1"
+LIMITER_TABLE = "test-rate-limiter"
+
+
+class FakeClock:
+    """Deterministic clock; sleep() advances time instead of blocking."""
+
+    def __init__(self, start: float = 1_700_000_000.0):
+        self.now = start
+        self.slept = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def _setup_table():
+    dynamodb = boto3.client("dynamodb", region_name=REGION)
+    dynamodb.create_table(
+        TableName=LIMITER_TABLE,
+        AttributeDefinitions=[{"AttributeName": "limiter_id", "AttributeType": "S"}],
+        KeySchema=[{"AttributeName": "limiter_id", "KeyType": "HASH"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    return dynamodb
+
+
+def _limiter(clock: FakeClock, **kwargs) -> AdaptiveRateLimiter:
+    params = dict(initial_rps=2.0, min_rps=1.0, max_rps=3.0, increase_step=0.5, rate_cache_s=0)
+    params.update(kwargs)
+    return AdaptiveRateLimiter(
+        LIMITER_TABLE,
+        "bedrock",
+        client=boto3.client("dynamodb", region_name=REGION),
+        clock=clock.time,
+        sleep=clock.sleep,
+        **params,
+    )
+
+
+class TestAcquire(unittest.TestCase):
+
+    @mock_aws
+    def test_admits_up_to_rate_per_window_without_waiting(self):
+        _setup_table()
+        clock = FakeClock()
+        limiter = _limiter(clock)
+
+        assert limiter.acquire() == 0
+        assert limiter.acquire() == 0
+        assert clock.slept == []
+
+    @mock_aws
+    def test_waits_for_next_window_when_budget_spent(self):
+        _setup_table()
+        clock = FakeClock()
+        limiter = _limiter(clock)
+
+        limiter.acquire()
+        limiter.acquire()
+        waited = limiter.acquire()  # third request in a 2 rps window
+
+        assert len(clock.slept) == 1
+        assert 1.0 <= waited < 1.1
+
+    @mock_aws
+    def test_budget_is_shared_between_instances(self):
+        """Two orchestrator invocations draw from the same DynamoDB window counter."""
+        _setup_table()
+        clock = FakeClock()
+        first, second = _limiter(clock), _limiter(clock)
+
+        first.acquire()
+        second.acquire()
+        second.acquire()
+
+        assert len(clock.slept) == 1
+
+    @mock_aws
+    def test_gives_up_after_max_wait(self):
+        """With no wait allowance a full window returns immediately (fail open)."""
+        _setup_table()
+        clock = FakeClock()
+        limiter = _limiter(clock, initial_rps=1.0, max_wait_s=0)
+
+        limiter.acquire()
+        limiter.acquire()
+
+        assert clock.slept == []
+
+
+class TestAimd(unittest.TestCase):
+
+    @mock_aws
+    def test_success_increases_rate_up_to_max(self):
+        _setup_table()
+        limiter = _limiter(FakeClock())
+
+        assert limiter.current_rate() == 2.0
+        limiter.record_success()
+        assert limiter.current_rate() == 2.5
+        for _ in range(5):
+            limiter.record_success()
+        assert limiter.current_rate() == 3.0
+
+    @mock_aws
+    def test_throttle_halves_rate_down_to_min(self):
+        _setup_table()
+        clock = FakeClock()
+        limiter = _limiter(clock, initial_rps=3.0)
+
+        limiter.record_throttle()
+        assert limiter.current_rate() == 1.5
+        clock.now += 2  # past decrease_window_s, so the next throttle is a new cut
+        limiter.record_throttle()
+        assert limiter.current_rate() == 1.0
+        clock.now += 2
+        limiter.record_throttle()
+        assert limiter.current_rate() == 1.0
+
+    @mock_aws
+    def test_throttle_after_successes_applies_to_the_cached_rate(self):
+        """Cached rate after ADD steps must match the stored number exactly."""
+        _setup_table()
+        limiter = _limiter(FakeClock(), max_rps=20.0, increase_step=0.1, rate_cache_s=60)
+        assert limiter.current_rate() == 2.0
+
+        for _ in range(3):
+            limiter.record_success()
+        assert limiter.record_throttle() is True
+
+        assert _limiter(FakeClock()).current_rate() == 1.15
+
+    @mock_aws
+    def test_concurrent_throttles_halve_once(self):
+        """Invocations that observed the same rate only apply one decrease."""
+        _setup_table()
+        clock = FakeClock()
+        first = _limiter(clock, initial_rps=3.0, rate_cache_s=60)
+        second = _limiter(clock, initial_rps=3.0, rate_cache_s=60)
+        first.current_rate()
+        second.current_rate()
+
+        assert first.record_throttle() is True
+        assert second.record_throttle() is False  # stale observation — condition fails
+
+        assert _limiter(clock).current_rate() == 1.5
+
+    @mock_aws
+    def test_throttle_is_retried_after_a_concurrent_success(self):
+        """A success landing between reading the rate and the decrease must not drop the cut."""
+        _setup_table()
+        clock = FakeClock()
+        throttled = _limiter(clock, initial_rps=8.0, max_rps=20.0, increase_step=0.1, rate_cache_s=60)
+        other = _limiter(clock, initial_rps=8.0, max_rps=20.0, increase_step=0.1)
+        assert throttled.current_rate() == 8.0  # cached for rate_cache_s
+
+        other.record_success()
+        assert throttled.record_throttle() is True
+
+        assert _limiter(clock).current_rate() == 4.05
+
+    @mock_aws
+    def test_throttles_after_the_window_cut_again(self):
+        _setup_table()
+        clock = FakeClock()
+        first = _limiter(clock, initial_rps=8.0, max_rps=20.0)
+        second = _limiter(clock, initial_rps=8.0, max_rps=20.0)
+
+        assert first.record_throttle() is True
+        clock.now += 0.5
+        assert second.record_throttle() is False  # folded into the first cut
+        clock.now += 1
+        assert second.record_throttle() is True
+
+        assert _limiter(clock).current_rate() == 2.0
+
+
+class TestHandlerIntegration(unittest.TestCase):
+
+    def test_throttle_and_success_feed_the_limiter(self):
+        from botocore.exceptions import ClientError
+
+        os.environ.setdefault("BEDROCK_AGENT_ID", "test-agent-id")
+        os.environ.setdefault("BEDROCK_AGENT_ALIAS_ID", "test-alias-id")
+        import handler
+        from completion_sink import BufferedCompletion
+
+        throttle_error = ClientError(
+            {"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}},
+            "InvokeAgent",
+        )
+        limiter = MagicMock()
+        limiter.acquire.return_value = 0
+
+        with patch("handler.bedrock_agent_runtime") as mock_bedrock, \
+             patch("handler.bedrock_rate_limiter", limiter), \
+             patch("handler.time.sleep"):
+            mock_bedrock.invoke_agent.side_effect = [
+                throttle_error,
+                {"completion": [{"chunk": {"bytes": b"ok"}}]},
+            ]
+            sink = BufferedCompletion()
+            handler._invoke_agent_with_retry("# Doc", "evt-1", lambda *a, **k: None, sink)
+
+        assert limiter.acquire.call_count == 2
+        limiter.record_throttle.assert_called_once()
+        limiter.record_success.assert_called_once()
+        assert sink.buffered_text() == "ok"
+
+    def test_decrease_is_only_logged_when_applied(self):
+        os.environ.setdefault("BEDROCK_AGENT_ID", "test-agent-id")
+        os.environ.setdefault("BEDROCK_AGENT_ALIAS_ID", "test-alias-id")
+        import handler
+
+        limiter = MagicMock()
+        log = MagicMock()
+        with patch("handler.bedrock_rate_limiter", limiter):
+            limiter.record_throttle.return_value = False
+            handler._record_bedrock_outcome(True, log)
+            log.assert_not_called()
+
+            limiter.record_throttle.return_value = True
+            handler._record_bedrock_outcome(True, log)
+            assert log.call_args.args[0] == "Rate limiter decreased"
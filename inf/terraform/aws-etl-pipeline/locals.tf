@@ -12,6 +12,9 @@ locals {
 
   name_prefix = "${var.project}-${var.environment}"
 
+  # CloudWatch namespace for the EMF metrics written by the Lambdas
+  metrics_namespace = "ETLPipeline/${local.name_prefix}"
+
   # Bedrock model ARN for IAM policy scoping
   bedrock_model_arn = "arn:aws:bedrock:${var.aws_region}::foundation-model/${var.bedrock_model_id}"
 }
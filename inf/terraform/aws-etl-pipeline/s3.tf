@@ -189,6 +189,28 @@ resource "aws_s3_bucket_lifecycle_configuration" "etl_clean" {
       days_after_initiation = 3
     }
   }
+
+  # Staged Bedrock completions are only read by the loader (incl. its async retries)
+  rule {
+    id     = "expire-completion-staging"
+    status = "Enabled"
+
+    filter {
+      prefix = "staging/"
+    }
+
+    expiration {
+      days = 1
+    }
+
+    noncurrent_version_expiration {
+      noncurrent_days = 1
+    }
+
+    abort_incomplete_multipart_upload {
+      days_after_initiation = 1
+    }
+  }
 }
 
 # Athena query results land here — kept separate from article content via prefix
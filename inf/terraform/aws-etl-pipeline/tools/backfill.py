@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+ETL backfill / replay
+---------------------
+Re-drives the ETL pipeline over every raw Markdown object under an S3 prefix
+without re-uploading files or replaying EventBridge events. Each object is fed
+to the orchestrator handler as a synthetic `Object Created` event; the loader
+runs either in-process (--loader local, default — the orchestrator's
+LOADER_HANDOFF_MODE=inline) or as the deployed Lambda (--loader lambda, the
+orchestrator's normal async invoke).
+
+Flow:
+  1. List the prefix with paginated ListObjectsV2 (StartAfter = checkpoint)
+  2. Submit objects to a thread or process pool, at most 4 × --workers in flight
+  3. After every completion advance the checkpoint watermark — the last key
+     below which every listed object has finished — and persist it atomically
+     to the --state file every --checkpoint-every completions
+  4. Print progress and the final files/second rate
+
+Interrupted runs resume from the watermark: only objects that were in flight
+are processed again, which is safe because the loader is idempotent and skips
+unchanged content. Failed keys are kept in the state file and retried with
+--retry-failed; a key leaves the failed list only once its retry succeeds.
+
+Usage:
+  python tools/backfill.py --bucket my-raw-bucket --prefix 2026/ --workers 8
+  python tools/backfill.py --bucket my-raw-bucket --state .backfill.json --retry-failed
+
+Environment: the same variables the Lambdas read (BEDROCK_AGENT_ID,
+BEDROCK_AGENT_ALIAS_ID, BEDROCK_MODEL_ID, CLEAN_BUCKET_NAME,
+DYNAMODB_TABLE_NAME, ...) plus LOADER_FUNCTION_NAME for --loader lambda.
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+import uuid
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from pathlib import Path
+from types import SimpleNamespace
+
+import boto3
+
+LAMBDA_SRC = Path(__file__).resolve().parent.parent / "lambda_src"
+
+# Pipeline loaded once per process (the main process for threads, each worker for processes)
+_pipeline = None
+
+
+def load_pipeline(loader_mode: str = "local") -> SimpleNamespace:
+    """
+    Import the orchestrator and loader handlers side by side. Both modules are
+    named handler.py, so the orchestrator is loaded under its own name with its
+    Lambda directory on sys.path, and the loader through the orchestrator's
+    loader_library (as in LOADER_HANDOFF_MODE=inline), plus the shared layer.
+    """
+    common_dir = str(LAMBDA_SRC / "common" / "python")  # etl-common layer (/opt/python)
+    if common_dir not in sys.path:
+        sys.path.insert(0, common_dir)
+
+    # Read by the orchestrator at import: inline runs the loader as a library
+    os.environ["LOADER_HANDOFF_MODE"] = "inline" if loader_mode == "local" else "lambda"
+
+    source_dir = LAMBDA_SRC / "orchestrator"
+    if str(source_dir) not in sys.path:
+        sys.path.insert(0, str(source_dir))
+    spec = importlib.util.spec_from_file_location("etl_orchestrator_handler", source_dir / "handler.py")
+    orchestrator = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(orchestrator)
+
+    # The same module instance the orchestrator calls in inline mode
+    loader = orchestrator.loader_library.load_module(str(LAMBDA_SRC / "loader"))
+    return SimpleNamespace(orchestrator=orchestrator, loader=loader)
+
+
+def _context(request_id: str) -> SimpleNamespace:
+    return SimpleNamespace(aws_request_id=request_id)
+
+
+def _init_worker(loader_mode: str) -> None:
+    global _pipeline
+    _pipeline = load_pipeline(loader_mode)
+
+
+def process_object(bucket: str, key: str, size: int) -> tuple:
+    """Run one object through orchestrator (+ loader). Returns (key, error or None)."""
+    event_id = f"backfill-{uuid.uuid4()}"
+    event = {
+        "id": event_id,
+        "source": "etl.backfill",
+        "detail-type": "Object Created",
+        "detail": {"bucket": {"name": bucket}, "object": {"key": key, "size": size}},
+    }
+    try:
+        _pipeline.orchestrator.handler(event, _context(event_id))
+    except Exception as exc:  # report every failure per key; the run continues
+        return key, f"{type(exc).__name__}: {exc}"
+    return key, None
+
+
+def list_objects(s3_client, bucket: str, prefix: str, start_after: str = "", suffix: str = ".md"):
+    """Yield (key, size) for every object under prefix, in key order, after start_after."""
+    paginator = s3_client.get_paginator("list_objects_v2")
+    kwargs = {"Bucket": bucket, "Prefix": prefix}
+    if start_after:
+        kwargs["StartAfter"] = start_after
+    for page in paginator.paginate(**kwargs):
+        for obj in page.get("Contents", []):
+            if obj["Key"].endswith(suffix):
+                yield obj["Key"], obj["Size"]
+
+
+def read_state(path: Path, bucket: str, prefix: str) -> dict:
+    """Load the checkpoint for bucket/prefix, or a fresh one."""
+    fresh = {"bucket": bucket, "prefix": prefix, "watermark": "", "processed": 0, "failed": {}}
+    if not path.exists():
+        return fresh
+    state = json.loads(path.read_text())
+    if state.get("bucket") != bucket or state.get("prefix") != prefix:
+        raise ValueError(
+            f"State file {path} belongs to s3://{state.get('bucket')}/{state.get('prefix')} — "
+            "use a different --state file or delete it"
+        )
+    return state
+
+
+def write_state(path: Path, state: dict) -> None:
+    """Persist the checkpoint atomically (write + rename) so a crash never truncates it."""
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(state, indent=2, sort_keys=True))
+    os.replace(tmp, path)
+
+
+def run_backfill(
+    bucket: str,
+    prefix: str = "",
+    state_path: Path = Path(".backfill-state.json"),
+    workers: int = 8,
+    pool: str = "thread",
+    loader_mode: str = "local",
+    retry_failed: bool = False,
+    checkpoint_every: int = 25,
+    progress=print,
+    s3_client=None,
+) -> dict:
+    """Backfill every .md object under s3://bucket/prefix; return the run summary."""
+    global _pipeline
+    s3_client = s3_client or boto3.client("s3")
+    state = read_state(state_path, bucket, prefix)
+
+    # Retried keys stay in state["failed"] until drain() sees them succeed, so an
+    # interrupted retry run leaves the unfinished ones for the next --retry-failed
+    to_retry = sorted(state["failed"]) if retry_failed else []
+
+    if pool == "process":
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(loader_mode,))
+    else:
+        _pipeline = load_pipeline(loader_mode)
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+    max_in_flight = workers * 4
+    listed_order = deque()  # keys from the listing, in key order, not yet behind the watermark
+    completed = set()
+    in_flight = set()
+    processed = failed = 0
+    since_checkpoint = 0
+    start = time.monotonic()
+
+    def drain() -> None:
+        nonlocal processed, failed, since_checkpoint
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            in_flight.discard(future)
+            if future.cancelled():
+                continue  # never started — re-listed on resume
+            key, error = future.result()
+            processed += 1
+            if error is None:
+                state["failed"].pop(key, None)
+            else:
+                failed += 1
+                state["failed"][key] = error
+                progress(f"FAILED {key}: {error}")
+            completed.add(key)
+
+        # The watermark only moves past a key once every earlier listed key is done
+        while listed_order and listed_order[0] in completed:
+            key = listed_order.popleft()
+            completed.discard(key)
+            state["watermark"] = key
+
+        since_checkpoint += len(done)
+        if since_checkpoint >= checkpoint_every:
+            checkpoint()
+
+    def checkpoint() -> None:
+        nonlocal since_checkpoint
+        state["processed"] += since_checkpoint
+        since_checkpoint = 0
+        write_state(state_path, state)
+        elapsed = max(time.monotonic() - start, 1e-9)
+        progress(
+            f"{processed} files ({failed} failed) in {elapsed:.1f}s — "
+            f"{processed / elapsed:.2f} files/s, checkpoint {state['watermark']!r}"
+        )
+
+    def submit(key: str, size: int) -> None:
+        while len(in_flight) >= max_in_flight:
+            drain()
+        in_flight.add(executor.submit(process_object, bucket, key, size))
+
+    try:
+        # Retried keys sit behind the watermark, so they are not tracked in listed_order
+        for key in to_retry:
+            submit(key, s3_client.head_object(Bucket=bucket, Key=key)["ContentLength"])
+
+        for key, size in list_objects(s3_client, bucket, prefix, state["watermark"]):
+            listed_order.append(key)
+            submit(key, size)
+
+        while in_flight:
+            drain()
+    finally:
+        # On interruption keep whatever finished; in-flight keys are re-run on resume
+        executor.shutdown(wait=True, cancel_futures=True)
+        while in_flight:
+            drain()
+        checkpoint()
+
+    elapsed = time.monotonic() - start
+    return {
+        "processed": processed,
+        "failed": failed,
+        "elapsed_s": round(elapsed, 3),
+        "files_per_second": round(processed / elapsed, 2) if elapsed else 0.0,
+        "watermark": state["watermark"],
+    }
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Re-drive the ETL pipeline over a raw-bucket prefix with checkpointing",
+    )
+    parser.add_argument("--bucket", required=True, help="Raw bucket holding the .md files")
+    parser.add_argument("--prefix", default="", help="Key prefix to backfill (default: whole bucket)")
+    parser.add_argument("--state", type=Path, default=Path(".backfill-state.json"), help="Checkpoint file")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent objects (default: 8)")
+    parser.add_argument("--pool", choices=["thread", "process"], default="thread",
+                        help="Worker pool type (default: thread — the work is I/O-bound)")
+    parser.add_argument("--loader", choices=["local", "lambda"], default="local",
+                        help="Run the loader in-process or invoke the deployed loader Lambda")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry keys recorded as failed")
+    parser.add_argument("--checkpoint-every", type=int, default=25, help="Completions between checkpoints")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    summary = run_backfill(
+        bucket=args.bucket,
+        prefix=args.prefix,
+        state_path=args.state,
+        workers=args.workers,
+        pool=args.pool,
+        loader_mode=args.loader,
+        retry_failed=args.retry_failed,
+        checkpoint_every=args.checkpoint_every,
+    )
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+ETL Lambda cold-init benchmark
+------------------------------
+Measures what a Lambda cold start pays before the first event is handled:
+importing handler.py in a fresh interpreter (the INIT phase) and then creating
+every AWS client the module uses (paid at INIT for eagerly built clients, on
+the first invocation for lazy ones). Each sample runs in a new Python process
+so nothing is cached between runs; results are medians.
+
+Compare the working tree with an earlier revision:
+  python tools/bench_cold_start.py                  # working tree only
+  python tools/bench_cold_start.py --ref HEAD~1     # working tree vs HEAD~1
+  python tools/bench_cold_start.py --runs 30 --function loader
+
+No AWS access is needed — clients are created with dummy credentials and never
+send a request.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+from io import BytesIO
+from pathlib import Path
+
+MODULE_DIR = Path(__file__).resolve().parent.parent
+FUNCTIONS = ("orchestrator", "loader")
+
+# Runs inside the fresh interpreter: import the handler, then resolve its clients
+_PROBE = r"""
+import json, resource, sys, time
+start = time.perf_counter()
+import handler
+init_ms = (time.perf_counter() - start) * 1000
+
+start = time.perf_counter()
+try:
+    from etl_common import aws_clients
+except ImportError:  # revisions before the etl_common layer build clients at import
+    aws_clients = None
+if aws_clients is not None:
+    for value in list(vars(handler).values()):
+        if isinstance(value, aws_clients.LazyClient):
+            aws_clients.client(value.service_name)
+clients_ms = (time.perf_counter() - start) * 1000
+
+print(json.dumps({
+    "init_ms": init_ms,
+    "clients_ms": clients_ms,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+}))
+"""
+
+_ENV = {
+    "AWS_DEFAULT_REGION": "ap-southeast-1",
+    "AWS_ACCESS_KEY_ID": "bench",
+    "AWS_SECRET_ACCESS_KEY": "bench",
+    "BEDROCK_AGENT_ID": "bench-agent",
+    "BEDROCK_AGENT_ALIAS_ID": "bench-alias",
+    "BEDROCK_MODEL_ID": "bench-model",
+    "LOADER_FUNCTION_NAME": "bench-loader",
+    "CLEAN_BUCKET_NAME": "bench-clean",
+    "DYNAMODB_TABLE_NAME": "bench-table",
+}
+
+
+def sample(lambda_src: Path, function: str) -> dict:
+    """Cold-import one handler in a fresh interpreter and return its timings."""
+    python_path = os.pathsep.join([str(lambda_src / function), str(lambda_src / "common" / "python")])
+    env = {**os.environ, **_ENV, "PYTHONPATH": python_path, "PYTHONDONTWRITEBYTECODE": "1"}
+    result = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=lambda_src / function,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def benchmark(lambda_src: Path, function: str, runs: int) -> dict:
+    """Median init, client-creation and peak RSS over `runs` cold imports."""
+    # One discarded run warms the OS page cache, as a reused Lambda host would be
+    sample(lambda_src, function)
+    samples = [sample(lambda_src, function) for _ in range(runs)]
+    medians = {name: statistics.median(s[name] for s in samples) for name in samples[0]}
+    medians["total_ms"] = medians["init_ms"] + medians["clients_ms"]
+    return {name: round(value, 1) for name, value in medians.items()}
+
+
+def extract_revision(ref: str, target: Path) -> Path:
+    """Extract lambda_src as of a git revision into target and return its path."""
+    def git(*args) -> str:
+        return subprocess.run(
+            ["git", *args], cwd=MODULE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    top_level, prefix = git("rev-parse", "--show-toplevel"), git("rev-parse", "--show-prefix")
+    archive = subprocess.run(
+        ["git", "archive", "--format=tar", f"{ref}:{prefix}lambda_src"],
+        cwd=top_level,
+        capture_output=True,
+        check=True,
+    ).stdout
+    with tarfile.open(fileobj=BytesIO(archive)) as tar:
+        tar.extractall(target)
+    return target
+
+
+def _print_table(rows: list) -> None:
+    header = f"{'function':<14}{'tree':<14}{'init_ms':>10}{'clients_ms':>12}{'total_ms':>10}{'max_rss_mb':>12}"
+    print(header)
+    print("-" * len(header))
+    for function, tree, result in rows:
+        print(
+            f"{function:<14}{tree:<14}{result['init_ms']:>10}{result['clients_ms']:>12}"
+            f"{result['total_ms']:>10}{result['max_rss_mb']:>12}"
+        )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark ETL Lambda cold-init time")
+    parser.add_argument("--runs", type=int, default=15, help="Cold imports per measurement (default: 15)")
+    parser.add_argument("--function", choices=FUNCTIONS, action="append", help="Limit to one function")
+    parser.add_argument("--ref", help="Git revision to compare against the working tree")
+    args = parser.parse_args(argv)
+
+    trees = [("working", MODULE_DIR / "lambda_src")]
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.ref:
+            trees.insert(0, (args.ref, extract_revision(args.ref, Path(tmp))))
+
+        rows = [
+            (function, name, benchmark(path, function, args.runs))
+            for function in args.function or FUNCTIONS
+            for name, path in trees
+        ]
+    _print_table(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,431 @@
+#!/usr/bin/env python3
+"""
+ETL pipeline load-test / benchmark
+----------------------------------
+Drives the real orchestrator and loader handlers end to end against moto with
+a fake Bedrock agent, so handler performance regressions show up before
+deploy. No AWS access is needed.
+
+Flow:
+  1. Synthesise --files Markdown documents whose sizes follow a log-normal
+     distribution (--size-median-kb, --size-sigma, capped at --size-max-kb)
+     and upload them to a moto raw bucket
+  2. Replace InvokeAgent with FakeBedrockAgent: log-normal time to first byte
+     plus a per-KB streaming cost, and ThrottlingException both at random
+     (--throttle-rate) and whenever more than --bedrock-capacity calls are
+     in flight (a concurrency quota)
+  3. Run the orchestrator on --concurrency threads, one event per invocation
+     or SQS-style batches (--batch-size), handing off to the loader inline or
+     through a moto loader queue drained afterwards (--handoff sqs)
+  4. Collect the handlers' EMF metrics in memory and report throughput,
+     p50/p90/p99 per stage and peak RSS
+
+Absolute numbers include moto's in-process overhead; compare runs of the same
+configuration rather than against production latencies:
+
+  python tools/bench_pipeline.py --files 500 --json-out bench.json
+  python tools/bench_pipeline.py --files 500 --baseline bench.json   # exit 1 on regression
+
+Orchestrator retry backoff sleeps for real, so a high throttle rate mostly
+measures the backoff policy.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import boto3
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+REGION = "ap-southeast-1"
+RAW_BUCKET = "bench-raw-bucket"
+CLEAN_BUCKET = "bench-clean-bucket"
+DYNAMO_TABLE = "bench-article-metadata"
+
+_ENV = {
+    "AWS_DEFAULT_REGION": REGION,
+    "AWS_ACCESS_KEY_ID": "bench",
+    "AWS_SECRET_ACCESS_KEY": "bench",
+    "BEDROCK_AGENT_ID": "bench-agent",
+    "BEDROCK_AGENT_ALIAS_ID": "bench-alias",
+    "BEDROCK_MODEL_ID": "bench-model",
+    "CLEAN_BUCKET_NAME": CLEAN_BUCKET,
+    "DYNAMODB_TABLE_NAME": DYNAMO_TABLE,
+}
+
+# (Function dimension, metric) pairs reported as per-stage percentiles
+STAGES = (
+    ("orchestrator", "S3ReadMs"),
+    ("orchestrator", "BedrockMs"),
+    ("orchestrator", "ExtractionMs"),
+    ("orchestrator", "LoaderHandoffMs"),
+    ("orchestrator", "OrchestratorMs"),
+    ("loader", "LoaderWriteMs"),
+    ("loader", "TotalPipelineMs"),
+)
+
+_WORDS = (
+    "pipeline lambda bedrock extraction markdown article content source bucket "
+    "latency throughput partition metadata schema loader orchestrator cache "
+    "request response stream chunk heading paragraph table record window"
+).split()
+
+
+def synthesise_markdown(rng: random.Random, target_bytes: int) -> str:
+    """Build a Markdown document of roughly target_bytes with headings, prose, lists, links and code."""
+    parts = [f"# {' '.join(rng.choices(_WORDS, k=4)).title()}\n\n"]
+    size = len(parts[0])
+    section = 0
+    while size < target_bytes:
+        kind = rng.random()
+        if kind < 0.1:
+            section += 1
+            block = f"## Section {section}: {' '.join(rng.choices(_WORDS, k=3))}\n\n"
+        elif kind < 0.2:
+            block = "".join(f"- {' '.join(rng.choices(_WORDS, k=6))}\n" for _ in range(rng.randint(2, 6))) + "\n"
+        elif kind < 0.27:
+            block = "```python\n" + "".join(
+                f"value_{i} = compute({rng.randint(0, 999)})\n" for i in range(rng.randint(2, 8))
+            ) + "```\n\n"
+        elif kind < 0.35:
+            block = f"[{' '.join(rng.choices(_WORDS, k=2))}](https://example.com/{rng.choice(_WORDS)}) | " \
+                    f"[Home](/) | [About](/about)\n\n"
+        else:
+            block = " ".join(rng.choices(_WORDS, k=rng.randint(30, 90))).capitalize() + ".\n\n"
+        parts.append(block)
+        size += len(block)
+    return "".join(parts)
+
+
+def sample_sizes(rng: random.Random, files: int, median_kb: float, sigma: float, max_kb: float) -> list:
+    """Log-normal document sizes in bytes (median median_kb), clipped to [256 B, max_kb]."""
+    return [
+        int(min(max(rng.lognormvariate(math.log(median_kb * 1024), sigma), 256), max_kb * 1024))
+        for _ in range(files)
+    ]
+
+
+class FakeBedrockAgent:
+    """
+    Stands in for bedrock-agent-runtime. invoke_agent sleeps for a modelled
+    latency and streams back the first output_ratio of the input, or raises
+    ThrottlingException at random and above `capacity` concurrent calls.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float = 800.0,
+        latency_sigma: float = 0.4,
+        ms_per_kb: float = 2.0,
+        throttle_rate: float = 0.0,
+        capacity: int = 0,
+        output_ratio: float = 0.7,
+        seed: int = 0,
+    ):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.ms_per_kb = ms_per_kb
+        self.throttle_rate = throttle_rate
+        self.capacity = capacity
+        self.output_ratio = output_ratio
+        self.calls = 0
+        self.throttles = 0
+        self._in_flight = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def invoke_agent(self, inputText: str, **kwargs) -> dict:
+        with self._lock:
+            self.calls += 1
+            throttled = self._rng.random() < self.throttle_rate or (
+                self.capacity and self._in_flight >= self.capacity
+            )
+            if throttled:
+                self.throttles += 1
+            else:
+                self._in_flight += 1
+            first_byte_ms = self._rng.lognormvariate(math.log(max(self.latency_ms, 1e-3)), self.latency_sigma)
+
+        if throttled:
+            raise ClientError({"Error": {"Code": "ThrottlingException", "Message": "Rate exceeded"}}, "InvokeAgent")
+
+        try:
+            output = inputText[: int(len(inputText) * self.output_ratio)].encode("utf-8")
+            time.sleep((first_byte_ms + self.ms_per_kb * len(output) / 1024) / 1000)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        return {"completion": [{"chunk": {"bytes": output[i:i + 4096]}} for i in range(0, len(output), 4096)]}
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile (0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return float(ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)])
+
+
+def _setup_aws(documents: list, handoff: str) -> str:
+    """Create the moto buckets, table and (sqs hand-off) loader queue; upload the documents."""
+    s3 = boto3.client("s3", region_name=REGION)
+    for bucket in (RAW_BUCKET, CLEAN_BUCKET):
+        s3.create_bucket(Bucket=bucket, CreateBucketConfiguration={"LocationConstraint": REGION})
+    for key, body in documents:
+        s3.put_object(Bucket=RAW_BUCKET, Key=key, Body=body)
+
+    boto3.client("dynamodb", region_name=REGION).create_table(
+        TableName=DYNAMO_TABLE,
+        AttributeDefinitions=[{"AttributeName": "article_id", "AttributeType": "S"}],
+        KeySchema=[{"AttributeName": "article_id", "KeyType": "HASH"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+    if handoff == "sqs":
+        return boto3.client("sqs", region_name=REGION).create_queue(QueueName="bench-loader-handoff")["QueueUrl"]
+    return ""
+
+
+def _context(request_id: str) -> SimpleNamespace:
+    return SimpleNamespace(aws_request_id=request_id)
+
+
+def _event(index: int, key: str, size: int) -> dict:
+    return {
+        "id": f"bench-{index:06d}",
+        "source": "etl.bench",
+        "detail-type": "Object Created",
+        "detail": {"bucket": {"name": RAW_BUCKET}, "object": {"key": key, "size": size}},
+    }
+
+
+def _drain_loader_queue(loader, queue_url: str, concurrency: int) -> int:
+    """Feed the loader queue to the loader's SQS handler in batches of 10; return failed records."""
+    sqs = boto3.client("sqs", region_name=REGION)
+    batches = []
+    while True:
+        messages = sqs.receive_message(QueueUrl=queue_url, MaxNumberOfMessages=10).get("Messages", [])
+        if not messages:
+            break
+        batches.append([{"messageId": m["MessageId"], "body": m["Body"]} for m in messages])
+        sqs.delete_message_batch(
+            QueueUrl=queue_url,
+            Entries=[{"Id": str(i), "ReceiptHandle": m["ReceiptHandle"]} for i, m in enumerate(messages)],
+        )
+
+    def load(records):
+        context = _context(f"bench-loader-{records[0]['messageId']}")
+        return len(loader.handler({"Records": records}, context)["batchItemFailures"])
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return sum(pool.map(load, batches))
+
+
+@patch.dict(os.environ, _ENV)  # moto-only resources and credentials, restored afterwards
+def run_benchmark(
+    files: int = 200,
+    size_median_kb: float = 6.0,
+    size_sigma: float = 0.9,
+    size_max_kb: float = 190.0,
+    concurrency: int = 8,
+    batch_size: int = 0,
+    handoff: str = "inline",
+    bedrock: FakeBedrockAgent = None,
+    seed: int = 1,
+) -> dict:
+    """Run the pipeline over synthetic documents under moto and return the report."""
+    from backfill import load_pipeline
+
+    pipeline = load_pipeline("local")  # orchestrator with the inline loader hand-off
+    from etl_common import metrics  # on sys.path once the pipeline is loaded
+
+    rng = random.Random(seed)
+    sizes = sample_sizes(rng, files, size_median_kb, size_sigma, size_max_kb)
+    documents = [
+        (f"bench/site{i:06d}_20260101T000000.md", synthesise_markdown(rng, size).encode("utf-8"))
+        for i, size in enumerate(sizes)
+    ]
+    bedrock = bedrock or FakeBedrockAgent(seed=seed)
+
+    with mock_aws(), metrics.capture() as sink:
+        queue_url = _setup_aws(documents, handoff)
+        pipeline.orchestrator.bedrock_agent_runtime = bedrock
+        if handoff == "sqs":
+            pipeline.orchestrator.LOADER_HANDOFF_MODE = "sqs"
+            pipeline.orchestrator.LOADER_QUEUE_URL = queue_url
+        rss_before_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        events = [_event(i, key, len(body)) for i, (key, body) in enumerate(documents)]
+
+        def run_single(event) -> int:
+            try:
+                pipeline.orchestrator.handler(event, _context(event["id"]))
+            except Exception:  # counted as a failure; the benchmark keeps going
+                return 1
+            return 0
+
+        def run_batch(batch) -> int:
+            records = [{"messageId": e["id"], "body": json.dumps(e)} for e in batch]
+            result = pipeline.orchestrator.handler({"Records": records}, _context(batch[0]["id"]))
+            return len(result["batchItemFailures"])
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            if batch_size:
+                batches = [events[i:i + batch_size] for i in range(0, len(events), batch_size)]
+                failed = sum(pool.map(run_batch, batches))
+            else:
+                failed = sum(pool.map(run_single, events))
+        if handoff == "sqs":
+            failed += _drain_loader_queue(pipeline.loader, queue_url, concurrency)
+        wall_s = time.perf_counter() - start
+
+    report = {
+        "config": {
+            "files": files,
+            "total_mb": round(sum(sizes) / 1024 / 1024, 2),
+            "size_median_kb": size_median_kb,
+            "size_sigma": size_sigma,
+            "size_max_kb": size_max_kb,
+            "concurrency": concurrency,
+            "batch_size": batch_size,
+            "handoff": handoff,
+            "bedrock_latency_ms": bedrock.latency_ms,
+            "throttle_rate": bedrock.throttle_rate,
+            "bedrock_capacity": bedrock.capacity,
+            "seed": seed,
+        },
+        "wall_s": round(wall_s, 3),
+        "files_per_second": round(files / wall_s, 2) if wall_s else 0.0,
+        "failed": failed,
+        "bedrock_calls": bedrock.calls,
+        "bedrock_throttles": bedrock.throttles,
+        "stages": {},
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "rss_before_run_mb": round(rss_before_mb, 1),
+    }
+    for function, name in STAGES:
+        values = sink.values(name, function)
+        report["stages"][name] = {
+            "count": len(values),
+            "p50": percentile(values, 50),
+            "p90": percentile(values, 90),
+            "p99": percentile(values, 99),
+            "max": max(values, default=0.0),
+        }
+    return report
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> list:
+    """
+    Describe every throughput drop or stage p50 increase beyond max_regression
+    (a fraction), and any difference in configuration between the two runs.
+    """
+    regressions = [
+        f"config {name} {baseline['config'].get(name)!r} → {value!r} (compare like with like)"
+        for name, value in report["config"].items()
+        if baseline.get("config", {}).get(name) != value
+    ]
+    if report["files_per_second"] < baseline["files_per_second"] * (1 - max_regression):
+        regressions.append(
+            f"files_per_second {baseline['files_per_second']} → {report['files_per_second']}"
+        )
+    for name, stage in report["stages"].items():
+        before = baseline.get("stages", {}).get(name, {}).get("p50")
+        if before and stage["p50"] > before * (1 + max_regression):
+            regressions.append(f"{name} p50 {before} → {stage['p50']} ms")
+    return regressions
+
+
+def _print_report(report: dict) -> None:
+    config = report["config"]
+    print(
+        f"{config['files']} files ({config['total_mb']} MB), concurrency {config['concurrency']}, "
+        f"batch size {config['batch_size'] or '-'}, hand-off {config['handoff']}"
+    )
+    print(
+        f"{report['wall_s']} s — {report['files_per_second']} files/s, {report['failed']} failed, "
+        f"{report['bedrock_calls']} Bedrock calls ({report['bedrock_throttles']} throttled)"
+    )
+    print(f"peak RSS {report['peak_rss_mb']} MB ({report['rss_before_run_mb']} MB before the run)\n")
+
+    header = f"{'stage':<18}{'count':>7}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, stage in report["stages"].items():
+        print(
+            f"{name:<18}{stage['count']:>7}{stage['p50']:>10.1f}{stage['p90']:>10.1f}"
+            f"{stage['p99']:>10.1f}{stage['max']:>10.1f}"
+        )
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test the ETL Lambda handlers under moto")
+    parser.add_argument("--files", type=int, default=200, help="Synthetic documents (default: 200)")
+    parser.add_argument("--size-median-kb", type=float, default=6.0, help="Median document size (default: 6)")
+    parser.add_argument("--size-sigma", type=float, default=0.9, help="Log-normal size spread (default: 0.9)")
+    parser.add_argument("--size-max-kb", type=float, default=190.0, help="Largest document (default: 190)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent orchestrator invocations")
+    parser.add_argument("--batch-size", type=int, default=0,
+                        help="SQS records per orchestrator invocation (default: 0 — one event each)")
+    parser.add_argument("--handoff", choices=["inline", "sqs"], default="inline",
+                        help="Loader hand-off: in-process, or a loader queue drained afterwards")
+    parser.add_argument("--bedrock-latency-ms", type=float, default=800.0, help="Median time to first byte")
+    parser.add_argument("--bedrock-ms-per-kb", type=float, default=2.0, help="Streaming cost per output KB")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Random ThrottlingException rate")
+    parser.add_argument("--bedrock-capacity", type=int, default=0,
+                        help="Concurrent calls above which InvokeAgent throttles (default: 0 — unlimited)")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for sizes, content and the latency model")
+    parser.add_argument("--json-out", type=Path, help="Write the report as JSON")
+    parser.add_argument("--baseline", type=Path, help="Earlier --json-out report to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.15,
+                        help="Allowed throughput drop / stage p50 increase vs --baseline (default: 0.15)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    bedrock = FakeBedrockAgent(
+        latency_ms=args.bedrock_latency_ms,
+        ms_per_kb=args.bedrock_ms_per_kb,
+        throttle_rate=args.throttle_rate,
+        capacity=args.bedrock_capacity,
+        seed=args.seed,
+    )
+    report = run_benchmark(
+        files=args.files,
+        size_median_kb=args.size_median_kb,
+        size_sigma=args.size_sigma,
+        size_max_kb=args.size_max_kb,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        handoff=args.handoff,
+        bedrock=bedrock,
+        seed=args.seed,
+    )
+    _print_report(report)
+    if args.json_out:
+        args.json_out.write_text(json.dumps(report, indent=2))
+
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Unit tests for the ETL backfill / replay CLI.
+Runs the real orchestrator and loader handlers against moto — Bedrock is faked.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import boto3
+from moto import mock_aws
+
+os.environ.setdefault("AWS_DEFAULT_REGION", "ap-southeast-1")
+os.environ.setdefault("BEDROCK_AGENT_ID", "test-agent-id")
+os.environ.setdefault("BEDROCK_AGENT_ALIAS_ID", "test-alias-id")
+os.environ.setdefault("BEDROCK_MODEL_ID", "anthropic.claude-haiku-3-5-v1:0")
+os.environ.setdefault("CLEAN_BUCKET_NAME", "test-clean-bucket")
+os.environ.setdefault("DYNAMODB_TABLE_NAME", "test-article-metadata")
+
+import backfill  # noqa: E402  (after env setup)
+
+REGION = "ap-southeast-1"
+RAW_BUCKET = "test-raw-bucket"
+CLEAN_BUCKET = "test-clean-bucket"
+DYNAMO_TABLE = "test-article-metadata"
+
+
+def _setup_aws(files: int) -> None:
+    s3 = boto3.client("s3", region_name=REGION)
+    for bucket in (RAW_BUCKET, CLEAN_BUCKET):
+        s3.create_bucket(Bucket=bucket, CreateBucketConfiguration={"LocationConstraint": REGION})
+    for i in range(files):
+        s3.put_object(Bucket=RAW_BUCKET, Key=f"2026/site{i:03d}_20260101T000000.md", Body=f"# Page {i}\n\nBody".encode())
+    s3.put_object(Bucket=RAW_BUCKET, Key="2026/notes.txt", Body=b"ignored")
+
+    boto3.client("dynamodb", region_name=REGION).create_table(
+        TableName=DYNAMO_TABLE,
+        AttributeDefinitions=[{"AttributeName": "article_id", "AttributeType": "S"}],
+        KeySchema=[{"AttributeName": "article_id", "KeyType": "HASH"}],
+        BillingMode="PAY_PER_REQUEST",
+    )
+
+
+def _fake_bedrock():
+    bedrock = MagicMock()
+    bedrock.invoke_agent.side_effect = lambda **kwargs: {
+        "completion": [{"chunk": {"bytes": kwargs["inputText"].encode()}}]
+    }
+    return bedrock
+
+
+def _item_count() -> int:
+    return boto3.client("dynamodb", region_name=REGION).scan(TableName=DYNAMO_TABLE)["Count"]
+
+
+class TestBackfill(unittest.TestCase):
+
+    def setUp(self):
+        self.state = Path(tempfile.mkdtemp()) / "state.json"
+        # Pipeline modules are loaded inside run_backfill — fake Bedrock on each load
+        original = backfill.load_pipeline
+
+        def load_pipeline(loader_mode="local"):
+            pipeline = original(loader_mode)
+            pipeline.orchestrator.bedrock_agent_runtime = _fake_bedrock()
+            return pipeline
+
+        patcher = patch("backfill.load_pipeline", side_effect=load_pipeline)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @mock_aws
+    def test_processes_every_markdown_object_under_prefix(self):
+        _setup_aws(files=12)
+
+        summary = backfill.run_backfill(
+            RAW_BUCKET, "2026/", self.state, workers=4, progress=lambda msg: None
+        )
+
+        assert summary["processed"] == 12
+        assert summary["failed"] == 0
+        assert summary["files_per_second"] > 0
+        assert _item_count() == 12
+        state = json.loads(self.state.read_text())
+        assert state["watermark"] == "2026/site011_20260101T000000.md"
+        assert state["processed"] == 12
+
+    @mock_aws
+    def test_resumes_after_the_checkpoint(self):
+        _setup_aws(files=6)
+        backfill.write_state(self.state, {
+            "bucket": RAW_BUCKET,
+            "prefix": "2026/",
+            "watermark": "2026/site003_20260101T000000.md",
+            "processed": 4,
+            "failed": {},
+        })
+
+        summary = backfill.run_backfill(
+            RAW_BUCKET, "2026/", self.state, workers=2, progress=lambda msg: None
+        )
+
+        assert summary["processed"] == 2
+        assert _item_count() == 2
+        assert json.loads(self.state.read_text())["processed"] == 6
+
+    @mock_aws
+    def test_failures_are_recorded_and_retried(self):
+        _setup_aws(files=3)
+        failing_key = "2026/site001_20260101T000000.md"
+        original = backfill.process_object
+
+        def flaky(bucket, key, size):
+            if key == failing_key:
+                return key, "RuntimeError: boom"
+            return original(bucket, key, size)
+
+        with patch("backfill.process_object", side_effect=flaky):
+            summary = backfill.run_backfill(
+                RAW_BUCKET, "2026/", self.state, workers=2, progress=lambda msg: None
+            )
+        assert summary["failed"] == 1
+        assert list(json.loads(self.state.read_text())["failed"]) == [failing_key]
+
+        summary = backfill.run_backfill(
+            RAW_BUCKET, "2026/", self.state, workers=2, retry_failed=True, progress=lambda msg: None
+        )
+        assert summary["processed"] == 1
+        assert summary["failed"] == 0
+        assert json.loads(self.state.read_text())["failed"] == {}
+        assert _item_count() == 3
+
+    @mock_aws
+    def test_interrupted_retry_keeps_unfinished_keys_failed(self):
+        _setup_aws(files=3)
+        retried, unstarted = "2026/site000_20260101T000000.md", "2026/site002_20260101T000000.md"
+        backfill.write_state(self.state, {
+            "bucket": RAW_BUCKET,
+            "prefix": "2026/",
+            "watermark": "2026/site002_20260101T000000.md",
+            "processed": 3,
+            "failed": {retried: "RuntimeError: boom", unstarted: "RuntimeError: boom"},
+        })
+        s3_client = boto3.client("s3", region_name=REGION)
+        head_object = s3_client.head_object
+
+        def interrupt_second(**kwargs):
+            if kwargs["Key"] == unstarted:
+                raise KeyboardInterrupt
+            return head_object(**kwargs)
+
+        with patch.object(s3_client, "head_object", side_effect=interrupt_second):
+            with self.assertRaises(KeyboardInterrupt):
+                backfill.run_backfill(
+                    RAW_BUCKET, "2026/", self.state, workers=2, retry_failed=True,
+                    progress=lambda msg: None, s3_client=s3_client,
+                )
+
+        assert json.loads(self.state.read_text())["failed"] == {unstarted: "RuntimeError: boom"}
+
+    def test_rejects_state_file_for_another_prefix(self):
+        backfill.write_state(self.state, {"bucket": RAW_BUCKET, "prefix": "2025/"})
+        with self.assertRaises(ValueError):
+            backfill.read_state(self.state, RAW_BUCKET, "2026/")
@@ -0,0 +1,59 @@
+"""
+Unit tests for the ETL pipeline benchmark harness.
+Runs a small benchmark end to end against moto with the fake Bedrock agent.
+"""
+
+import random
+import unittest
+
+import bench_pipeline
+
+
+class TestBenchPipeline(unittest.TestCase):
+
+    def test_reports_throughput_and_stage_percentiles(self):
+        bedrock = bench_pipeline.FakeBedrockAgent(latency_ms=1, ms_per_kb=0, throttle_rate=0.2, seed=3)
+
+        report = bench_pipeline.run_benchmark(files=12, concurrency=4, batch_size=4, bedrock=bedrock)
+
+        assert report["failed"] == 0
+        assert report["files_per_second"] > 0
+        assert report["bedrock_calls"] == 12 + bedrock.throttles
+        assert report["peak_rss_mb"] > 0
+        for name in ("S3ReadMs", "LoaderHandoffMs", "LoaderWriteMs", "TotalPipelineMs"):
+            assert report["stages"][name]["count"] == 12
+            assert report["stages"][name]["p50"] <= report["stages"][name]["p99"]
+
+    def test_sqs_handoff_drains_the_loader_queue(self):
+        bedrock = bench_pipeline.FakeBedrockAgent(latency_ms=1, ms_per_kb=0)
+
+        report = bench_pipeline.run_benchmark(files=5, concurrency=2, handoff="sqs", bedrock=bedrock)
+
+        assert report["failed"] == 0
+        assert report["stages"]["LoaderWriteMs"]["count"] == 5
+
+    def test_compare_flags_regressions_beyond_the_threshold(self):
+        baseline = {
+            "config": {"files": 10},
+            "files_per_second": 100.0,
+            "stages": {"S3ReadMs": {"p50": 10.0}, "LoaderWriteMs": {"p50": 10.0}},
+        }
+        report = {
+            "config": {"files": 10},
+            "files_per_second": 90.0,
+            "stages": {"S3ReadMs": {"p50": 11.0}, "LoaderWriteMs": {"p50": 13.0}},
+        }
+
+        regressions = bench_pipeline.compare(report, baseline, max_regression=0.15)
+
+        assert regressions == ["LoaderWriteMs p50 10.0 → 13.0 ms"]
+
+    def test_synthetic_documents_follow_the_size_model(self):
+        rng = random.Random(7)
+        sizes = bench_pipeline.sample_sizes(rng, 200, median_kb=4, sigma=0.5, max_kb=16)
+
+        assert max(sizes) <= 16 * 1024
+        assert 3 * 1024 < sorted(sizes)[100] < 5 * 1024
+        document = bench_pipeline.synthesise_markdown(rng, 2048)
+        assert document.startswith("# ")
+        assert len(document) >= 2048
@@ -96,6 +96,12 @@ variable "loader_timeout_seconds" {
   default     = 15
 }
 
+variable "loader_max_workers" {
+  description = "Concurrent S3 writer threads per loader invocation when it receives a batch of articles"
+  type        = number
+  default     = 8
+}
+
 variable "orchestrator_reserved_concurrency" {
   description = "Reserved concurrency for the orchestrator Lambda — caps simultaneous Bedrock invocations to control cost"
   type        = number
@@ -111,3 +117,210 @@ variable "interface_endpoint_multi_az" {
   type        = bool
   default     = false
 }
+
+# ---------------------------------------------------------------------------
+# Orchestrator batch mode — SQS ingest queue between EventBridge and Lambda
+# ---------------------------------------------------------------------------
+
+variable "orchestrator_batch_mode" {
+  description = "When true, EventBridge delivers upload events to an SQS ingest queue and the orchestrator processes them in batches with partial batch failure reporting"
+  type        = bool
+  default     = false
+}
+
+variable "orchestrator_batch_size" {
+  description = "Maximum number of SQS records delivered to one orchestrator invocation in batch mode"
+  type        = number
+  default     = 10
+
+  validation {
+    condition     = var.orchestrator_batch_size >= 1 && var.orchestrator_batch_size <= 100
+    error_message = "orchestrator_batch_size must be between 1 and 100."
+  }
+}
+
+variable "orchestrator_batch_max_workers" {
+  description = "Worker threads per orchestrator invocation in batch mode — effective Bedrock concurrency is reserved concurrency x workers"
+  type        = number
+  default     = 4
+}
+
+# ---------------------------------------------------------------------------
+# Extraction cache
+# ---------------------------------------------------------------------------
+
+variable "extraction_cache_ttl_days" {
+  description = "Days a cached Bedrock extraction stays valid before the orchestrator calls Bedrock again for the same content"
+  type        = number
+  default     = 30
+}
+
+# ---------------------------------------------------------------------------
+# Completion staging — stream Bedrock output to S3 instead of the async payload
+# ---------------------------------------------------------------------------
+
+variable "stream_completion_to_s3" {
+  description = "When true, the orchestrator streams Bedrock completions to staging/ in the clean bucket and passes the loader a pointer, removing the 256 KB async-invoke payload ceiling"
+  type        = bool
+  default     = false
+}
+
+variable "preclean_raw_markdown" {
+  description = "When true, the orchestrator strips HTML comments, base64 images and navigation lines from raw Markdown before Bedrock extraction (fewer input tokens)"
+  type        = bool
+  default     = true
+}
+
+variable "boilerplate_stripping" {
+  description = "When true, the orchestrator drops link-dense blocks, header / footer blocks and blocks repeated across a site's pages before Bedrock extraction"
+  type        = bool
+  default     = true
+}
+
+variable "boilerplate_min_repeat_pages" {
+  description = "A block seen on at least this many other pages of the same site is stripped as boilerplate. 0 disables repeated-block detection"
+  type        = number
+  default     = 3
+
+  validation {
+    condition     = var.boilerplate_min_repeat_pages >= 0 && var.boilerplate_min_repeat_pages <= 19
+    error_message = "boilerplate_min_repeat_pages must be between 0 and 19 (at most 20 pages are remembered per block)."
+  }
+}
+
+variable "bedrock_min_words" {
+  description = "Documents with fewer words than this after stripping skip Bedrock and are loaded as stripped (extraction_model = rule-based). 0 disables the skip"
+  type        = number
+  default     = 0
+}
+
+variable "max_file_bytes" {
+  description = "Largest raw Markdown file the orchestrator accepts. Keep at or below 204800 unless stream_completion_to_s3 is enabled"
+  type        = number
+  default     = 204800
+}
+
+# ---------------------------------------------------------------------------
+# Large-document mode — chunked, parallel Bedrock extraction
+# ---------------------------------------------------------------------------
+
+variable "large_doc_max_bytes" {
+  description = "Files above max_file_bytes and up to this size are split into chunks and extracted in parallel instead of being rejected. 0 disables large-document mode"
+  type        = number
+  default     = 0
+}
+
+variable "chunk_max_tokens" {
+  description = "Estimated token budget per chunk in large-document mode"
+  type        = number
+  default     = 12000
+}
+
+variable "chunk_max_concurrency" {
+  description = "Maximum in-flight InvokeAgent calls per document in large-document mode"
+  type        = number
+  default     = 4
+}
+
+# ---------------------------------------------------------------------------
+# Bedrock adaptive rate limiter (shared across orchestrator invocations)
+# ---------------------------------------------------------------------------
+
+variable "bedrock_initial_rps" {
+  description = "Starting shared InvokeAgent requests-per-second budget before AIMD adjustment"
+  type        = number
+  default     = 2
+}
+
+variable "bedrock_min_rps" {
+  description = "Floor for the shared InvokeAgent budget after repeated throttling"
+  type        = number
+  default     = 1
+}
+
+variable "bedrock_max_rps" {
+  description = "Ceiling for the shared InvokeAgent budget — set to the account's Bedrock quota"
+  type        = number
+  default     = 20
+}
+
+variable "bedrock_max_retries" {
+  description = "InvokeAgent attempts per document (or chunk) before the error goes to the DLQ"
+  type        = number
+  default     = 3
+}
+
+# ---------------------------------------------------------------------------
+# Metadata rollups — compactor Lambda + columnar Athena table
+# ---------------------------------------------------------------------------
+
+variable "metadata_rollup_format" {
+  description = "Rollup file format written by the compactor: ndjson (gzip, stdlib only) or parquet (requires a pyarrow layer in compactor_layer_arns)"
+  type        = string
+  default     = "ndjson"
+
+  validation {
+    condition     = contains(["ndjson", "parquet"], var.metadata_rollup_format)
+    error_message = "metadata_rollup_format must be 'ndjson' or 'parquet'."
+  }
+}
+
+variable "metadata_compaction_schedule" {
+  description = "EventBridge schedule expression for the metadata compactor"
+  type        = string
+  default     = "rate(1 hour)"
+}
+
+variable "compactor_layer_arns" {
+  description = "Extra Lambda layer ARNs for the compactor, added after etl_common (e.g. a pyarrow layer for Parquet output)"
+  type        = list(string)
+  default     = []
+}
+
+variable "loader_metadata_output" {
+  description = "Loader metadata output: sidecar (one JSON per article) or rollup_buffer (one NDJSON per invocation, rolled up by the compactor)"
+  type        = string
+  default     = "sidecar"
+
+  validation {
+    condition     = contains(["sidecar", "rollup_buffer"], var.loader_metadata_output)
+    error_message = "loader_metadata_output must be 'sidecar' or 'rollup_buffer'."
+  }
+}
+
+# ---------------------------------------------------------------------------
+# Orchestrator → loader hand-off
+# ---------------------------------------------------------------------------
+
+variable "loader_handoff_mode" {
+  description = "How the orchestrator hands extracted content to the loader: lambda (async Invoke), inline (loader runs in-process as a library — lowest latency) or sqs (loader queue with capped consumer concurrency — back-pressure)"
+  type        = string
+  default     = "lambda"
+
+  validation {
+    condition     = contains(["lambda", "inline", "sqs"], var.loader_handoff_mode)
+    error_message = "loader_handoff_mode must be 'lambda', 'inline' or 'sqs'."
+  }
+}
+
+variable "loader_queue_batch_size" {
+  description = "Maximum number of loader payloads delivered to one loader invocation in sqs hand-off mode"
+  type        = number
+  default     = 10
+
+  validation {
+    condition     = var.loader_queue_batch_size >= 1 && var.loader_queue_batch_size <= 100
+    error_message = "loader_queue_batch_size must be between 1 and 100."
+  }
+}
+
+variable "loader_queue_max_concurrency" {
+  description = "Maximum concurrent loader invocations draining the loader queue in sqs hand-off mode"
+  type        = number
+  default     = 5
+
+  validation {
+    condition     = var.loader_queue_max_concurrency >= 2 && var.loader_queue_max_concurrency <= 1000
+    error_message = "loader_queue_max_concurrency must be between 2 and 1000 (SQS event source mapping limits)."
+  }
+}
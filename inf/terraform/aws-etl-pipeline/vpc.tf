@@ -200,6 +200,22 @@ resource "aws_vpc_endpoint" "lambda_service" {
   }
 }
 
+# SQS — required for the orchestrator to queue loader payloads (sqs hand-off mode)
+resource "aws_vpc_endpoint" "sqs" {
+  count = var.loader_handoff_mode == "sqs" ? 1 : 0
+
+  vpc_id              = aws_vpc.etl.id
+  service_name        = "com.amazonaws.${var.aws_region}.sqs"
+  vpc_endpoint_type   = "Interface"
+  subnet_ids          = local.endpoint_subnet_ids
+  security_group_ids  = [aws_security_group.vpc_endpoints.id]
+  private_dns_enabled = true
+
+  tags = {
+    Name = "${local.name_prefix}-sqs-endpoint"
+  }
+}
+
 # ---------------------------------------------------------------------------
 # VPC Flow Logs — 14-day retention for network audit (SEC-010)
 # ---------------------------------------------------------------------------
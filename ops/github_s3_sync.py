@@ -1,27 +1,224 @@
+import functools
+import gzip
+import io
 import json
 import os
+import random
+import re
+import tarfile
 import tempfile
+import threading
+import time
 import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import boto3
-from botocore.exceptions import ClientError
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from s3transfer.utils import ChunksizeAdjuster
 import mimetypes
 import hashlib
-from urllib.parse import urlparse
+from urllib.parse import quote, urlparse
 import logging
 
+try:
+    import brotli
+except ImportError:  # optional — only needed for content_encoding='br'
+    brotli = None
+
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Concurrent sync: files in flight at once, attempts per file and how often
+# (seconds) a progress line is logged
+DEFAULT_MAX_WORKERS = int(os.environ.get('SYNC_MAX_WORKERS', '16'))
+DEFAULT_MAX_RETRIES = 3
+PROGRESS_LOG_INTERVAL = 5
+
+# Files of at least this size are uploaded in parts of this size. The local
+# ETag is computed the same way, so both must come from this one setting.
+MULTIPART_CHUNK_BYTES = 8 * 1024 * 1024
+HASH_READ_BYTES = 1024 * 1024
+
+DEFAULT_EXCLUDE_PATTERNS = ['.git', '.gitignore', '__pycache__', '*.pyc', '.DS_Store']
+
+# Streaming archive sync: members up to this size are buffered in memory,
+# larger ones are spooled to a temporary file until uploaded
+STREAM_MEMORY_MAX_BYTES = 16 * 1024 * 1024
+
+# Upper bound on the source bytes sync_entries holds in memory at once (buffered
+# members and files small enough to be read for compression). encode_for_upload
+# may hold a read copy and an encoded copy of each, so peak use is a small
+# multiple of this — well inside the function's 1024 MB
+IN_FLIGHT_MAX_BYTES = 64 * 1024 * 1024
+
+# Incremental sync: the last synced commit is recorded in this object of the
+# target bucket. GitHub's compare API lists at most COMPARE_MAX_FILES files —
+# a diff that size may be truncated, so it falls back to a full sync.
+SYNC_STATE_KEY = os.environ.get('SYNC_STATE_KEY', '.github-s3-sync.json')
+COMPARE_MAX_FILES = 300
+GITHUB_API = 'https://api.github.com'
+GITHUB_TIMEOUT = 30
+
+# DeleteObjects accepts at most this many keys per request
+DELETE_BATCH_SIZE = 1000
+
+# Atomic publish: each commit is uploaded under RELEASES_PREFIX<sha>/ and goes
+# live when RELEASE_POINTER_KEY (and optionally the CloudFront origin path) is
+# switched to it. The newest RELEASES_TO_KEEP releases are kept for rollback.
+RELEASES_PREFIX = os.environ.get('SYNC_RELEASES_PREFIX', 'releases/')
+RELEASE_POINTER_KEY = os.environ.get('SYNC_RELEASE_POINTER_KEY', 'current-release.json')
+RELEASES_TO_KEEP = int(os.environ.get('SYNC_RELEASES_TO_KEEP', '3'))
+
+# Pre-compressed uploads: files of these content types, between
+# COMPRESS_MIN_BYTES and COMPRESS_MAX_BYTES, are stored encoded with
+# SYNC_CONTENT_ENCODING ('gzip', 'br' or 'none') when that makes them smaller.
+# Compression is deterministic, so unchanged files keep the same ETag.
+DEFAULT_CONTENT_ENCODING = os.environ.get('SYNC_CONTENT_ENCODING', 'gzip')
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/javascript', 'application/json', 'application/xml', 'application/manifest+json',
+    'application/rss+xml', 'application/atom+xml', 'application/wasm', 'image/svg+xml', 'image/x-icon',
+    'font/ttf', 'font/otf', 'application/vnd.ms-fontobject',
+)
+COMPRESS_MIN_BYTES = 1024
+COMPRESS_MAX_BYTES = STREAM_MEMORY_MAX_BYTES
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+
+# Cache-Control: HTML is revalidated quickly so a deploy shows up at once,
+# fingerprinted assets never change under their name, everything else gets a
+# moderate lifetime. A fingerprint is a "."/"-"-separated token just before
+# the extension(s): 8+ hex characters with both letters and digits
+# (app.3f9c2a1b.js) or 8+ word characters mixing upper case, lower case and
+# digits (index-BXz1_k9Q.css) — never dates or words (photo-20240101.jpg).
+CACHE_CONTROL_HTML = os.environ.get('SYNC_CACHE_CONTROL_HTML', 'public, max-age=60, must-revalidate')
+CACHE_CONTROL_IMMUTABLE = os.environ.get('SYNC_CACHE_CONTROL_IMMUTABLE', 'public, max-age=31536000, immutable')
+CACHE_CONTROL_DEFAULT = os.environ.get('SYNC_CACHE_CONTROL_DEFAULT', 'public, max-age=3600')
+# Bump when the built-in header rules change: the next sync re-checks the
+# headers of every unchanged object (see LambdaGitHubS3Sync.header_settings)
+HEADER_RULES_VERSION = 1
+HASHED_ASSET_RE = re.compile(
+    r'[.-](?:(?=[0-9a-f]*[0-9])(?=[0-9a-f]*[a-f])[0-9a-f]{8,}'
+    r'|(?=\w*[0-9])(?=\w*[a-z])(?=\w*[A-Z])\w{8,})(?:\.[A-Za-z0-9]+)+$'
+)
+
+# Errors worth retrying a single file for
+TRANSIENT_ERRORS = (ClientError, BotoCoreError, S3UploadFailedError)
+
+
+class ByteBudget:
+    """Blocking budget of bytes held by entries waiting for or being uploaded."""
+    
+    def __init__(self, limit):
+        self.limit = limit
+        self.held = 0
+        self._condition = threading.Condition()
+    
+    def acquire(self, size):
+        """Wait until size more bytes fit; an entry above the whole limit waits until nothing is held."""
+        with self._condition:
+            self._condition.wait_for(lambda: not self.held or self.held + size <= self.limit)
+            self.held += size
+    
+    def release(self, size):
+        with self._condition:
+            self.held -= size
+            self._condition.notify_all()
+
+
+class SyncProgress:
+    """Aggregate counters for one sync run, with periodic progress logging."""
+    
+    def __init__(self, total_files=None):
+        # None while the total is unknown (streamed archives)
+        self.total_files = total_files
+        self.counts = {'uploaded': 0, 'copied': 0, 'updated': 0, 'skipped': 0, 'failed': 0}
+        self.uploaded_bytes = 0
+        # Stale objects removed after the uploads (prune / incremental sync)
+        self.deleted_files = 0
+        # Every key the source produced, whatever its outcome — prune keeps these
+        self.synced_keys = set()
+        self.started = time.monotonic()
+        self.last_logged = self.started
+        self._lock = threading.Lock()
+    
+    def record(self, outcome, uploaded_bytes=0):
+        """Count one finished file; safe to call from worker threads."""
+        with self._lock:
+            self.counts[outcome] += 1
+            self.uploaded_bytes += uploaded_bytes
+            now = time.monotonic()
+            if now - self.last_logged >= PROGRESS_LOG_INTERVAL:
+                self.last_logged = now
+                done = sum(self.counts.values())
+                total = f"/{self.total_files}" if self.total_files is not None else ""
+                logger.info(
+                    f"Progress: {done}{total} files, "
+                    f"{self.uploaded_bytes / 1048576:.1f} MB uploaded, {self._mb_per_second(now):.2f} MB/s"
+                )
+    
+    def report(self):
+        """Summary of the run: file counts, bytes uploaded and throughput."""
+        now = time.monotonic()
+        duration = now - self.started
+        total_files = sum(self.counts.values())
+        return {
+            'total_files': total_files,
+            'uploaded_files': self.counts['uploaded'],
+            'copied_files': self.counts['copied'],
+            'updated_files': self.counts['updated'],
+            'skipped_files': self.counts['skipped'],
+            'failed_files': self.counts['failed'],
+            'deleted_files': self.deleted_files,
+            'uploaded_bytes': self.uploaded_bytes,
+            'duration_seconds': round(duration, 2),
+            'files_per_second': round(total_files / duration, 1) if duration else 0.0,
+            'mb_per_second': round(self._mb_per_second(now), 2),
+        }
+    
+    def _mb_per_second(self, now):
+        elapsed = now - self.started
+        return self.uploaded_bytes / 1048576 / elapsed if elapsed else 0.0
+
+
 class LambdaGitHubS3Sync:
-    def __init__(self, bucket_name, github_token=None):
+    def __init__(self, bucket_name, github_token=None, max_workers=DEFAULT_MAX_WORKERS,
+                 max_retries=DEFAULT_MAX_RETRIES, content_encoding=DEFAULT_CONTENT_ENCODING,
+                 cache_control_rules=None):
         self.bucket_name = bucket_name
         self.github_token = github_token
-        self.s3_client = boto3.client('s3')
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        if content_encoding in (None, '', 'none', 'identity'):
+            content_encoding = None
+        elif content_encoding == 'br' and brotli is None:
+            logger.warning("brotli is not installed, compressing with gzip instead")
+            content_encoding = 'gzip'
+        elif content_encoding not in ('gzip', 'br'):
+            raise ValueError(f"Unsupported content encoding '{content_encoding}'")
+        self.content_encoding = content_encoding
+        # Ordered (pattern, Cache-Control) pairs, matched before the built-in rules
+        self.cache_control_rules = [[pattern, value] for pattern, value in (cache_control_rules or [])]
+        # One client shared by every worker thread (clients are thread-safe);
+        # the connection pool matches the worker count so no thread waits for
+        # a connection and none are discarded after each request
+        self.s3_client = boto3.client('s3', config=Config(
+            max_pool_connections=max_workers,
+            retries={'max_attempts': 5, 'mode': 'adaptive'},
+        ))
+        # Parallelism comes from the sync pool, not from per-file transfer threads
+        self.transfer_config = TransferConfig(
+            multipart_threshold=MULTIPART_CHUNK_BYTES,
+            multipart_chunksize=MULTIPART_CHUNK_BYTES,
+            use_threads=False,
+        )
         
-    def download_repo_zip(self, repo_url, branch='main'):
-        """Download repository as ZIP from GitHub API."""
+    def parse_repo_url(self, repo_url):
+        """Return (owner, repo) from a GitHub repository URL."""
         # Parse GitHub URL to get owner/repo
         if 'github.com' in repo_url:
             parts = repo_url.rstrip('/').split('/')
@@ -29,17 +226,25 @@ class LambdaGitHubS3Sync:
             repo = parts[-1].replace('.git', '')
         else:
             raise ValueError("Invalid GitHub URL")
-        
-        # GitHub API URL for downloading ZIP
-        api_url = f"https://api.github.com/repos/{owner}/{repo}/zipball/{branch}"
-        
+        return owner, repo
+    
+    def github_headers(self):
+        """Request headers for the GitHub API (token auth when configured)."""
         headers = {}
         if self.github_token:
             headers['Authorization'] = f'token {self.github_token}'
+        return headers
+    
+    def download_repo_zip(self, repo_url, branch='main'):
+        """Download repository as ZIP from GitHub API."""
+        owner, repo = self.parse_repo_url(repo_url)
+        
+        # GitHub API URL for downloading ZIP
+        api_url = f"https://api.github.com/repos/{owner}/{repo}/zipball/{branch}"
         
         logger.info(f"Downloading {owner}/{repo} from branch {branch}")
         
-        response = requests.get(api_url, headers=headers, stream=True)
+        response = requests.get(api_url, headers=self.github_headers(), stream=True)
         response.raise_for_status()
         
         # Save to temporary file
@@ -71,78 +276,855 @@ class LambdaGitHubS3Sync:
             content_type = 'binary/octet-stream'
         return content_type
     
+    def header_settings(self):
+        """Everything the upload headers depend on, recorded in the sync state."""
+        return {
+            'content_encoding': self.content_encoding or 'none',
+            'cache_control_rules': self.cache_control_rules,
+            'cache_control_defaults': [CACHE_CONTROL_HTML, CACHE_CONTROL_IMMUTABLE, CACHE_CONTROL_DEFAULT],
+            'header_rules_version': HEADER_RULES_VERSION,
+        }
+    
+    def headers_match(self, s3_key, extra_args):
+        """True when the stored object already has the Content-Type / -Encoding and Cache-Control in extra_args."""
+        response = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
+        return all(
+            response.get(header) == extra_args.get(header)
+            for header in ('ContentType', 'ContentEncoding', 'CacheControl')
+        )
+    
+    def get_cache_control(self, s3_key):
+        """Cache-Control for a key: the first matching custom rule, else HTML / hashed asset / default."""
+        for pattern, value in self.cache_control_rules:
+            if compile_excludes((pattern,)).excludes(s3_key):
+                return value
+        if self.get_content_type(s3_key) == 'text/html':
+            return CACHE_CONTROL_HTML
+        if HASHED_ASSET_RE.search(s3_key.rsplit('/', 1)[-1]):
+            return CACHE_CONTROL_IMMUTABLE
+        return CACHE_CONTROL_DEFAULT
+    
+    def encode_for_upload(self, source, s3_key):
+        """Return (body, ExtraArgs) to store a source (path or bytes) under s3_key.
+        
+        Compressible content is encoded with content_encoding and the body is
+        the encoded bytes — or the source unchanged when encoding would not
+        make it smaller. Change detection compares ETags against this body, so
+        it works the same for encoded and plain objects.
+        """
+        content_type = self.get_content_type(s3_key)
+        extra_args = {'ContentType': content_type, 'CacheControl': self.get_cache_control(s3_key)}
+        if self.content_encoding is None or not content_type.startswith(COMPRESSIBLE_TYPES):
+            return source, extra_args
+        if not COMPRESS_MIN_BYTES <= self.source_size(source) <= COMPRESS_MAX_BYTES:
+            return source, extra_args
+        
+        with self.open_source(source) as f:
+            data = f.read()
+        if self.content_encoding == 'br':
+            encoded = brotli.compress(data, quality=BROTLI_QUALITY)
+        else:
+            # mtime=0 keeps the output, and so the ETag, identical for identical input
+            encoded = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+        if len(encoded) >= len(data):
+            return source, extra_args
+        extra_args['ContentEncoding'] = self.content_encoding
+        return encoded, extra_args
+    
+    def open_source(self, source):
+        """Open a sync source — a local file path or the bytes of an archive member."""
+        if isinstance(source, bytes):
+            return io.BytesIO(source)
+        return open(source, "rb")
+    
+    def source_size(self, source):
+        """Size in bytes of a sync source (see open_source)."""
+        if isinstance(source, bytes):
+            return len(source)
+        return os.path.getsize(source)
+    
     def calculate_file_hash(self, file_path):
-        """Calculate MD5 hash of a file."""
+        """Calculate MD5 hash of a file (path or bytes, see open_source)."""
         hash_md5 = hashlib.md5()
-        with open(file_path, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
+        with self.open_source(file_path) as f:
+            for chunk in iter(lambda: f.read(HASH_READ_BYTES), b""):
                 hash_md5.update(chunk)
         return hash_md5.hexdigest()
     
-    def file_needs_upload(self, local_file, s3_key):
-        """Check if file needs upload by comparing hashes."""
+    def multipart_part_sizes(self, file_size, parts):
+        """Candidate part sizes for a multipart object of file_size bytes in `parts` parts.
+        
+        Our own uploads use the transfer config's chunk size (adjusted the way
+        s3transfer does for the 10,000-part limit); objects uploaded by other
+        tools commonly use the smallest whole-MiB size giving that part count
+        or one of the usual CLI / SDK defaults.
+        """
+        mib = 1024 * 1024
+        per_part = -(-file_size // parts)
+        candidates = [
+            ChunksizeAdjuster().adjust_chunksize(self.transfer_config.multipart_chunksize, file_size),
+            -(-per_part // mib) * mib,
+        ] + [size * mib for size in (5, 8, 16, 32, 64, 100)]
+        sizes = []
+        for size in candidates:
+            if size not in sizes and -(-file_size // size) == parts:
+                sizes.append(size)
+        return sizes
+    
+    def calculate_etag(self, file_path, part_size=None):
+        """Compute the ETag S3 reports for this file's content.
+        
+        Single-part uploads have the MD5 of the content as their ETag. Objects
+        uploaded in parts (upload_file at or above the multipart threshold)
+        have the MD5 of the concatenated part MD5s followed by "-<part count>".
+        Without part_size, the form our own upload_file would produce is computed.
+        """
+        if part_size is None:
+            file_size = self.source_size(file_path)
+            if file_size < self.transfer_config.multipart_threshold:
+                return self.calculate_file_hash(file_path)
+            part_size = ChunksizeAdjuster().adjust_chunksize(self.transfer_config.multipart_chunksize, file_size)
+        
+        part_digests = []
+        with self.open_source(file_path) as f:
+            while True:
+                part_md5 = hashlib.md5()
+                remaining = part_size
+                while remaining:
+                    chunk = f.read(min(HASH_READ_BYTES, remaining))
+                    if not chunk:
+                        break
+                    part_md5.update(chunk)
+                    remaining -= len(chunk)
+                if remaining == part_size:
+                    break
+                part_digests.append(part_md5.digest())
+                if remaining:
+                    break
+        return f"{hashlib.md5(b''.join(part_digests)).hexdigest()}-{len(part_digests)}"
+    
+    def etag_matches(self, file_path, s3_etag):
+        """True when the local file has the content behind s3_etag (plain or multipart)."""
+        if '-' not in s3_etag:
+            return self.calculate_file_hash(file_path) == s3_etag
+        
+        parts = int(s3_etag.rsplit('-', 1)[1])
+        file_size = self.source_size(file_path)
+        return any(
+            self.calculate_etag(file_path, part_size) == s3_etag
+            for part_size in self.multipart_part_sizes(file_size, parts)
+        )
+    
+    def build_remote_manifest(self, prefix=''):
+        """Map every key under prefix to its (ETag, size) with paginated ListObjectsV2.
+        
+        One LIST call covers up to 1000 objects, replacing a HEAD request per
+        file. At the bucket root the syncer's own objects (see is_sync_metadata)
+        are left out — they are never source content. Returns None when the
+        bucket cannot be listed, so callers fall back to per-file HEAD requests.
+        """
+        manifest = {}
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        try:
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                for obj in page.get('Contents', []):
+                    if not prefix and is_sync_metadata(obj['Key']):
+                        continue
+                    manifest[obj['Key']] = (obj['ETag'].strip('"'), obj['Size'])
+        except ClientError as e:
+            logger.warning(f"Cannot list s3://{self.bucket_name}/{prefix}, falling back to HEAD requests: {e}")
+            return None
+        logger.info(f"Remote manifest: {len(manifest)} objects under s3://{self.bucket_name}/{prefix}")
+        return manifest
+    
+    def file_needs_upload(self, local_file, s3_key, manifest=None):
+        """Check if file needs upload by comparing ETags (multipart-aware, see etag_matches).
+        
+        With a remote manifest (see build_remote_manifest) no request is made:
+        a missing key or a different size decides without hashing the file.
+        """
+        if manifest is not None:
+            remote = manifest.get(s3_key)
+            if remote is None:
+                return True
+            s3_etag, s3_size = remote
+            if self.source_size(local_file) != s3_size:
+                return True
+            return not self.etag_matches(local_file, s3_etag)
+        
         try:
             response = self.s3_client.head_object(Bucket=self.bucket_name, Key=s3_key)
             s3_etag = response['ETag'].strip('"')
-            local_hash = self.calculate_file_hash(local_file)
-            return local_hash != s3_etag
+            return not self.etag_matches(local_file, s3_etag)
         except ClientError as e:
             if e.response['Error']['Code'] == '404':
                 return True
             logger.warning(f"Error checking S3 object {s3_key}: {e}")
             return True
     
-    def sync_directory(self, source_dir, exclude_patterns=None):
-        """Sync directory contents to S3."""
-        if exclude_patterns is None:
-            exclude_patterns = ['.git', '.gitignore', '__pycache__', '*.pyc', '.DS_Store']
-        
-        uploaded_count = 0
-        skipped_count = 0
-        
+    def iter_files(self, source_dir, exclude_patterns):
+        """Yield (local path, S3 key) for every file under source_dir that is not excluded."""
+        matcher = compile_excludes(tuple(exclude_patterns))
         for root, dirs, files in os.walk(source_dir):
-            # Filter out excluded directories
-            dirs[:] = [d for d in dirs if not any(pattern in d for pattern in exclude_patterns)]
+            # Use forward slashes for S3 keys
+            relative_root = os.path.relpath(root, source_dir).replace('\\', '/')
+            relative_root = '' if relative_root == '.' else relative_root + '/'
+            
+            # Prune excluded directories — their files are never visited
+            dirs[:] = [d for d in dirs if not matcher.excludes(relative_root + d, is_dir=True)]
             
             for file in files:
-                file_path = os.path.join(root, file)
-                relative_path = os.path.relpath(file_path, source_dir)
-                
-                # Check exclusions
-                should_exclude = any(
-                    pattern in relative_path or file == pattern 
-                    for pattern in exclude_patterns
-                )
-                
-                if should_exclude:
+                relative_path = relative_root + file
+                if matcher.excludes(relative_path):
                     continue
                 
-                # Use forward slashes for S3 keys
-                s3_key = relative_path.replace('\\', '/')
+                yield os.path.join(root, file), relative_path
+    
+    def download_repo_tarball(self, repo_url, branch='main'):
+        """Open the repository tarball from the GitHub API as a streaming response."""
+        owner, repo = self.parse_repo_url(repo_url)
+        api_url = f"https://api.github.com/repos/{owner}/{repo}/tarball/{branch}"
+        
+        logger.info(f"Streaming {owner}/{repo} from branch {branch}")
+        
+        response = requests.get(api_url, headers=self.github_headers(), stream=True)
+        response.raise_for_status()
+        # Let urllib3 undo any transfer Content-Encoding; the tar.gz itself is read by tarfile
+        response.raw.decode_content = True
+        return response
+    
+    def iter_archive(self, fileobj, source_dir=None, exclude_patterns=()):
+        """Yield (source, S3 key, is_temp_file) for each regular file in a streamed tar.gz.
+        
+        Members are read in archive order without extracting the archive: small
+        files are returned as bytes, files above STREAM_MEMORY_MAX_BYTES as the
+        path of a temporary file the caller deletes once uploaded. The archive's
+        top-level "owner-repo-commit" folder is dropped and only files under
+        source_dir (when given) are yielded, keyed relative to it.
+        """
+        with tarfile.open(fileobj=fileobj, mode='r|gz') as archive:
+            for member in archive:
+                if not member.isfile():
+                    continue
+                parts = member.name.split('/', 1)
+                if len(parts) < 2:
+                    continue
+                relative_path = repo_path_to_key(parts[1], source_dir, exclude_patterns)
+                if relative_path is None:
+                    continue
                 
-                # Check if upload needed
-                if not self.file_needs_upload(file_path, s3_key):
-                    logger.debug(f"Skipping {s3_key} (unchanged)")
-                    skipped_count += 1
+                data = archive.extractfile(member)
+                if member.size <= STREAM_MEMORY_MAX_BYTES:
+                    yield data.read(), relative_path, False
                     continue
+                with tempfile.NamedTemporaryFile(delete=False) as spool:
+                    for chunk in iter(lambda: data.read(HASH_READ_BYTES), b""):
+                        spool.write(chunk)
+                yield spool.name, relative_path, True
+    
+    def sync_file(self, file_path, s3_key, manifest=None, previous=None, key_prefix='', verify_headers=False):
+        """Upload one file (path or bytes) if it changed, retrying transient errors with backoff.
+        
+        previous is an optional (key, ETag, size) of an object that may hold the
+        same content (the file in the live release); when it does, it is copied
+        server-side instead of uploaded.
+        
+        The stored body comes from encode_for_upload (possibly compressed, with
+        its Content-Encoding and Cache-Control), which sees the key without
+        key_prefix so path rules match the same way inside a release. Content
+        comparisons cannot see headers: with verify_headers an unchanged
+        object's headers are checked with HEAD and, when they differ, rewritten
+        by an in-place copy. Returns (outcome, uploaded bytes) where outcome is
+        'uploaded', 'copied', 'updated' (headers only) or 'skipped'.
+        """
+        body, extra_args = self.encode_for_upload(file_path, s3_key[len(key_prefix):])
+        for attempt in range(1, self.max_retries + 1):
+            try:
+                if not self.file_needs_upload(body, s3_key, manifest):
+                    if not verify_headers or self.headers_match(s3_key, extra_args):
+                        logger.debug(f"Skipping {s3_key} (unchanged)")
+                        return 'skipped', 0
+                    self.s3_client.copy(
+                        {'Bucket': self.bucket_name, 'Key': s3_key},
+                        self.bucket_name,
+                        s3_key,
+                        ExtraArgs={**extra_args, 'MetadataDirective': 'REPLACE'},
+                        Config=self.transfer_config
+                    )
+                    logger.info(f"Updated headers: {s3_key}")
+                    return 'updated', 0
+                
+                if previous is not None:
+                    previous_key, previous_etag, previous_size = previous
+                    if self.source_size(body) == previous_size and self.etag_matches(body, previous_etag):
+                        # Headers come from the current rules, not the source object
+                        self.s3_client.copy(
+                            {'Bucket': self.bucket_name, 'Key': previous_key},
+                            self.bucket_name,
+                            s3_key,
+                            ExtraArgs={**extra_args, 'MetadataDirective': 'REPLACE'},
+                            Config=self.transfer_config
+                        )
+                        logger.info(f"Copied: {previous_key} -> {s3_key}")
+                        return 'copied', 0
                 
-                try:
-                    content_type = self.get_content_type(file_path)
-                    
-                    self.s3_client.upload_file(
-                        file_path,
+                with self.open_source(body) as fileobj:
+                    self.s3_client.upload_fileobj(
+                        fileobj,
                         self.bucket_name,
                         s3_key,
-                        ExtraArgs={'ContentType': content_type}
+                        ExtraArgs=extra_args,
+                        Config=self.transfer_config
                     )
-                    
-                    logger.info(f"Uploaded: {s3_key}")
-                    uploaded_count += 1
-                    
-                except ClientError as e:
-                    logger.error(f"Failed to upload {s3_key}: {e}")
+                logger.info(f"Uploaded: {s3_key}")
+                return 'uploaded', self.source_size(body)
+            
+            except TRANSIENT_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                # Full-jitter exponential backoff, capped at 10 seconds
+                delay = random.uniform(0, min(10, 2 ** attempt))
+                logger.warning(f"Retrying {s3_key} in {delay:.1f}s (attempt {attempt}/{self.max_retries}): {e}")
+                time.sleep(delay)
+    
+    def sync_entries(self, entries, progress, list_remote=True, key_prefix='', copy_from=None,
+                     verify_headers=False):
+        """Check and upload (source, S3 key, is_temp_file) entries across the worker pool.
         
-        return uploaded_count, skipped_count
+        Entries are consumed lazily: at most twice max_workers, and at most
+        IN_FLIGHT_MAX_BYTES of in-memory source, are buffered ahead of and in
+        the workers, which bounds memory when they come from a stream.
+        With list_remote=False (a handful of known-changed files) each file is
+        checked with HEAD instead of listing the whole bucket.
+        
+        Keys are written under key_prefix and recorded in progress.synced_keys
+        for prune_stale. copy_from names another prefix whose objects are
+        copied server-side when the content is identical. verify_headers is
+        passed to sync_file.
+        """
+        manifest = self.build_remote_manifest(key_prefix) if list_remote else None
+        previous = self.build_remote_manifest(copy_from) if copy_from else None
+        slots = threading.BoundedSemaphore(self.max_workers * 2)
+        budget = ByteBudget(IN_FLIGHT_MAX_BYTES)
+        
+        def run(source, s3_key, is_temp_file, held_bytes):
+            candidate = None
+            if previous and copy_from + s3_key[len(key_prefix):] in previous:
+                previous_key = copy_from + s3_key[len(key_prefix):]
+                candidate = (previous_key, *previous[previous_key])
+            try:
+                outcome, uploaded_bytes = self.sync_file(
+                    source, s3_key, manifest, candidate, key_prefix, verify_headers
+                )
+            except TRANSIENT_ERRORS as e:
+                logger.error(f"Failed to upload {s3_key}: {e}")
+                outcome, uploaded_bytes = 'failed', 0
+            finally:
+                budget.release(held_bytes)
+                slots.release()
+                if is_temp_file:
+                    os.unlink(source)
+            progress.record(outcome, uploaded_bytes)
+        
+        futures = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for source, s3_key, is_temp_file in entries:
+                progress.synced_keys.add(key_prefix + s3_key)
+                # Paths only occupy memory when they are small enough to be read for compression
+                size = self.source_size(source)
+                held_bytes = size if isinstance(source, bytes) or size <= COMPRESS_MAX_BYTES else 0
+                slots.acquire()
+                budget.acquire(held_bytes)
+                futures.append(pool.submit(run, source, key_prefix + s3_key, is_temp_file, held_bytes))
+        # Surface anything unexpected a worker raised
+        for future in futures:
+            future.result()
+        
+        return progress.report()
+    
+    def prune_stale(self, progress, key_prefix=''):
+        """Delete objects under key_prefix that the finished sync did not produce; returns the report.
+        
+        Refused when the sync produced no files or any upload failed, so an
+        empty or broken source can never empty the bucket. At the root the
+        sync state, release pointer and releases are left alone; inside a
+        release prefix everything is content.
+        """
+        report = progress.report()
+        if not report['total_files'] or report['failed_files']:
+            logger.warning(
+                f"Not pruning s3://{self.bucket_name}/{key_prefix}: {report['total_files']} files synced, "
+                f"{report['failed_files']} failed"
+            )
+            return report
+        
+        manifest = self.build_remote_manifest(key_prefix)
+        if manifest is None:
+            return report
+        stale = [key for key in manifest if key not in progress.synced_keys]
+        logger.info(f"Pruning {len(stale)} objects no longer in the source")
+        progress.deleted_files = self.delete_keys(stale)
+        return progress.report()
+    
+    def sync_directory(self, source_dir, exclude_patterns=None, prune=False, **sync_options):
+        """Sync directory contents to S3 across a bounded worker pool and return a progress report.
+        
+        sync_options (key_prefix, copy_from, verify_headers) are passed to sync_entries; prune
+        runs prune_stale afterwards.
+        """
+        if exclude_patterns is None:
+            exclude_patterns = DEFAULT_EXCLUDE_PATTERNS
+        
+        files = list(self.iter_files(source_dir, exclude_patterns))
+        progress = SyncProgress(len(files))
+        logger.info(f"Syncing {len(files)} files with {self.max_workers} workers")
+        
+        report = self.sync_entries(
+            ((file_path, s3_key, False) for file_path, s3_key in files),
+            progress,
+            **sync_options
+        )
+        if prune:
+            report = self.prune_stale(progress, sync_options.get('key_prefix', ''))
+        return report
+    
+    def sync_extracted(self, repo_url, branch='main', source_dir=None, exclude_patterns=None, **sync_options):
+        """Sync a branch by downloading its ZIP and extracting it to a temporary directory."""
+        # Create temporary directory
+        with tempfile.TemporaryDirectory() as temp_dir:
+            # Download repository ZIP
+            zip_path = self.download_repo_zip(repo_url, branch)
+            
+            try:
+                # Extract ZIP
+                extracted_dir = self.extract_zip(zip_path, temp_dir)
+                
+                # Determine sync source
+                sync_source = extracted_dir
+                if source_dir:
+                    sync_source = os.path.join(extracted_dir, source_dir)
+                    if not os.path.exists(sync_source):
+                        raise ValueError(f"Source directory '{source_dir}' not found in repository")
+                
+                return self.sync_directory(sync_source, exclude_patterns, **sync_options)
+                
+            finally:
+                # Clean up ZIP file
+                if os.path.exists(zip_path):
+                    os.unlink(zip_path)
+    
+    def sync_archive(self, repo_url, branch='main', source_dir=None, exclude_patterns=None, prune=False,
+                     **sync_options):
+        """Sync a branch straight from the streamed GitHub tarball — nothing is extracted to disk.
+        
+        Raises ValueError when source_dir matches no file in the repository;
+        prune only runs once that check has passed.
+        """
+        if exclude_patterns is None:
+            exclude_patterns = DEFAULT_EXCLUDE_PATTERNS
+        
+        progress = SyncProgress()
+        logger.info(f"Syncing archive entries with {self.max_workers} workers")
+        with self.download_repo_tarball(repo_url, branch) as response:
+            report = self.sync_entries(
+                self.iter_archive(response.raw, source_dir, exclude_patterns),
+                progress,
+                **sync_options
+            )
+        
+        if source_dir and not report['total_files']:
+            raise ValueError(f"Source directory '{source_dir}' not found in repository")
+        if prune:
+            report = self.prune_stale(progress, sync_options.get('key_prefix', ''))
+        return report
+    
+    def get_branch_head(self, repo_url, branch='main'):
+        """Resolve the branch to its head commit SHA with one small GitHub API request."""
+        owner, repo = self.parse_repo_url(repo_url)
+        # The sha media type returns just the 40-character SHA instead of the commit JSON
+        headers = {**self.github_headers(), 'Accept': 'application/vnd.github.sha'}
+        response = requests.get(
+            f"{GITHUB_API}/repos/{owner}/{repo}/commits/{branch}", headers=headers, timeout=GITHUB_TIMEOUT
+        )
+        response.raise_for_status()
+        return response.text.strip()
+    
+    def read_sync_state(self):
+        """Return the state recorded by the last successful sync, or None."""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=SYNC_STATE_KEY)
+            return json.loads(response['Body'].read())
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+                logger.warning(f"Cannot read sync state s3://{self.bucket_name}/{SYNC_STATE_KEY}: {e}")
+            return None
+        except ValueError as e:
+            logger.warning(f"Ignoring unreadable sync state: {e}")
+            return None
+    
+    def write_sync_state(self, state):
+        """Record the state of a successful sync in the target bucket."""
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=SYNC_STATE_KEY,
+            Body=json.dumps(state, indent=2).encode('utf-8'),
+            ContentType='application/json',
+            CacheControl='no-store'
+        )
+    
+    def compare_commits(self, repo_url, base, head):
+        """Return the files changed from base to head, or None when a full sync is needed.
+        
+        Only a fast-forward ("ahead") with fewer than COMPARE_MAX_FILES files is
+        trusted; force pushes, unknown bases and possibly truncated diffs are not.
+        """
+        owner, repo = self.parse_repo_url(repo_url)
+        response = requests.get(
+            f"{GITHUB_API}/repos/{owner}/{repo}/compare/{base}...{head}",
+            headers=self.github_headers(),
+            timeout=GITHUB_TIMEOUT
+        )
+        if response.status_code == 404:
+            logger.info(f"Commit {base} is no longer reachable, falling back to a full sync")
+            return None
+        response.raise_for_status()
+        comparison = response.json()
+        files = comparison.get('files', [])
+        if comparison.get('status') != 'ahead' or len(files) >= COMPARE_MAX_FILES:
+            logger.info(
+                f"Comparison {base[:7]}...{head[:7]} is {comparison.get('status')} with {len(files)} files, "
+                f"falling back to a full sync"
+            )
+            return None
+        return files
+    
+    def fetch_file(self, repo_url, path, ref):
+        """Download one file's raw content at a commit."""
+        owner, repo = self.parse_repo_url(repo_url)
+        headers = {**self.github_headers(), 'Accept': 'application/vnd.github.raw'}
+        response = requests.get(
+            f"{GITHUB_API}/repos/{owner}/{repo}/contents/{quote(path)}",
+            headers=headers,
+            params={'ref': ref},
+            timeout=GITHUB_TIMEOUT
+        )
+        response.raise_for_status()
+        return response.content
+    
+    def delete_keys(self, keys):
+        """Delete keys with batched DeleteObjects calls; returns the number deleted."""
+        keys = list(keys)
+        deleted = 0
+        for start in range(0, len(keys), DELETE_BATCH_SIZE):
+            batch = keys[start:start + DELETE_BATCH_SIZE]
+            response = self.s3_client.delete_objects(
+                Bucket=self.bucket_name,
+                Delete={'Objects': [{'Key': key} for key in batch], 'Quiet': True}
+            )
+            errors = response.get('Errors', [])
+            for error in errors:
+                logger.error(f"Failed to delete {error['Key']}: {error.get('Code')} {error.get('Message')}")
+            deleted += len(batch) - len(errors)
+        return deleted
+    
+    def sync_changes(self, repo_url, files, head, source_dir=None, exclude_patterns=None, prune=False):
+        """Apply a compare-API file list: upload added/modified files at head.
+        
+        With prune, files removed or renamed away are deleted too — but only
+        when every upload succeeded, so a failed run leaves the bucket as it
+        was, like prune_stale on the full path.
+        """
+        if exclude_patterns is None:
+            exclude_patterns = DEFAULT_EXCLUDE_PATTERNS
+        
+        uploads = {}
+        removed = set()
+        for changed in files:
+            if changed['status'] == 'renamed':
+                removed.add(changed['previous_filename'])
+            if changed['status'] == 'removed':
+                removed.add(changed['filename'])
+            else:
+                uploads[changed['filename']] = repo_path_to_key(changed['filename'], source_dir, exclude_patterns)
+        removed_keys = {repo_path_to_key(path, source_dir, exclude_patterns) for path in removed - set(uploads)}
+        uploads = {path: key for path, key in uploads.items() if key is not None}
+        removed_keys.discard(None)
+        
+        progress = SyncProgress(len(uploads))
+        logger.info(f"Incremental sync: {len(uploads)} changed and {len(removed_keys)} removed files")
+        
+        # Fetch contents concurrently, at most twice max_workers ahead of
+        # sync_entries (the same bound as its upload slots), so only a window
+        # of file bodies is held in memory rather than the whole change set
+        fetch_ahead = self.max_workers * 2
+        
+        def fetched_entries(fetch_pool):
+            pending = deque()
+            for path, key in uploads.items():
+                if len(pending) >= fetch_ahead:
+                    future, pending_key = pending.popleft()
+                    yield future.result(), pending_key, False
+                pending.append((fetch_pool.submit(self.fetch_file, repo_url, path, head), key))
+            while pending:
+                future, pending_key = pending.popleft()
+                yield future.result(), pending_key, False
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as fetch_pool:
+            report = self.sync_entries(fetched_entries(fetch_pool), progress, list_remote=False)
+        
+        if prune and removed_keys and report['failed_files']:
+            logger.warning(f"Not deleting {len(removed_keys)} removed files: {report['failed_files']} uploads failed")
+        elif prune:
+            report['deleted_files'] = self.delete_keys(sorted(removed_keys))
+        return report
+    
+    def read_release_pointer(self):
+        """Return the release pointer ({'current': prefix, 'history': [...]}) or None."""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=RELEASE_POINTER_KEY)
+            return json.loads(response['Body'].read())
+        except ClientError as e:
+            if e.response['Error']['Code'] not in ('NoSuchKey', '404'):
+                raise
+            return None
+    
+    def point_distribution_at(self, distribution_id, origin_path):
+        """Switch the CloudFront origin(s) serving this bucket to origin_path and invalidate the cache."""
+        cloudfront = boto3.client('cloudfront')
+        response = cloudfront.get_distribution_config(Id=distribution_id)
+        config = response['DistributionConfig']
+        origins = [
+            origin for origin in config['Origins']['Items']
+            if origin['DomainName'].startswith(f"{self.bucket_name}.")
+        ]
+        if not origins:
+            raise ValueError(f"Distribution {distribution_id} has no origin for bucket {self.bucket_name}")
+        for origin in origins:
+            origin['OriginPath'] = origin_path
+        cloudfront.update_distribution(Id=distribution_id, IfMatch=response['ETag'], DistributionConfig=config)
+        cloudfront.create_invalidation(
+            DistributionId=distribution_id,
+            InvalidationBatch={
+                'Paths': {'Quantity': 1, 'Items': ['/*']},
+                'CallerReference': f"{origin_path}-{int(time.time())}"
+            }
+        )
+        logger.info(f"CloudFront {distribution_id} now serves {origin_path}")
+    
+    def publish_release(self, release_prefix, distribution_id=None):
+        """Make a fully uploaded release live, then delete releases beyond RELEASES_TO_KEEP."""
+        pointer = self.read_release_pointer() or {'current': None, 'history': []}
+        if distribution_id:
+            self.point_distribution_at(distribution_id, '/' + release_prefix.rstrip('/'))
+        
+        history = [release_prefix] + [
+            prefix for prefix in [pointer['current']] + pointer['history']
+            if prefix and prefix != release_prefix
+        ]
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=RELEASE_POINTER_KEY,
+            Body=json.dumps({'current': release_prefix, 'history': history[1:RELEASES_TO_KEEP]}).encode('utf-8'),
+            ContentType='application/json',
+            CacheControl='no-store'
+        )
+        logger.info(f"Published {release_prefix}")
+        
+        deleted = 0
+        for prefix in history[RELEASES_TO_KEEP:]:
+            deleted += self.delete_keys(sorted(self.build_remote_manifest(prefix) or {}))
+        return deleted
+    
+    def sync_repository(self, repo_url, branch='main', source_dir=None, exclude_patterns=None,
+                        stream_archive=True, incremental=True, prune=False, atomic_publish=False,
+                        distribution_id=None):
+        """Sync a branch, doing as little work as the last recorded sync allows.
+        
+        Resolves the branch head first: if it matches the commit recorded in
+        SYNC_STATE_KEY (same repository, source_dir, excludes, publish mode and
+        header settings) nothing else is done. Otherwise only the files changed
+        since that commit are synced when GitHub's compare API allows it, else
+        the whole tree at the head commit. prune deletes objects no longer in
+        the source on either path (files removed since the recorded commit, or
+        anything the full tree did not produce). A full sync after the header settings changed also rewrites the
+        headers of unchanged objects. The state is only recorded when no upload
+        failed.
+        
+        With atomic_publish every commit is uploaded in full to its own
+        RELEASES_PREFIX<sha>/ prefix (unchanged files copied server-side from
+        the live release) and only then made live through RELEASE_POINTER_KEY
+        and, given distribution_id, the CloudFront origin path — visitors never
+        see a half-updated tree. A release with failed uploads is not published.
+        """
+        if exclude_patterns is None:
+            exclude_patterns = DEFAULT_EXCLUDE_PATTERNS
+        
+        head = self.get_branch_head(repo_url, branch)
+        state = {
+            'repository': repo_url,
+            'source_dir': source_dir or '',
+            'exclude_patterns': list(exclude_patterns),
+            'atomic_publish': bool(atomic_publish),
+            **self.header_settings(),
+        }
+        recorded = self.read_sync_state()
+        previous = recorded if incremental else None
+        same_config = previous is not None and all(previous.get(k) == v for k, v in state.items())
+        # Objects written under other header settings (or by an older syncer) keep
+        # their headers until rewritten — check every unchanged one this time
+        verify_headers = recorded is None or any(
+            recorded.get(k) != v for k, v in self.header_settings().items()
+        )
+        
+        if same_config and previous.get('commit') == head:
+            logger.info(f"Branch {branch} is still at {head[:7]}, nothing to sync")
+            return {**SyncProgress(0).report(), 'mode': 'unchanged', 'commit': head}
+        
+        if atomic_publish:
+            release_prefix = f"{RELEASES_PREFIX}{head}/"
+            pointer = self.read_release_pointer()
+            sync_options = {
+                'key_prefix': release_prefix,
+                'prune': True,
+                'copy_from': pointer['current'] if pointer and pointer['current'] != release_prefix else None,
+                'verify_headers': verify_headers,
+            }
+            files = None
+        else:
+            sync_options = {'prune': prune, 'verify_headers': verify_headers}
+            files = self.compare_commits(repo_url, previous['commit'], head) if same_config else None
+        
+        if files is not None:
+            report = self.sync_changes(repo_url, files, head, source_dir, exclude_patterns, prune=prune)
+            report['mode'] = 'incremental'
+        else:
+            # Download the exact commit that was resolved, so the recorded state matches the content
+            if stream_archive:
+                report = self.sync_archive(repo_url, head, source_dir, exclude_patterns, **sync_options)
+            else:
+                report = self.sync_extracted(repo_url, head, source_dir, exclude_patterns, **sync_options)
+            report['mode'] = 'full'
+        
+        report['commit'] = head
+        if atomic_publish:
+            report['release'] = release_prefix
+            report['published'] = not report['failed_files']
+            if report['published']:
+                report['deleted_files'] += self.publish_release(release_prefix, distribution_id)
+        if not report['failed_files']:
+            self.write_sync_state({**state, 'branch': branch, 'commit': head, 'synced_at': int(time.time())})
+        return report
+
+
+def is_sync_metadata(key):
+    """True for objects the syncer manages itself — never pruned as stale content."""
+    return key in (SYNC_STATE_KEY, RELEASE_POINTER_KEY) or key.startswith(RELEASES_PREFIX)
+
+
+def repo_path_to_key(path, source_dir=None, exclude_patterns=()):
+    """S3 key for a '/'-separated repository path, or None when it is outside source_dir or excluded."""
+    prefix = source_dir.strip('/') + '/' if source_dir else ''
+    if not path.startswith(prefix):
+        return None
+    relative_path = path[len(prefix):]
+    if compile_excludes(tuple(exclude_patterns)).excludes(relative_path):
+        return None
+    return relative_path
+
+
+class ExcludeMatcher:
+    """Gitignore-style exclude patterns compiled into one regular expression.
+    
+    Paths are '/'-separated and relative to the sync root:
+    
+      name, *.pyc     no '/' — matches a file or directory of that name at any depth
+      docs/*.md       contains '/' — anchored at the sync root (a leading '/' is dropped)
+      build/          trailing '/' — matches directories only
+      *, ?, [a-z]     wildcards within one path component; ** spans components
+      !pattern        re-includes paths an earlier pattern excluded, unless a
+                      parent directory is excluded (as in gitignore)
+    
+    A path is excluded when it or any parent directory matches, so callers
+    that walk a tree can prune excluded directories and never visit them.
+    """
+    
+    def __init__(self, patterns):
+        include, exclude = [], []
+        for pattern in patterns:
+            pattern = pattern.strip()
+            if not pattern or pattern.startswith('#'):
+                continue
+            if pattern.startswith('!'):
+                include.append(self._translate(pattern[1:]))
+            else:
+                exclude.append(self._translate(pattern))
+        self._exclude = re.compile('|'.join(exclude)) if exclude else None
+        self._include = re.compile('|'.join(include)) if include else None
+    
+    def excludes(self, path, is_dir=False):
+        """True when the path (or one of its parent directories) is excluded."""
+        if self._exclude is None:
+            return False
+        # The trailing '/' lets directory-only patterns match directories
+        subject = path + '/' if is_dir else path
+        if self._include is None:
+            return bool(self._exclude.match(subject))
+        # A re-include cannot reach inside an excluded directory — the walk never
+        # visits it, so per-path checks (archives, compare lists) must agree
+        end = path.find('/')
+        while end != -1:
+            if self._excluded(path[:end + 1]):
+                return True
+            end = path.find('/', end + 1)
+        return self._excluded(subject)
+    
+    def _excluded(self, subject):
+        return bool(self._exclude.match(subject)) and not self._include.match(subject)
+    
+    @staticmethod
+    def _translate(pattern):
+        """Regex for one pattern, matching a path whose leading components match it."""
+        directory_only = pattern.endswith('/')
+        # Checked before stripping, so a leading '/' (as in '/build') anchors too
+        anchored = '/' in pattern.rstrip('/')
+        pattern = pattern.strip('/')
+        regex = []
+        i = 0
+        while i < len(pattern):
+            char = pattern[i]
+            if pattern.startswith('**/', i):
+                regex.append('(?:.*/)?')
+                i += 3
+                continue
+            if pattern.startswith('**', i):
+                regex.append('.*')
+                i += 2
+                continue
+            if char == '*':
+                regex.append('[^/]*')
+            elif char == '?':
+                regex.append('[^/]')
+            elif char == '[' and pattern.find(']', i + 2) != -1:
+                end = pattern.find(']', i + 2)
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                regex.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end + 1
+                continue
+            else:
+                regex.append(re.escape(char))
+            i += 1
+        prefix = '' if anchored else '(?:.*/)?'
+        # The path itself ($) or anything below it (/); directory-only patterns need the '/'
+        suffix = '/' if directory_only else '(?:/|$)'
+        return f"(?:{prefix}{''.join(regex)}{suffix})"
+
+
+@functools.lru_cache(maxsize=32)
+def compile_excludes(patterns):
+    """Cached ExcludeMatcher for a tuple of exclude patterns."""
+    return ExcludeMatcher(patterns)
 
 
 def lambda_handler(event, context):
@@ -156,7 +1138,15 @@ def lambda_handler(event, context):
         "branch": "main",  # optional, defaults to main
         "source_dir": "dist",  # optional, sync specific subdirectory
         "exclude_patterns": [".git", "*.md"],  # optional
-        "github_token": "ghp_xxx"  # optional, for private repos
+        "github_token": "ghp_xxx",  # optional, for private repos
+        "max_workers": 16,  # optional, concurrent uploads (SYNC_MAX_WORKERS)
+        "stream_archive": true,  # optional; false downloads and extracts a ZIP to /tmp
+        "incremental": true,  # optional; false ignores the recorded last-synced commit
+        "prune": false,  # optional; delete objects no longer in the repository
+        "atomic_publish": false,  # optional; upload to releases/<sha>/, then switch the pointer
+        "cloudfront_distribution_id": "E123",  # optional; origin path switched on atomic publish
+        "content_encoding": "gzip",  # optional; gzip, br (needs brotli) or none (SYNC_CONTENT_ENCODING)
+        "cache_control": {"assets/*": "public, max-age=86400"}  # optional; checked before the built-in rules
     }
     """
     
@@ -171,50 +1161,50 @@ def lambda_handler(event, context):
             '*.pyc', '.DS_Store', 'node_modules', '.env'
         ])
         github_token = event.get('github_token') or os.environ.get('GITHUB_TOKEN')
+        max_workers = int(event.get('max_workers', DEFAULT_MAX_WORKERS))
+        stream_archive = event.get('stream_archive', True)
+        incremental = event.get('incremental', True)
+        prune = event.get('prune', False)
+        atomic_publish = event.get('atomic_publish', False)
+        distribution_id = event.get('cloudfront_distribution_id')
+        content_encoding = event.get('content_encoding', DEFAULT_CONTENT_ENCODING)
+        cache_control_rules = list(event.get('cache_control', {}).items())
         
         logger.info(f"Starting sync: {repo_url} -> s3://{bucket_name}")
         
         # Initialize syncer
-        syncer = LambdaGitHubS3Sync(bucket_name, github_token)
+        syncer = LambdaGitHubS3Sync(
+            bucket_name, github_token, max_workers=max_workers,
+            content_encoding=content_encoding, cache_control_rules=cache_control_rules
+        )
         
-        # Create temporary directory
-        with tempfile.TemporaryDirectory() as temp_dir:
-            # Download repository ZIP
-            zip_path = syncer.download_repo_zip(repo_url, branch)
-            
-            try:
-                # Extract ZIP
-                extracted_dir = syncer.extract_zip(zip_path, temp_dir)
-                
-                # Determine sync source
-                sync_source = extracted_dir
-                if source_dir:
-                    sync_source = os.path.join(extracted_dir, source_dir)
-                    if not os.path.exists(sync_source):
-                        raise ValueError(f"Source directory '{source_dir}' not found in repository")
-                
-                # Sync to S3
-                uploaded, skipped = syncer.sync_directory(sync_source, exclude_patterns)
-                
-                result = {
-                    'statusCode': 200,
-                    'body': json.dumps({
-                        'message': 'Sync completed successfully',
-                        'uploaded_files': uploaded,
-                        'skipped_files': skipped,
-                        'bucket': bucket_name,
-                        'repository': repo_url,
-                        'branch': branch
-                    })
-                }
-                
-                logger.info(f"Sync completed: {uploaded} uploaded, {skipped} skipped")
-                return result
-                
-            finally:
-                # Clean up ZIP file
-                if os.path.exists(zip_path):
-                    os.unlink(zip_path)
+        # Sync to S3 — skipped when the branch has not moved, incremental when
+        # possible, otherwise streamed from the tarball or from an extracted ZIP
+        report = syncer.sync_repository(
+            repo_url, branch, source_dir, exclude_patterns,
+            stream_archive=stream_archive, incremental=incremental, prune=prune,
+            atomic_publish=atomic_publish, distribution_id=distribution_id
+        )
+        
+        result = {
+            'statusCode': 200,
+            'body': json.dumps({
+                'message': 'Sync completed successfully' if not report['failed_files']
+                           else 'Sync completed with failed uploads',
+                **report,
+                'bucket': bucket_name,
+                'repository': repo_url,
+                'branch': branch
+            })
+        }
+        
+        logger.info(
+            f"Sync completed: {report['uploaded_files']} uploaded, {report['updated_files']} headers updated, "
+            f"{report['skipped_files']} skipped, "
+            f"{report['failed_files']} failed in {report['duration_seconds']}s "
+            f"({report['mb_per_second']} MB/s)"
+        )
+        return result
     
     except Exception as e:
         logger.error(f"Sync failed: {str(e)}")
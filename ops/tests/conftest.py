@@ -0,0 +1,8 @@
+"""
+Put ops/ on sys.path so the Lambda module imports as it does when deployed.
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
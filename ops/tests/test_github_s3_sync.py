@@ -0,0 +1,627 @@
+"""
+Unit tests for the GitHub → S3 sync Lambda: pruning, batched deletes,
+atomic release publishing, upload headers and the incremental and streamed
+archive sync paths, against moto.
+"""
+
+import hashlib
+import io
+import os
+import tarfile
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import nullcontext
+from unittest.mock import patch
+
+import boto3
+from moto import mock_aws
+
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+import github_s3_sync  # noqa: E402  (after env setup)
+
+BUCKET = "test-site-bucket"
+REPO = "https://github.com/owner/repo"
+
+
+def _tarball(files: dict) -> bytes:
+    """A GitHub-style tar.gz: every file under one owner-repo-sha/ folder."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for path, content in files.items():
+            info = tarfile.TarInfo(f"owner-repo-abc123/{path}")
+            info.size = len(content)
+            archive.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+class _TarballResponse:
+    def __init__(self, files: dict):
+        self.raw = io.BytesIO(_tarball(files))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+def _keys(s3) -> list:
+    return sorted(obj["Key"] for obj in s3.list_objects_v2(Bucket=BUCKET).get("Contents", []))
+
+
+@mock_aws
+class TestPrune(unittest.TestCase):
+
+    def setUp(self):
+        self.s3 = boto3.client("s3")
+        self.s3.create_bucket(Bucket=BUCKET)
+        for key in ("index.html", "old.html", "assets/old.js", github_s3_sync.SYNC_STATE_KEY):
+            self.s3.put_object(Bucket=BUCKET, Key=key, Body=b"old")
+        self.syncer = github_s3_sync.LambdaGitHubS3Sync(BUCKET, max_workers=2)
+
+    def _sync_archive(self, files: dict, **options):
+        with patch.object(self.syncer, "download_repo_tarball", return_value=_TarballResponse(files)):
+            return self.syncer.sync_archive(REPO, "main", **options)
+
+    def test_deletes_objects_no_longer_in_the_source(self):
+        report = self._sync_archive({"dist/index.html": b"<html>new</html>"}, source_dir="dist", prune=True)
+
+        assert report["deleted_files"] == 2
+        assert _keys(self.s3) == sorted(["index.html", github_s3_sync.SYNC_STATE_KEY])
+
+    def test_missing_source_dir_raises_before_anything_is_deleted(self):
+        with self.assertRaises(ValueError):
+            self._sync_archive({"site/index.html": b"<html></html>"}, source_dir="dist", prune=True)
+
+        assert len(_keys(self.s3)) == 4
+
+    def test_refuses_to_prune_after_a_failed_upload(self):
+        progress = github_s3_sync.SyncProgress()
+        progress.synced_keys.add("index.html")
+        progress.record("uploaded")
+        progress.record("failed")
+
+        report = self.syncer.prune_stale(progress)
+
+        assert report["deleted_files"] == 0
+        assert len(_keys(self.s3)) == 4
+
+    def test_refuses_to_prune_when_nothing_was_synced(self):
+        with tempfile.TemporaryDirectory() as empty_dir:
+            report = self.syncer.sync_directory(empty_dir, prune=True)
+
+        assert report["total_files"] == 0
+        assert len(_keys(self.s3)) == 4
+
+
+@mock_aws
+class TestDeleteKeys(unittest.TestCase):
+
+    def test_deletes_in_batches(self):
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket=BUCKET)
+        keys = [f"file{i}.txt" for i in range(5)]
+        for key in keys:
+            s3.put_object(Bucket=BUCKET, Key=key, Body=b"x")
+        syncer = github_s3_sync.LambdaGitHubS3Sync(BUCKET)
+
+        with patch.object(github_s3_sync, "DELETE_BATCH_SIZE", 2), \
+                patch.object(syncer.s3_client, "delete_objects", wraps=syncer.s3_client.delete_objects) as delete:
+            deleted = syncer.delete_keys(keys)
+
+        assert deleted == 5
+        assert [len(call.kwargs["Delete"]["Objects"]) for call in delete.call_args_list] == [2, 2, 1]
+        assert _keys(s3) == []
+
+
+@mock_aws
+class TestPublishRelease(unittest.TestCase):
+
+    def test_keeps_the_newest_releases_and_deletes_the_rest(self):
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket=BUCKET)
+        syncer = github_s3_sync.LambdaGitHubS3Sync(BUCKET)
+        releases = [f"{github_s3_sync.RELEASES_PREFIX}{sha}/" for sha in ("aaa", "bbb", "ccc", "ddd")]
+
+        deleted = 0
+        with patch.object(github_s3_sync, "RELEASES_TO_KEEP", 2):
+            for release in releases:
+                s3.put_object(Bucket=BUCKET, Key=f"{release}index.html", Body=release.encode())
+                deleted += syncer.publish_release(release)
+
+        assert deleted == 2
+        assert syncer.read_release_pointer() == {"current": releases[3], "history": [releases[2]]}
+        assert _keys(s3) == sorted([f"{releases[2]}index.html", f"{releases[3]}index.html",
+                                    github_s3_sync.RELEASE_POINTER_KEY])
+
+    def test_republishing_the_current_release_does_not_duplicate_history(self):
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket=BUCKET)
+        syncer = github_s3_sync.LambdaGitHubS3Sync(BUCKET)
+
+        syncer.publish_release("releases/aaa/")
+        syncer.publish_release("releases/bbb/")
+        syncer.publish_release("releases/bbb/")
+
+        assert syncer.read_release_pointer() == {"current": "releases/bbb/", "history": ["releases/aaa/"]}
+
+
+@mock_aws
+class TestUploadHeaders(unittest.TestCase):
+
+    def setUp(self):
+        self.s3 = boto3.client("s3")
+        self.s3.create_bucket(Bucket=BUCKET)
+        self.site = tempfile.TemporaryDirectory()
+        self.addCleanup(self.site.cleanup)
+        os.makedirs(os.path.join(self.site.name, "assets"))
+        for path, content in {"index.html": b"<html></html>", "assets/app.js": b"console.log(1);"}.items():
+            with open(os.path.join(self.site.name, path), "wb") as f:
+                f.write(content)
+
+    def _cache_control(self, key: str) -> str:
+        return self.s3.head_object(Bucket=BUCKET, Key=key).get("CacheControl")
+
+    def test_custom_rules_match_inside_a_release_prefix(self):
+        syncer = github_s3_sync.LambdaGitHubS3Sync(BUCKET, cache_control_rules=[("assets/*", "public, max-age=86400")])
+
+        syncer.sync_directory(self.site.name, key_prefix="releases/abc/")
+
+        assert self._cache_control("releases/abc/assets/app.js") == "public, max-age=86400"
+        assert self._cache_control("releases/abc/index.html") == github_s3_sync.CACHE_CONTROL_HTML
+
+    def test_only_fingerprinted_assets_are_immutable(self):
+        syncer = github_s3_sync.LambdaGitHubS3Sync(BUCKET)
+        hashed = ["assets/app.3f9c2a1b.js", "assets/index-BXz1_k9Q.css", "main.5e8a2c1d9f0b3a7e.chunk.js"]
+        plain = ["profile-picture1.png", "resume-2024final.pdf", "photo-20240101.jpg", "app.bundle.js", "logo.png"]
+
+        assert {syncer.get_cache_control(key) for key in hashed} == {github_s3_sync.CACHE_CONTROL_IMMUTABLE}
+        assert {syncer.get_cache_control(key) for key in plain} == {github_s3_sync.CACHE_CONTROL_DEFAULT}
+
+    def test_headers_of_unchanged_objects_are_rewritten_when_verified(self):
+        with open(os.path.join(self.site.name, "logo.png"), "wb") as f:
+            f.write(b"\x89PNG")
+        self.s3.put_object(Bucket=BUCKET, Key="logo.png", Body=b"\x89PNG", ContentType="image/png")
+        syncer = github_s3_sync.LambdaGitHubS3Sync(BUCKET)
+        syncer.sync_directory(self.site.name)
+
+        assert self._cache_control("logo.png") is None  # content unchanged, headers not checked
+
+        report = syncer.sync_directory(self.site.name, verify_headers=True)
+
+        assert report["updated_files"] == 1
+        assert self._cache_control("logo.png") == github_s3_sync.CACHE_CONTROL_DEFAULT
+        assert self.s3.get_object(Bucket=BUCKET, Key="logo.png")["Body"].read() == b"\x89PNG"
+        assert syncer.sync_directory(self.site.name, verify_headers=True)["skipped_files"] == 3
+
+    def test_repository_sync_verifies_headers_only_when_the_settings_change(self):
+        files = {"index.html": b"<html></html>", "logo.png": b"\x89PNG"}
+        self.s3.put_object(Bucket=BUCKET, Key="logo.png", Body=b"\x89PNG", ContentType="image/png")
+
+        def sync(head, **settings):
+            syncer = github_s3_sync.LambdaGitHubS3Sync(BUCKET, **settings)
+            with patch.object(syncer, "get_branch_head", return_value=head), \
+                    patch.object(syncer, "download_repo_tarball", side_effect=lambda *a: _TarballResponse(files)), \
+                    patch.object(syncer, "compare_commits", return_value=None):
+                return syncer.sync_repository(REPO, "main")
+
+        assert sync("a" * 40)["updated_files"] == 1  # no recorded settings yet
+        assert sync("b" * 40)["updated_files"] == 0
+        rules = [("*.png", "public, max-age=600")]
+        assert sync("c" * 40, cache_control_rules=rules)["updated_files"] == 1
+        assert self._cache_control("logo.png") == "public, max-age=600"
+
+
+@mock_aws
+class TestIncrementalSync(unittest.TestCase):
+
+    def test_fetches_stay_a_bounded_window_ahead_of_uploads(self):
+        boto3.client("s3").create_bucket(Bucket=BUCKET)
+        syncer = github_s3_sync.LambdaGitHubS3Sync(BUCKET, max_workers=2)
+        files = [{"filename": f"page{i:02}.html", "status": "modified"} for i in range(30)]
+        lock = threading.Lock()
+        held = {"bodies": 0, "peak": 0}
+        sync_file = syncer.sync_file
+
+        def fetch_file(repo_url, path, ref):
+            with lock:
+                held["bodies"] += 1
+                held["peak"] = max(held["peak"], held["bodies"])
+            return path.encode()
+
+        def slow_sync_file(*args, **kwargs):
+            time.sleep(0.01)
+            try:
+                return sync_file(*args, **kwargs)
+            finally:
+                with lock:
+                    held["bodies"] -= 1
+
+        with patch.object(syncer, "fetch_file", side_effect=fetch_file), \
+                patch.object(syncer, "sync_file", side_effect=slow_sync_file):
+            report = syncer.sync_changes(REPO, files, "a" * 40)
+
+        assert report["uploaded_files"] == 30
+        # fetch-ahead window plus sync_entries' upload slots, each twice max_workers
+        assert held["peak"] <= 2 * 2 * 2 + 1
+
+    def _sync_changes(self, prune, fail_upload=False):
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket=BUCKET)
+        for key in ("index.html", "old.html", "moved.html"):
+            s3.put_object(Bucket=BUCKET, Key=key, Body=b"old")
+        files = [
+            {"filename": "index.html", "status": "modified"},
+            {"filename": "old.html", "status": "removed"},
+            {"filename": "new.html", "status": "renamed", "previous_filename": "moved.html"},
+        ]
+        syncer = github_s3_sync.LambdaGitHubS3Sync(BUCKET, max_workers=2)
+        error = github_s3_sync.S3UploadFailedError("boom")
+        with patch.object(syncer, "fetch_file", side_effect=lambda repo_url, path, ref: path.encode()), \
+                patch.object(syncer.s3_client, "upload_fileobj", side_effect=error) if fail_upload else nullcontext():
+            report = syncer.sync_changes(REPO, files, "a" * 40, prune=prune)
+        return report, _keys(s3)
+
+    def test_removed_files_are_kept_without_prune(self):
+        report, keys = self._sync_changes(prune=False)
+
+        assert report["deleted_files"] == 0
+        assert keys == ["index.html", "moved.html", "new.html", "old.html"]
+
+    def test_removed_files_are_deleted_with_prune(self):
+        report, keys = self._sync_changes(prune=True)
+
+        assert report["deleted_files"] == 2
+        assert keys == ["index.html", "new.html"]
+
+    def test_failed_upload_leaves_removed_files_in_place(self):
+        report, keys = self._sync_changes(prune=True, fail_upload=True)
+
+        assert report["failed_files"] == 2
+        assert report["deleted_files"] == 0
+        assert keys == ["index.html", "moved.html", "old.html"]
+
+
+@mock_aws
+class TestRemoteManifest(unittest.TestCase):
+
+    def setUp(self):
+        self.s3 = boto3.client("s3")
+        self.s3.create_bucket(Bucket=BUCKET)
+        self.s3.put_object(Bucket=BUCKET, Key="logo.png", Body=b"\x89PNG")
+        self.syncer = github_s3_sync.LambdaGitHubS3Sync(BUCKET, max_workers=2)
+
+    def test_manifest_leaves_out_releases_and_sync_metadata_at_the_root(self):
+        for key in (github_s3_sync.SYNC_STATE_KEY, github_s3_sync.RELEASE_POINTER_KEY,
+                    f"{github_s3_sync.RELEASES_PREFIX}abc/logo.png"):
+            self.s3.put_object(Bucket=BUCKET, Key=key, Body=b"{}")
+
+        assert sorted(self.syncer.build_remote_manifest()) == ["logo.png"]
+        assert sorted(self.syncer.build_remote_manifest(github_s3_sync.RELEASES_PREFIX)) == [
+            f"{github_s3_sync.RELEASES_PREFIX}abc/logo.png"
+        ]
+
+    def test_size_mismatch_uploads_without_hashing(self):
+        manifest = self.syncer.build_remote_manifest()
+
+        with patch.object(self.syncer, "etag_matches") as etag_matches:
+            assert self.syncer.file_needs_upload(b"\x89PNG changed", "logo.png", manifest)
+        etag_matches.assert_not_called()
+
+    def test_matching_etag_skips_the_upload(self):
+        progress = github_s3_sync.SyncProgress()
+
+        with patch.object(self.syncer.s3_client, "head_object") as head_object, \
+                patch.object(self.syncer.s3_client, "upload_fileobj") as upload_fileobj:
+            report = self.syncer.sync_entries([(b"\x89PNG", "logo.png", False), (b"new", "new.png", False)], progress)
+
+        assert report["skipped_files"] == 1
+        assert report["uploaded_files"] == 1
+        head_object.assert_not_called()
+        assert [c.args[2] for c in upload_fileobj.call_args_list] == ["new.png"]
+
+    def test_unlistable_bucket_falls_back_to_head_per_file(self):
+        denied = github_s3_sync.ClientError({"Error": {"Code": "AccessDenied", "Message": "no"}}, "ListObjectsV2")
+        paginator = self.syncer.s3_client.get_paginator("list_objects_v2")
+        head_object = self.syncer.s3_client.head_object
+        progress = github_s3_sync.SyncProgress()
+
+        with patch.object(paginator, "paginate", side_effect=denied), \
+                patch.object(self.syncer.s3_client, "get_paginator", return_value=paginator), \
+                patch.object(self.syncer.s3_client, "head_object", side_effect=head_object) as head:
+            assert self.syncer.build_remote_manifest() is None
+            report = self.syncer.sync_entries([(b"\x89PNG", "logo.png", False), (b"new", "new.png", False)], progress)
+
+        assert report["skipped_files"] == 1
+        assert report["uploaded_files"] == 1
+        assert sorted(c.kwargs["Key"] for c in head.call_args_list) == ["logo.png", "new.png"]
+
+
+@mock_aws
+class TestSyncEntries(unittest.TestCase):
+
+    def setUp(self):
+        boto3.client("s3").create_bucket(Bucket=BUCKET)
+        self.syncer = github_s3_sync.LambdaGitHubS3Sync(BUCKET, max_workers=3)
+
+    def test_failed_upload_is_counted_and_the_rest_still_upload(self):
+        entries = [(f"file {n}".encode(), f"f{n}.png", False) for n in range(10)]
+        sync_file = self.syncer.sync_file
+
+        def failing_sync_file(source, s3_key, *args):
+            if s3_key == "f4.png":
+                raise github_s3_sync.S3UploadFailedError("boom")
+            return sync_file(source, s3_key, *args)
+
+        with patch.object(self.syncer, "sync_file", side_effect=failing_sync_file):
+            report = self.syncer.sync_entries(entries, github_s3_sync.SyncProgress(len(entries)))
+
+        assert report["total_files"] == 10
+        assert report["uploaded_files"] == 9
+        assert report["failed_files"] == 1
+        assert report["uploaded_bytes"] == sum(len(source) for source, key, _ in entries if key != "f4.png")
+        assert _keys(boto3.client("s3")) == sorted(f"f{n}.png" for n in range(10) if n != 4)
+
+    def test_in_memory_bytes_stay_within_the_budget(self):
+        entries = [(bytes(40), f"f{n}.png", False) for n in range(12)] + [(bytes(250), "big.png", False)]
+        lock = threading.Lock()
+        held = {"bytes": 0}
+        observed = []
+
+        def slow_sync_file(source, *args):
+            with lock:
+                held["bytes"] += len(source)
+                observed.append(held["bytes"])
+            time.sleep(0.01)
+            with lock:
+                held["bytes"] -= len(source)
+            return "uploaded", len(source)
+
+        with patch.object(github_s3_sync, "IN_FLIGHT_MAX_BYTES", 100), \
+                patch.object(self.syncer, "sync_file", side_effect=slow_sync_file):
+            report = self.syncer.sync_entries(entries, github_s3_sync.SyncProgress(), list_remote=False)
+
+        assert report["uploaded_files"] == 13
+        # At most two 40-byte entries at once, though three workers are free;
+        # the entry above the whole budget runs on its own
+        assert max(observed[:-1]) == 80
+        assert observed[-1] == 250
+
+
+class TestEtag(unittest.TestCase):
+
+    MIB = 1024 * 1024
+
+    def setUp(self):
+        self.syncer = github_s3_sync.LambdaGitHubS3Sync(BUCKET)
+
+    @staticmethod
+    def _multipart_etag(data: bytes, part_size: int) -> str:
+        parts = [hashlib.md5(data[i:i + part_size]).digest() for i in range(0, len(data), part_size)]
+        return f"{hashlib.md5(b''.join(parts)).hexdigest()}-{len(parts)}"
+
+    def test_single_part_etag_is_the_content_md5(self):
+        data = b"x" * (github_s3_sync.MULTIPART_CHUNK_BYTES - 1)
+
+        assert self.syncer.calculate_etag(data) == hashlib.md5(data).hexdigest()
+        assert self.syncer.etag_matches(data, hashlib.md5(data).hexdigest())
+
+    def test_multipart_etag_at_and_just_over_the_threshold(self):
+        chunk = github_s3_sync.MULTIPART_CHUNK_BYTES
+        at_threshold = os.urandom(chunk)
+        just_over = at_threshold + b"!"
+
+        assert self.syncer.calculate_etag(at_threshold) == self._multipart_etag(at_threshold, chunk)
+        assert self.syncer.calculate_etag(at_threshold).endswith("-1")
+        assert self.syncer.calculate_etag(just_over) == self._multipart_etag(just_over, chunk)
+        assert self.syncer.calculate_etag(just_over).endswith("-2")
+
+    @mock_aws
+    def test_etag_of_our_own_multipart_upload_is_reproduced(self):
+        s3 = boto3.client("s3")
+        s3.create_bucket(Bucket=BUCKET)
+        data = os.urandom(github_s3_sync.MULTIPART_CHUNK_BYTES + 1)
+        self.syncer.s3_client.upload_fileobj(io.BytesIO(data), BUCKET, "big.bin", Config=self.syncer.transfer_config)
+
+        etag = s3.head_object(Bucket=BUCKET, Key="big.bin")["ETag"].strip('"')
+
+        assert etag.endswith("-2")
+        assert self.syncer.calculate_etag(data) == etag
+        assert self.syncer.etag_matches(data, etag)
+
+    def test_part_size_changes_the_etag(self):
+        data = os.urandom(12 * self.MIB)
+
+        assert self.syncer.calculate_etag(data, 5 * self.MIB) == self._multipart_etag(data, 5 * self.MIB)
+        assert self.syncer.calculate_etag(data, 5 * self.MIB) != self.syncer.calculate_etag(data, 8 * self.MIB)
+        # Same content, other tool's part size (16 MiB, one part): still recognised
+        assert self.syncer.etag_matches(data, self._multipart_etag(data, 16 * self.MIB))
+        # Same part count and size as 8 MiB parts, different bytes: no match
+        assert not self.syncer.etag_matches(data, self._multipart_etag(os.urandom(12 * self.MIB), 8 * self.MIB))
+
+    def test_unreproducible_multipart_etag_means_upload(self):
+        data = os.urandom(12 * self.MIB)
+        # 7 MiB parts give 2 parts, but 7 MiB is not a candidate part size for 12 MiB
+        etag = self._multipart_etag(data, 7 * self.MIB)
+        assert 7 * self.MIB not in self.syncer.multipart_part_sizes(len(data), 2)
+
+        assert not self.syncer.etag_matches(data, etag)
+        assert self.syncer.file_needs_upload(data, "big.bin", {"big.bin": (etag, len(data))})
+
+
+class TestExcludeMatcher(unittest.TestCase):
+
+    def _excluded(self, patterns: list, paths: list) -> list:
+        matcher = github_s3_sync.ExcludeMatcher(patterns)
+        return [path for path in paths if matcher.excludes(path)]
+
+    def test_glob_matches_file_names_at_any_depth(self):
+        paths = ["x.pyc", "tools/__pycache__/x.pyc", "a/b/c.pyc", "x.pyc.txt", "notes.pyc/readme.md"]
+
+        assert self._excluded(["*.pyc"], paths) == ["x.pyc", "tools/__pycache__/x.pyc", "a/b/c.pyc", "notes.pyc/readme.md"]
+
+    def test_name_matches_whole_components_only(self):
+        paths = [".git/HEAD", "sub/.git/config", ".github-pages/index.html", ".gitignore", "my.git/x"]
+
+        assert self._excluded([".git"], paths) == [".git/HEAD", "sub/.git/config"]
+
+    def test_leading_slash_anchors_at_the_root(self):
+        paths = ["build/app.js", "src/build/app.js", "build.txt"]
+
+        assert self._excluded(["/build"], paths) == ["build/app.js"]
+
+    def test_trailing_slash_matches_directories_only(self):
+        matcher = github_s3_sync.ExcludeMatcher(["logs/"])
+
+        assert matcher.excludes("logs", is_dir=True)
+        assert matcher.excludes("logs/today.txt")
+        assert matcher.excludes("app/logs/today.txt")
+        assert not matcher.excludes("logs")
+        assert not matcher.excludes("catalogs/x.txt")
+
+    def test_double_star_spans_directories(self):
+        paths = ["tmp/a", "a/b/tmp/c", "docs/a.md", "docs/x/y/b.md", "docs/x/y/b.txt", "other/docs/a.md"]
+
+        assert self._excluded(["**/tmp"], paths) == ["tmp/a", "a/b/tmp/c"]
+        assert self._excluded(["docs/**/*.md"], paths) == ["docs/a.md", "docs/x/y/b.md"]
+
+    def test_pattern_with_a_slash_matches_the_nested_path_from_the_root(self):
+        paths = ["docs/drafts/a.md", "docs/drafts", "blog/docs/drafts/a.md", "docs/drafts-old/a.md"]
+
+        assert self._excluded(["docs/drafts"], paths) == ["docs/drafts/a.md", "docs/drafts"]
+
+    def test_negation_reincludes_files_but_not_inside_excluded_directories(self):
+        paths = ["app.log", "keep.log", "logs/keep.log", "node_modules/keep.js"]
+
+        assert self._excluded(["*.log", "!keep.log", "node_modules", "!keep.js"], paths) == ["app.log", "node_modules/keep.js"]
+        assert self._excluded(["logs/", "!keep.log"], paths) == ["logs/keep.log"]
+
+    def test_directory_pruning_agrees_with_the_per_file_result(self):
+        patterns = [".git", "*.pyc", "/build", "logs/", "**/tmp", "docs/drafts", "node_modules", "!keep.js",
+                    "*.log", "!important.log"]
+        files = [
+            "index.html", ".git/HEAD", ".github-pages/index.html", "src/x.pyc", "src/x.py", "build/app.js",
+            "src/build/app.js", "logs/a.txt", "app/logs/b.txt", "a/tmp/c.txt", "docs/drafts/d.md", "docs/post.md",
+            "blog/docs/drafts/e.md", "node_modules/keep.js", "lib/keep.js", "debug.log", "important.log",
+            "logs/important.log",
+        ]
+        with tempfile.TemporaryDirectory() as root:
+            for path in files:
+                os.makedirs(os.path.join(root, os.path.dirname(path)), exist_ok=True)
+                open(os.path.join(root, path), "wb").close()
+
+            walked = {key for _, key in github_s3_sync.LambdaGitHubS3Sync(BUCKET).iter_files(root, patterns)}
+
+        matcher = github_s3_sync.ExcludeMatcher(patterns)
+        assert walked == {path for path in files if not matcher.excludes(path)}
+        assert walked == {
+            "index.html", ".github-pages/index.html", "src/x.py", "src/build/app.js", "docs/post.md",
+            "blog/docs/drafts/e.md", "lib/keep.js", "important.log",
+        }
+
+
+def _archive_with_links() -> bytes:
+    """A GitHub-style tar.gz that also holds directory, symlink and top-level members."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+        for name, member_type in (("owner-repo-abc123", tarfile.DIRTYPE), ("owner-repo-abc123/dist", tarfile.DIRTYPE)):
+            info = tarfile.TarInfo(name)
+            info.type = member_type
+            archive.addfile(info)
+        link = tarfile.TarInfo("owner-repo-abc123/dist/latest.html")
+        link.type, link.linkname = tarfile.SYMTYPE, "index.html"
+        archive.addfile(link)
+        for name in ("pax_global_header", "owner-repo-abc123/dist/index.html", "owner-repo-abc123/README.md"):
+            info = tarfile.TarInfo(name)
+            info.size = 4
+            archive.addfile(info, io.BytesIO(b"data"))
+    return buffer.getvalue()
+
+
+class TestIterArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.syncer = github_s3_sync.LambdaGitHubS3Sync(BUCKET)
+
+    def _entries(self, archive: bytes, source_dir=None, exclude_patterns=()) -> dict:
+        entries = {}
+        for source, key, is_temp_file in self.syncer.iter_archive(io.BytesIO(archive), source_dir, exclude_patterns):
+            if is_temp_file:
+                with open(source, "rb") as f:
+                    entries[key] = ("temp", f.read())
+                os.unlink(source)
+            else:
+                entries[key] = ("bytes", source)
+        return entries
+
+    def test_top_level_directory_is_stripped(self):
+        entries = self._entries(_tarball({"index.html": b"<html>", "assets/app.js": b"1;"}))
+
+        assert entries == {"index.html": ("bytes", b"<html>"), "assets/app.js": ("bytes", b"1;")}
+
+    def test_only_files_under_source_dir_are_yielded_relative_to_it(self):
+        archive = _tarball({"dist/index.html": b"a", "dist/css/site.css": b"b", "src/main.ts": b"c", "distro.txt": b"d"})
+
+        assert sorted(self._entries(archive, source_dir="dist/")) == ["css/site.css", "index.html"]
+
+    def test_excluded_members_are_skipped(self):
+        archive = _tarball({
+            "index.html": b"a",
+            ".github/workflows/ci.yml": b"b",
+            "node_modules/x/index.js": b"c",
+            "tools/__pycache__/x.pyc": b"d",
+            ".github-pages/keep.html": b"e",
+        })
+
+        entries = self._entries(archive, exclude_patterns=[".github", "node_modules", "__pycache__", "*.pyc"])
+
+        assert sorted(entries) == [".github-pages/keep.html", "index.html"]
+
+    def test_non_regular_and_top_level_members_are_skipped(self):
+        assert self._entries(_archive_with_links()) == {
+            "dist/index.html": ("bytes", b"data"),
+            "README.md": ("bytes", b"data"),
+        }
+
+    def test_large_members_are_spooled_to_temp_files(self):
+        with patch.object(github_s3_sync, "STREAM_MEMORY_MAX_BYTES", 3):
+            entries = self._entries(_tarball({"big.bin": b"0123456789", "s.txt": b"ab"}))
+
+        assert entries == {"big.bin": ("temp", b"0123456789"), "s.txt": ("bytes", b"ab")}
+
+
+@mock_aws
+class TestSyncArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.s3 = boto3.client("s3")
+        self.s3.create_bucket(Bucket=BUCKET)
+        self.syncer = github_s3_sync.LambdaGitHubS3Sync(BUCKET, max_workers=2)
+
+    def _sync(self, files: dict, **options) -> dict:
+        with patch.object(self.syncer, "download_repo_tarball", side_effect=lambda *a: _TarballResponse(files)):
+            return self.syncer.sync_archive(REPO, "a" * 40, **options)
+
+    def test_uploads_the_source_dir_of_the_streamed_tarball(self):
+        report = self._sync({"dist/index.html": b"<html></html>", "dist/.git/HEAD": b"ref", "src/app.ts": b"x"},
+                            source_dir="dist")
+
+        assert report["uploaded_files"] == 1
+        assert _keys(self.s3) == ["index.html"]
+        assert self.s3.get_object(Bucket=BUCKET, Key="index.html")["ContentType"].startswith("text/html")
+
+    def test_missing_source_dir_raises_before_pruning(self):
+        self.s3.put_object(Bucket=BUCKET, Key="keep.html", Body=b"x")
+
+        with self.assertRaises(ValueError):
+            self._sync({"index.html": b"a"}, source_dir="dist", prune=True)
+        assert _keys(self.s3) == ["keep.html"]
+
+
+if __name__ == "__main__":
+    unittest.main()